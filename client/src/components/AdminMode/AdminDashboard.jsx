@@ -1,22 +1,26 @@
 import React, { useState, useEffect } from 'react';
 import { apiService } from '../../services/api';
 import AppointmentsTable from './AppointmentsTable';
+import PatientSearch from './PatientSearch';
 import { ShieldCheck, RefreshCw, DollarSign, Users, Calendar } from 'lucide-react';
 
 const AdminDashboard = () => {
     const [appointments, setAppointments] = useState([]);
-    const [billingStats, setBillingStats] = useState(null);
+    const [stats, setStats] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [selectedPhone, setSelectedPhone] = useState(null);
+    const [patientAppointments, setPatientAppointments] = useState([]);
 
     const fetchData = async () => {
         setLoading(true);
         try {
-            const [appts, billing] = await Promise.all([
+            // Totals come from the daily rollup, not from every stored call summary
+            const [appts, dailyStats] = await Promise.all([
                 apiService.getAllAppointments(),
-                apiService.getAllBilling()
+                apiService.getDailyStats()
             ]);
             setAppointments(appts);
-            setBillingStats(billing);
+            setStats(dailyStats.totals);
         } catch (err) {
             console.error("Failed to load admin data", err);
         } finally {
@@ -28,6 +32,22 @@ const AdminDashboard = () => {
         fetchData();
     }, []);
 
+    // A patient picked in the search -> the table shows only their appointments
+    const selectPatient = async (phone) => {
+        setSelectedPhone(phone);
+        if (!phone) return;
+        try {
+            setPatientAppointments(await apiService.getUserAppointments(phone));
+        } catch (err) {
+            setPatientAppointments([]);
+        }
+    };
+
+    const refresh = () => {
+        fetchData();
+        selectPatient(selectedPhone);
+    };
+
     return (
         <div className="container" style={{ paddingBottom: '4rem' }}>
             <header style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '2rem', marginTop: '2rem' }}>
@@ -41,7 +61,7 @@ const AdminDashboard = () => {
                     </div>
                 </div>
 
-                <button onClick={fetchData} className="btn-secondary" style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
+                <button onClick={refresh} className="btn-secondary" style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
                     <RefreshCw size={18} /> Refresh Data
                 </button>
             </header>
@@ -65,7 +85,7 @@ const AdminDashboard = () => {
                     <div>
                         <p style={{ color: 'var(--text-secondary)', fontSize: '0.9rem' }}>Total System Cost</p>
                         <h3 style={{ fontSize: '1.5rem', color: 'var(--success)' }}>
-                            ${billingStats?.total_cost ? billingStats.total_cost.toFixed(2) : '0.00'}
+                            ${stats?.total_cost ? stats.total_cost.toFixed(2) : '0.00'}
                         </h3>
                     </div>
                 </div>
@@ -76,7 +96,7 @@ const AdminDashboard = () => {
                     </div>
                     <div>
                         <p style={{ color: 'var(--text-secondary)', fontSize: '0.9rem' }}>Total Calls Processed</p>
-                        <h3 style={{ fontSize: '1.5rem' }}>{billingStats?.total_calls || 0}</h3>
+                        <h3 style={{ fontSize: '1.5rem' }}>{stats?.calls || 0}</h3>
                     </div>
                 </div>
 
@@ -84,12 +104,14 @@ const AdminDashboard = () => {
 
             <h2 style={{ marginBottom: '1.5rem' }}>Appointment Schedule</h2>
 
+            <PatientSearch selectedPhone={selectedPhone} onSelect={selectPatient} />
+
             {loading ? (
                 <div style={{ textAlign: 'center', padding: '4rem', color: 'var(--text-secondary)' }}>
                     Loading dashboard data...
                 </div>
             ) : (
-                <AppointmentsTable appointments={appointments} onRefresh={fetchData} />
+                <AppointmentsTable appointments={selectedPhone ? patientAppointments : appointments} onRefresh={refresh} />
             )}
         </div>
     );
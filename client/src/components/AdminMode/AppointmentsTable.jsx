@@ -1,18 +1,22 @@
-import React, { useState } from 'react';
-import { apiService } from '../../services/api';
+import React, { useRef, useState } from 'react';
+import { apiService, newIdempotencyKey } from '../../services/api';
 import { Calendar, Clock, Edit2, Trash2, User, Phone } from 'lucide-react';
 import ModifyModal from './ModifyModal';
 
 const AppointmentsTable = ({ appointments, onRefresh }) => {
     const [editingAppt, setEditingAppt] = useState(null);
     const [cancelling, setCancelling] = useState(null);
+    // Idempotency-Key per appointment, kept until its cancellation succeeds (a retry reuses it)
+    const cancelKeys = useRef({});
 
     const handleCancel = async (id) => {
         if (!window.confirm("Are you sure you want to cancel this appointment?")) return;
 
         setCancelling(id);
+        if (!cancelKeys.current[id]) cancelKeys.current[id] = newIdempotencyKey();
         try {
-            await apiService.cancelAppointment(id);
+            await apiService.cancelAppointment(id, cancelKeys.current[id]);
+            delete cancelKeys.current[id];
             onRefresh();
         } catch (err) {
             console.error(err);
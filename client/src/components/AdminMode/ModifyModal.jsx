@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { apiService } from '../../services/api';
+import React, { useState, useEffect, useRef } from 'react';
+import { apiService, newIdempotencyKey } from '../../services/api';
 import { X, Save, Clock } from 'lucide-react';
 
 const ModifyModal = ({ appointment, onClose, onUpdate }) => {
@@ -8,6 +8,8 @@ const ModifyModal = ({ appointment, onClose, onUpdate }) => {
     const [loading, setLoading] = useState(true);
     const [saving, setSaving] = useState(false);
     const [error, setError] = useState(null);
+    // Idempotency-Key for the chosen slot: retrying Save reuses it, picking another slot starts a new one
+    const modifyKey = useRef({ slot: null, key: null });
 
     useEffect(() => {
         const fetchSlots = async () => {
@@ -27,8 +29,11 @@ const ModifyModal = ({ appointment, onClose, onUpdate }) => {
     const handleSave = async () => {
         if (!selectedSlot) return;
         setSaving(true);
+        if (modifyKey.current.slot !== selectedSlot) {
+            modifyKey.current = { slot: selectedSlot, key: newIdempotencyKey() };
+        }
         try {
-            await apiService.modifyAppointment(appointment.id, selectedSlot);
+            await apiService.modifyAppointment(appointment.id, selectedSlot, modifyKey.current.key);
             onUpdate();
             onClose();
         } catch (err) {
@@ -0,0 +1,105 @@
+import React, { useState, useEffect } from 'react';
+import { apiService } from '../../services/api';
+import { Search, User, Phone, X } from 'lucide-react';
+
+const PAGE_SIZE = 10;
+
+const PatientSearch = ({ selectedPhone, onSelect }) => {
+    const [query, setQuery] = useState('');
+    const [results, setResults] = useState([]);
+    const [total, setTotal] = useState(0);
+    const [offset, setOffset] = useState(0);
+    const [searching, setSearching] = useState(false);
+
+    // Search as the admin types, once they pause
+    useEffect(() => {
+        if (query.trim().length < 2) {
+            setResults([]);
+            setTotal(0);
+            return;
+        }
+        const timer = setTimeout(async () => {
+            setSearching(true);
+            try {
+                const found = await apiService.searchPatients(query.trim(), PAGE_SIZE, offset);
+                setResults(found.results);
+                setTotal(found.total);
+            } catch (err) {
+                console.error("Patient search failed", err);
+            } finally {
+                setSearching(false);
+            }
+        }, 250);
+        return () => clearTimeout(timer);
+    }, [query, offset]);
+
+    const clear = () => {
+        setQuery('');
+        setOffset(0);
+        onSelect(null);
+    };
+
+    return (
+        <div className="glass-panel" style={{ padding: '1rem', marginBottom: '1.5rem' }}>
+            <div style={{ display: 'flex', alignItems: 'center', gap: '0.75rem' }}>
+                <Search size={18} color="var(--text-secondary)" />
+                <input
+                    value={query}
+                    onChange={(e) => { setQuery(e.target.value); setOffset(0); }}
+                    placeholder="Search patients by name or phone"
+                    style={{
+                        flex: 1,
+                        padding: '0.75rem',
+                        borderRadius: '8px',
+                        background: 'rgba(0,0,0,0.2)',
+                        color: 'white',
+                        border: '1px solid var(--glass-border)'
+                    }}
+                />
+                {(query || selectedPhone) && (
+                    <button onClick={clear} className="btn-secondary" style={{ padding: '8px', borderRadius: '8px' }} title="Show all appointments">
+                        <X size={16} />
+                    </button>
+                )}
+            </div>
+
+            {query.trim().length >= 2 && !selectedPhone && (
+                <div style={{ marginTop: '1rem' }}>
+                    {results.length === 0 ? (
+                        <p style={{ color: 'var(--text-secondary)', fontSize: '0.9rem' }}>
+                            {searching ? 'Searching...' : 'No matching patients.'}
+                        </p>
+                    ) : results.map(patient => (
+                        <div
+                            key={patient.phone}
+                            onClick={() => onSelect(patient.phone)}
+                            style={{ display: 'flex', justifyContent: 'space-between', padding: '0.75rem', borderBottom: '1px solid rgba(255,255,255,0.05)', cursor: 'pointer' }}
+                        >
+                            <div style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
+                                <User size={16} color="var(--accent-secondary)" />
+                                <span style={{ fontWeight: 500 }}>{patient.name || 'Unknown'}</span>
+                                <Phone size={14} style={{ marginLeft: '0.5rem' }} />
+                                <span style={{ color: 'var(--text-secondary)', fontSize: '0.9rem' }}>{patient.phone}</span>
+                            </div>
+                            <span style={{ color: 'var(--text-secondary)', fontSize: '0.85rem' }}>
+                                {patient.appointments} appointment{patient.appointments === 1 ? '' : 's'}
+                            </span>
+                        </div>
+                    ))}
+
+                    {total > PAGE_SIZE && (
+                        <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginTop: '0.75rem', fontSize: '0.85rem', color: 'var(--text-secondary)' }}>
+                            <span>{offset + 1}-{Math.min(offset + PAGE_SIZE, total)} of {total}</span>
+                            <div style={{ display: 'flex', gap: '0.5rem' }}>
+                                <button className="btn-secondary" disabled={offset === 0} onClick={() => setOffset(offset - PAGE_SIZE)}>Previous</button>
+                                <button className="btn-secondary" disabled={offset + PAGE_SIZE >= total} onClick={() => setOffset(offset + PAGE_SIZE)}>Next</button>
+                            </div>
+                        </div>
+                    )}
+                </div>
+            )}
+        </div>
+    );
+};
+
+export default PatientSearch;
@@ -7,24 +7,26 @@ const CallSummary = ({ phone, onDismiss }) => {
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
-        const fetchAppointments = async () => {
+        const fetchOverview = async () => {
             try {
-                // Get all appointments and show only the most recent one (the user's)
-                const allAppointments = await apiService.getAllAppointments();
-                if (allAppointments && allAppointments.length > 0) {
-                    // Sort by booked_at descending (most recent first)
-                    allAppointments.sort((a, b) => new Date(b.booked_at) - new Date(a.booked_at));
-                    // Show only the most recent appointment (belongs to the caller)
-                    setAppointments([allAppointments[0]]);
-                }
+                // One request for the caller's active appointments (with slot times)
+                const overview = await apiService.getPatientOverview(phone, 0);
+                setAppointments(overview.appointments);
             } catch (err) {
-                console.error("Failed to fetch appointments", err);
+                console.error("Failed to fetch patient overview", err);
             } finally {
                 setLoading(false);
             }
         };
 
-        setTimeout(fetchAppointments, 1000);
+        if (!phone) {
+            // Caller was never identified -> nothing could have been booked
+            setLoading(false);
+            return;
+        }
+        // Give the agent a moment to save the call summary
+        const timer = setTimeout(fetchOverview, 1000);
+        return () => clearTimeout(timer);
     }, [phone]);
 
     if (loading) return <div className="glass-panel" style={{ padding: '2rem', textAlign: 'center' }}>Loading appointment details...</div>;
@@ -39,7 +41,7 @@ const CallSummary = ({ phone, onDismiss }) => {
             {appointments.length > 0 ? (
                 <>
                     <p style={{ color: 'var(--text-secondary)', marginBottom: '1.5rem' }}>
-                        Your appointment details:
+                        Your upcoming appointments:
                     </p>
 
                     {appointments.map((appt, index) => (
@@ -82,7 +84,7 @@ const CallSummary = ({ phone, onDismiss }) => {
                 </>
             ) : (
                 <p style={{ color: 'var(--text-secondary)', textAlign: 'center', padding: '2rem 0' }}>
-                    No appointments were booked during this call.
+                    You have no upcoming appointments.
                 </p>
             )}
 
@@ -14,6 +14,8 @@ const VoiceAgent = () => {
     const [showSummary, setShowSummary] = useState(false);
     const [error, setError] = useState(null);
     const [retryCount, setRetryCount] = useState(0);
+    // Set by the agent's PATIENT_IDENTIFIED message -> the summary loads this caller's overview
+    const [callerPhone, setCallerPhone] = useState(null);
 
     useEffect(() => {
         const fetchToken = async () => {
@@ -35,11 +37,12 @@ const VoiceAgent = () => {
         return (
             <div className="container" style={{ display: 'flex', justifyContent: 'center', alignItems: 'center', minHeight: '80vh' }}>
                 <CallSummary
-                    phone={sessionId}
+                    phone={callerPhone}
                     onDismiss={() => {
                         setShowSummary(false);
                         setToken(null);
                         setSessionId('');
+                        setCallerPhone(null);
                         setError(null);
                         setRetryCount(0);
                         // This triggers the useEffect to fetch a new token
@@ -96,16 +99,29 @@ const VoiceAgent = () => {
             onDisconnected={() => setShowSummary(true)}
         >
             <RoomAudioRenderer />
-            <VoiceAgentUI />
+            <VoiceAgentUI onPatientIdentified={setCallerPhone} />
         </LiveKitRoom>
     );
 };
 
-const VoiceAgentUI = () => {
+const VoiceAgentUI = ({ onPatientIdentified }) => {
     const room = useRoomContext();
     const [isMicEnabled, setIsMicEnabled] = useState(true);
     const [isEnding, setIsEnding] = useState(false);
 
+    useEffect(() => {
+        const handleData = (payload) => {
+            try {
+                const data = JSON.parse(new TextDecoder().decode(payload));
+                if (data.type === 'PATIENT_IDENTIFIED') onPatientIdentified(data.phone);
+            } catch (e) {
+                // Not JSON, ignore
+            }
+        };
+        room.on('dataReceived', handleData);
+        return () => room.off('dataReceived', handleData);
+    }, [room, onPatientIdentified]);
+
     const toggleMic = async () => {
         await room.localParticipant.setMicrophoneEnabled(!isMicEnabled);
         setIsMicEnabled(!isMicEnabled);
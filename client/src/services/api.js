@@ -9,6 +9,24 @@ const api = axios.create({
     },
 });
 
+// One key per user action: the caller keeps it for every retry of that action, so the server
+// replays the first result instead of booking, cancelling or modifying twice
+export const newIdempotencyKey = () => crypto.randomUUID();
+
+// Writes are retried on network errors and 5xx responses, with the same Idempotency-Key
+const RETRIES = 2;
+const sendWrite = async (request) => {
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await request();
+        } catch (err) {
+            const transient = !err.response || err.response.status >= 500;
+            if (!transient || attempt >= RETRIES) throw err;
+            await new Promise((resolve) => setTimeout(resolve, 300 * 2 ** attempt));
+        }
+    }
+};
+
 export const apiService = {
     // Appointments
     getAllAppointments: async () => {
@@ -21,25 +39,27 @@ export const apiService = {
         return response.data;
     },
 
-    bookAppointment: async (slotId, phone, patientName, notes) => {
-        const response = await api.post('/v1/appointments', {
+    bookAppointment: async (slotId, phone, patientName, notes, idempotencyKey) => {
+        const response = await sendWrite(() => api.post('/v1/appointments', {
             slot_id: slotId,
             phone,
             patient_name: patientName,
             notes
-        });
+        }, { headers: { 'Idempotency-Key': idempotencyKey } }));
         return response.data;
     },
 
-    cancelAppointment: async (appointmentId) => {
-        const response = await api.post(`/v1/appointments/${appointmentId}/cancel`);
+    cancelAppointment: async (appointmentId, idempotencyKey) => {
+        const response = await sendWrite(() => api.post(`/v1/appointments/${appointmentId}/cancel`, null, {
+            headers: { 'Idempotency-Key': idempotencyKey }
+        }));
         return response.data;
     },
 
-    modifyAppointment: async (appointmentId, newSlotId) => {
-        const response = await api.put(`/v1/appointments/${appointmentId}`, {
+    modifyAppointment: async (appointmentId, newSlotId, idempotencyKey) => {
+        const response = await sendWrite(() => api.put(`/v1/appointments/${appointmentId}`, {
             new_slot_id: newSlotId
-        });
+        }, { headers: { 'Idempotency-Key': idempotencyKey } }));
         return response.data;
     },
 
@@ -65,6 +85,18 @@ export const apiService = {
         return response.data;
     },
 
+    // Patients (Admin)
+    searchPatients: async (query, limit = 20, offset = 0) => {
+        const response = await api.get('/v1/patients/search', { params: { q: query, limit, offset } });
+        return response.data;
+    },
+
+    // User, active appointments (with slots), recent summaries and billing in one request
+    getPatientOverview: async (phone, summaries = 5) => {
+        const response = await api.get(`/v1/patients/${phone}/overview`, { params: { summaries } });
+        return response.data;
+    },
+
     // Summaries
     getAllSummaries: async () => {
         const response = await api.get('/v1/summaries');
@@ -82,6 +114,12 @@ export const apiService = {
         return response.data;
     },
 
+    // Daily stats rollup (Admin) -> per-day series and totals, for all patients or one phone
+    getDailyStats: async (since, until, phone) => {
+        const response = await api.get('/v1/stats/daily', { params: { since, until, phone } });
+        return response.data;
+    },
+
     // LiveKit
     getLiveKitToken: async (phone) => {
         const response = await api.post('/v1/livekit/token', {
@@ -0,0 +1,72 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from livekit import api
+
+logger = logging.getLogger(__name__)
+
+# Set AGENT_NAME on both the API and the agent worker to switch to explicit dispatch.
+# Empty = LiveKit dispatches the agent automatically when the caller joins (old behaviour).
+AGENT_NAME = os.getenv("AGENT_NAME", "")
+# Pre-create the room and dispatch the agent when the token is issued, before the browser connects
+PREDISPATCH_ENABLED = os.getenv("LIVEKIT_PREDISPATCH", "0").lower() in ("1", "true", "yes")
+# A pre-created room nobody joins is closed after this many seconds
+ROOM_EMPTY_TIMEOUT = int(os.getenv("LIVEKIT_ROOM_EMPTY_TIMEOUT", "60"))
+
+_background_tasks = set()
+
+
+# Job metadata -> lets the agent measure time from token to greeting
+def dispatch_metadata(phone: str, issued_at: float) -> str:
+    return json.dumps({"phone": phone, "issued_at": issued_at})
+
+
+def parse_dispatch_metadata(metadata: str) -> dict:
+    try:
+        return json.loads(metadata) if metadata else {}
+    except ValueError:
+        return {}
+
+
+# Dispatch carried in the token: the room is created on join with the agent already requested.
+# If the room was pre-created this is ignored, so it doubles as a fallback for a failed pre-dispatch.
+def room_config(phone: str, issued_at: float) -> api.RoomConfiguration:
+    return api.RoomConfiguration(
+        agents=[api.RoomAgentDispatch(agent_name=AGENT_NAME, metadata=dispatch_metadata(phone, issued_at))]
+    )
+
+
+"""
+Pre-create the room and dispatch the agent through the LiveKit server API.
+Skips the dispatch if the room already has one (caller reconnecting). Returns the dispatch id,
+or None if nothing was dispatched.
+"""
+async def predispatch_agent(url: str, api_key: str, api_secret: str, room_name: str, phone: str,
+                            issued_at: float):
+    start = time.perf_counter()
+    async with api.LiveKitAPI(url, api_key, api_secret) as lkapi:
+        await lkapi.room.create_room(api.CreateRoomRequest(name=room_name, empty_timeout=ROOM_EMPTY_TIMEOUT))
+        existing = await lkapi.agent_dispatch.list_dispatch(room_name)
+        if any(d.agent_name == AGENT_NAME for d in existing):
+            return None
+        dispatch = await lkapi.agent_dispatch.create_dispatch(api.CreateAgentDispatchRequest(
+            agent_name=AGENT_NAME, room=room_name, metadata=dispatch_metadata(phone, issued_at),
+        ))
+    logger.info(f"Pre-dispatched agent to {room_name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return dispatch.id
+
+
+# Run the pre-dispatch without holding up the token response; failures fall back to dispatch on join
+def schedule_predispatch(*args):
+    async def run():
+        try:
+            await predispatch_agent(*args)
+        except Exception as e:
+            logger.warning(f"Agent pre-dispatch failed, dispatching on join instead: {e}")
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
@@ -1,37 +1,147 @@
+from startup_profiler import profiler
 from dotenv import load_dotenv
 import os
+import sys
 import json
+import time
+import logging
 from livekit import agents, rtc
-from livekit.agents import AgentServer, AgentSession, room_io
+from livekit.agents import AgentServer, AgentSession, JobProcess, room_io
+# Plugins must register on the main thread at import time, so they stay top-level
 from livekit.plugins import noise_cancellation, silero, bey
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 import asyncio
-from agent_tools import AppointmentAssistant
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Local modules read their settings from the environment at import time
 load_dotenv()
 
-server = AgentServer()
+from prompts import GREETING
+from phrase_cache import PhraseCache
+from worker_load import WorkerLoadMonitor, LOAD_THRESHOLD
+from agent_dispatch import AGENT_NAME, parse_dispatch_metadata
+from observability.logging_setup import configure_logging, set_levels
 
+profiler.mark("imports")
 
-@server.rtc_session()
+# Named explicitly: run as a script, this module is __main__ (__mp_main__ in job processes)
+logger = logging.getLogger("agent_orchestrator")
+
+TTS_MODEL = "cartesia/sonic-3"
+TTS_VOICE = "9626c31c-bec5-4cca-baa8-f8ba9e84c8bc"
+
+# Seconds a shutting-down worker waits for in-flight calls before closing them
+DRAIN_TIMEOUT = int(os.getenv("AGENT_DRAIN_TIMEOUT", "120"))
+
+
+# Runs in each job process before it is given a call.
+# Agent tools (and with them db_client + SQLAlchemy) are imported here, off the worker's startup path.
+def prewarm(proc: JobProcess):
+    import agent_tools  # noqa: F401
+
+    # Job processes forward their records to the worker through LiveKit's log queue; only levels are set here
+    set_levels()
+    proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["phrase_cache"] = PhraseCache()
+    profiler.mark("prewarm")
+
+
+server = AgentServer(setup_fnc=prewarm, load_threshold=LOAD_THRESHOLD, drain_timeout=DRAIN_TIMEOUT)
+
+# Reports CPU / active sessions as worker load and rejects calls when saturated
+load_monitor = WorkerLoadMonitor()
+load_monitor.attach(server)
+
+
+@server.on("worker_registered")
+def on_worker_registered(worker_id, server_info):
+    # LiveKit's CLI has installed its handlers by now -> move them behind the logging queue
+    configure_logging()
+    profiler.mark("ready")
+    profiler.report()
+
+
+# AGENT_NAME set -> explicit dispatch only (from the token or pre-dispatched by the API)
+@server.rtc_session(agent_name=AGENT_NAME, on_request=load_monitor.on_request)
 async def appointment_agent(ctx: agents.JobContext):
+    from agent_tools import AppointmentAssistant
+    from observability import tracing
+
+    # issued_at is set when the API issued the caller's token -> measures click-to-greeting
+    issued_at = parse_dispatch_metadata(ctx.job.metadata).get("issued_at")
+    if issued_at:
+        logger.info("Job started %.0f ms after token issue", (time.time() - issued_at) * 1000,
+                    extra={"room": ctx.room.name})
+
     # Create Beyond Presence avatar session
     avatar_id = os.getenv("BEYOND_PRESENCE_AVATAR_ID")
     avatar = bey.AvatarSession(
         avatar_id=avatar_id,
     )
-    
+
     # Create agent instance
-    agent = AppointmentAssistant()
-    
+    agent = AppointmentAssistant(
+        phrase_cache=ctx.proc.userdata["phrase_cache"], tts_voice=TTS_VOICE, tts_model=TTS_MODEL
+    )
+
+    # The call is one trace: turns, tools, db_client calls and SQL statements are spans below this one
+    # (set before the session starts, so its tasks inherit it)
+    call_span = tracing.start_span("agent.call", kind="server", activate=True)
+    call_span.set(**{"call.id": agent.call_id, "room": ctx.room.name})
+
     session = AgentSession(
         stt="deepgram/flux-general:en",
         llm="openai/gpt-4.1-mini",
-        tts="cartesia/sonic-3:9626c31c-bec5-4cca-baa8-f8ba9e84c8bc",
-        vad=silero.VAD.load(),
+        tts=f"{TTS_MODEL}:{TTS_VOICE}",
+        vad=ctx.proc.userdata["vad"],
         turn_detection=MultilingualModel(),
     )
-    
+
+    # Tear the call down as soon as it ends: save the summary, stop the agent session and
+    # delete the room, which disconnects the avatar and stops avatar and LiveKit minutes
+    call_ended = False
+    background_tasks = set()
+
+    async def hang_up(reason: str, save_summary: bool = True):
+        nonlocal call_ended
+        if call_ended:
+            return
+        call_ended = True
+        logger.info("Ending call (%s)", reason, extra={"call_id": agent.call_id})
+        if save_summary:
+            try:
+                await agent.end_conversation(None)
+            except Exception:
+                logger.exception("Error saving call summary", extra={"call_id": agent.call_id})
+        if agent.trace_recorder:
+            agent.trace_recorder.close()
+        call_span.set(end_reason=reason)
+        call_span.end()
+        await session.aclose()
+        await ctx.delete_room()
+        ctx.shutdown(reason=reason)
+
+    def schedule_hang_up(reason: str):
+        task = asyncio.create_task(hang_up(reason))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+    # Worker shutdown (after the drain deadline) -> still record the summary for an in-flight call
+    async def save_summary_on_shutdown(reason: str):
+        if not call_ended:
+            await agent.end_conversation(None)
+        if agent.trace_recorder:
+            agent.trace_recorder.close()
+        call_span.end()
+        await asyncio.to_thread(tracing.flush)
+
+    ctx.add_shutdown_callback(save_summary_on_shutdown)
+
+    # Caller left (tab closed, network drop) -> same teardown as a hang-up
+    @session.on("close")
+    def on_session_close(event):
+        schedule_hang_up("session closed")
+
     # Handle END_CALL data message from frontend
     @ctx.room.on("data_received")
     def on_data_received(data_packet, *args, **kwargs):
@@ -43,11 +153,12 @@ async def appointment_agent(ctx: agents.JobContext):
                 data = data_packet
             message = json.loads(data.decode('utf-8'))
             if message.get('type') == 'END_CALL':
-                print("END_CALL received, saving summary...")
-                # Trigger the end_conversation to save summary
-                asyncio.create_task(agent.end_conversation(None))
-        except Exception as e:
-            print(f"Error processing data message: {e}")
+                logger.info("END_CALL received, saving summary", extra={"call_id": agent.call_id})
+                # Save summary and release the session, avatar and room
+                schedule_hang_up("END_CALL")
+        except Exception:
+            # A bad message from the browser is not an agent error -> warning, with the traceback
+            logger.warning("Error processing data message", exc_info=True, extra={"call_id": agent.call_id})
 
     await session.start(
         room=ctx.room,
@@ -75,16 +186,19 @@ async def appointment_agent(ctx: agents.JobContext):
                 await asyncio.sleep(0.5)
                 return
             await asyncio.sleep(0.1)
-    
+
     try:
         await asyncio.wait_for(wait_for_participant(), timeout=30.0)
     except asyncio.TimeoutError:
-        print("No participant joined within 30 seconds")
+        logger.warning("No participant joined within 30 seconds", extra={"call_id": agent.call_id})
+        await hang_up("no participant", save_summary=False)
         return
 
-    await session.generate_reply(
-        instructions="Greet the patient warmly and ask for their phone number."
-    )
+    # Greeting is the same every call -> play cached audio instead of an LLM + TTS round-trip
+    await ctx.proc.userdata["phrase_cache"].say(session, GREETING, voice=TTS_VOICE, model=TTS_MODEL)
+    if issued_at:
+        logger.info("Greeting started %.0f ms after token issue", (time.time() - issued_at) * 1000,
+                    extra={"call_id": agent.call_id})
 
 
 if __name__ == "__main__":
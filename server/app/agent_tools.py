@@ -1,78 +1,249 @@
 import sys
 import os
+import json
 import time
+import uuid
+import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from livekit.agents import Agent, RunContext, function_tool
+from livekit.agents import Agent, RunContext, function_tool, llm, StopResponse, get_job_context
 from database.db_client import (
-    get_or_create_user, get_available_slots, book_appointment,
-    get_user_appointments, cancel_appointment, modify_appointment, save_call_summary, get_all_appointments
+    get_or_create_user, get_available_slots, get_slot_by_id, book_appointment, hold_slot, release_holds,
+    get_user_appointments, cancel_appointment, modify_appointment, save_call_summary, get_all_appointments,
+    session_scope, read_session_scope, claim_idempotency_key, stage_idempotent_response
 )
 from prompts import DOCTOR_APPOINTMENT_PROMPT
 from cost_tracker import CostTracker
+from call_trace import TraceRecorder, record_tool
+from intent_router import FAST_PATH_ENABLED, classify, spoken_slots
+from context_policy import ContextPolicy
+from observability.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+# Fixed fast-path replies -> spoken from the phrase cache
+INVALID_PHONE_REPLY = "Sorry, I didn't catch a 10-digit phone number. Could you say your phone number again?"
+IDENTIFIED_REPLY = "Thank you, I've found your record. Would you like to book, check, change or cancel an appointment?"
+BOOKED_REPLY = "You're all set, your appointment is booked. Is there anything else I can help you with?"
+BOOKING_FAILED_REPLY = "I'm sorry, that time was just taken. Would you like to hear the other open times?"
 
 
 class AppointmentAssistant(Agent):
-    def __init__(self) -> None:
+    def __init__(self, phrase_cache=None, tts_voice: str = None, tts_model: str = None,
+                 context_policy: ContextPolicy = None) -> None:
         super().__init__(instructions=DOCTOR_APPOINTMENT_PROMPT)
+        self.phrase_cache = phrase_cache
+        self.tts_voice = tts_voice
+        self.tts_model = tts_model
         self.current_phone = None
+        # Name on the caller's record (None for a new patient) and the slot held for them, for the
+        # "yes, confirm" fast path
+        self.patient_name = None
+        self.pending_booking = None
+        # Actions taken on the call, for the summary (unbounded; only the LLM context is trimmed)
         self.conversation_context = []
+        self.context_policy = context_policy or ContextPolicy()
         self.call_start_time = time.time()
         self.cost_tracker = CostTracker()
+        self.call_id = uuid.uuid4().hex
+        self.trace_recorder = TraceRecorder.from_env(self.call_id)
+        self.end_message = None
+
+    """
+    Runs before every LLM reply.
+    The chat history is bounded first (see context_policy.py), so long calls don't grow the prompt.
+    Then the intent fast path: simple turns (a bare phone number, "what slots are open", "yes, confirm"
+    to a booking just read back) run the matching tool directly and skip the LLM round-trip.
+    Everything else goes to the LLM as usual.
+    """
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage) -> None:
+        with start_span("agent.user_turn") as span:
+            handled = await self._prepare_turn(turn_ctx, new_message, span)
+        if handled:
+            raise StopResponse()
+
+    # -> True when the fast path already answered the turn
+    async def _prepare_turn(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage, span) -> bool:
+        # turn_ctx is this reply's prompt; update_chat_ctx keeps the stored history bounded too
+        if self.context_policy.apply(turn_ctx):
+            await self.update_chat_ctx(turn_ctx)
+
+        text = new_message.text_content or ""
+        intent = classify(text) if FAST_PATH_ENABLED else None
+        if intent is not None and intent.name == "confirm_booking":
+            intent.args = self._pending_booking_args(turn_ctx)
+            if intent.args is None:
+                intent = None
+        if self.trace_recorder:
+            self.trace_recorder.record_transcript(text, intent.name if intent else None)
+        if span.recording:
+            span.set(intent=intent.name if intent else "llm", prompt_tokens=self.context_policy.prompt_tokens(turn_ctx))
+        if intent is None:
+            return False
+
+        if intent.name == "invalid_phone":
+            await self._fast_reply(new_message, None, INVALID_PHONE_REPLY, cacheable=True)
+        elif intent.name == "identify_user":
+            output = await self.identify_user(None, **intent.args)
+            if output.startswith("Invalid"):
+                await self._fast_reply(new_message, (intent, output), INVALID_PHONE_REPLY, cacheable=True)
+            else:
+                await self._fast_reply(new_message, (intent, output), IDENTIFIED_REPLY, cacheable=True)
+        elif intent.name == "fetch_slots":
+            output = await self.fetch_slots(None)
+            await self._fast_reply(new_message, (intent, output), spoken_slots(output), cacheable=False)
+        elif intent.name == "confirm_booking":
+            output = await self.book_appointment_tool(None, **intent.args)
+            booked = output.startswith("Appointment booked")
+            await self._fast_reply(new_message, (intent, output), BOOKED_REPLY if booked else BOOKING_FAILED_REPLY,
+                                   cacheable=True)
+        else:
+            return False
+        return True
+
+    # A "yes" books without the LLM only if the agent's last message was a question naming the held
+    # slot's day and the name on the caller's record; anything less certain goes to the LLM
+    def _pending_booking_args(self, turn_ctx: llm.ChatContext):
+        if not self.pending_booking or not self.patient_name:
+            return None
+        last = next((item for item in reversed(turn_ctx.items)
+                     if item.type == "message" and item.role == "assistant"), None)
+        question = (last.text_content or "").strip().lower() if last else ""
+        if not question.endswith("?"):
+            return None
+        if self.pending_booking["day"].lower() not in question or self.patient_name.lower() not in question:
+            return None
+        return {"slot_id": self.pending_booking["slot_id"], "patient_name": self.patient_name}
+
+    # Record the turn (and the tool call, if any) in the chat history as if the LLM had made it, then speak
+    async def _fast_reply(self, new_message: llm.ChatMessage, tool_call, reply: str, cacheable: bool):
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.items.append(new_message)
+        if tool_call:
+            intent, output = tool_call
+            call_id = f"fast_{uuid.uuid4().hex[:12]}"
+            chat_ctx.items.append(llm.FunctionCall(call_id=call_id, name=intent.name, arguments=json.dumps(intent.args)))
+            chat_ctx.items.append(llm.FunctionCallOutput(call_id=call_id, name=intent.name, output=output, is_error=False))
+        await self.update_chat_ctx(chat_ctx)
+
+        if cacheable and self.phrase_cache:
+            await self.phrase_cache.say(self.session, reply, voice=self.tts_voice, model=self.tts_model)
+        else:
+            self.session.say(reply)
+
+    # Tell the browser who the caller is -> it loads their overview (/v1/patients/{phone}/overview) after the call
+    async def _announce_patient(self, phone: str):
+        try:
+            room = get_job_context().room
+        except RuntimeError:
+            return  # not running inside a job (trace replay, benchmarks)
+        try:
+            payload = json.dumps({"type": "PATIENT_IDENTIFIED", "phone": phone, "message": "Patient identified"})
+            await room.local_participant.publish_data(payload, reliable=True)
+        except Exception as e:
+            logger.warning("Error announcing patient: %s", e)
 
     """
     Identify user by their phone number.
     If new user, creates entry in db. If existing, retrieves from db.
     """
     @function_tool()
+    @record_tool
     async def identify_user(self, context: RunContext, phone_number: str) -> str:
         # Validate phone number format (exactly 10 digits)
         phone_clean = phone_number.replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
         if not phone_clean.isdigit() or len(phone_clean) != 10:
             return "Invalid phone number. Please provide a 10-digit phone number."
         
-        user = get_or_create_user(phone_clean)
+        with session_scope() as db:
+            user = get_or_create_user(phone_clean, db=db)
+            user_name = user.name
         self.current_phone = phone_clean
+        self.patient_name = user_name if user_name and user_name != "Unknown" else None
+        self.pending_booking = None
         self.conversation_context.append(f"User identified: {phone_clean}")
-        return f"User identified: {user.name or 'New patient'} with phone {phone_clean}"
+        await self._announce_patient(phone_clean)
+        return f"User identified: {user_name or 'New patient'} with phone {phone_clean}"
 
     """
     Get all available appointment slots from the database.
     Returns only slots where is_available = True.
     """
     @function_tool()
+    @record_tool
     async def fetch_slots(self, context: RunContext) -> str:
-        slots = get_available_slots()
-        if not slots:
-            return "No slots are currently available."
-        
-        slot_list = []
-        for s in slots:
-            slot_info = f"{s.day_of_week} {s.start_time.strftime('%I:%M %p')} to {s.end_time.strftime('%I:%M %p')} (ID: {s.id})"
-            slot_list.append(slot_info)
+        # Read-only -> replica when configured (primary right after this caller's own booking)
+        with read_session_scope(self.current_phone) as db:
+            slots = get_available_slots(self.current_phone, db=db)
+            if not slots:
+                return "No slots are currently available."
+            
+            slot_list = []
+            for s in slots:
+                slot_info = f"{s.day_of_week} {s.start_time.strftime('%I:%M %p')} to {s.end_time.strftime('%I:%M %p')} (ID: {s.id})"
+                slot_list.append(slot_info)
         
         return f"Available slots:\n" + "\n".join(slot_list)
 
+    """
+    Hold a slot for the identified user while their details are confirmed.
+    Other callers are not offered the slot until the hold expires or it is booked.
+    """
+    @function_tool()
+    @record_tool
+    async def hold_slot_tool(self, context: RunContext, slot_id: str) -> str:
+        if not self.current_phone:
+            return "Please identify the user first with their phone number."
+        
+        with session_scope() as db:
+            if hold_slot(slot_id, self.current_phone, db=db):
+                slot = get_slot_by_id(slot_id, db=db)
+                self.pending_booking = {"slot_id": slot_id, "day": slot.day_of_week}
+                return "Slot held for the caller. Confirm their name, then book it."
+        return "That slot is no longer available. Please offer another."
+
     """
     Book an appointment for the identified user.
     User must be identified first.
     Books slot and marks it unavailable.
     """
     @function_tool()
+    @record_tool
     async def book_appointment_tool(self, context: RunContext, slot_id: str, patient_name: str) -> str:
         if not self.current_phone:
             return "Please identify the user first with their phone number."
         
-        # Check for duplicate booking
-        existing_appointments = get_user_appointments(self.current_phone)
-        for appt in existing_appointments:
-            if str(appt.slot_id) == slot_id and appt.status != 'cancelled':
-                return "You already have an appointment for this time slot. Please choose a different slot or cancel your existing appointment first."
+        # A repeated booking of the same slot in this call gets the original answer
+        idempotency_key = f"agent:{self.call_id}:book:{self.current_phone}:{slot_id}"
+        request_hash = f"{slot_id}:{patient_name}"
         
-        appointment = book_appointment(slot_id, self.current_phone, patient_name)
-        if appointment:
-            self.conversation_context.append(f"Booked appointment: slot {slot_id} for {patient_name}")
-            return f"Appointment booked successfully for {patient_name}."
+        with session_scope() as db:
+            existing_appointments = get_user_appointments(self.current_phone, db=db)
+            
+            # Claim the key; a retry of a booking that is still in place replays without touching the slot
+            stored = claim_idempotency_key(idempotency_key, "agent_book", request_hash, db)
+            if stored and stored["request_hash"] == request_hash:
+                if any(str(appt.id) == stored["response"]["appointment_id"] for appt in existing_appointments):
+                    return stored["response"]["message"]
+            
+            # Check for duplicate booking
+            for appt in existing_appointments:
+                if str(appt.slot_id) == slot_id and appt.status != 'cancelled':
+                    return "You already have an appointment for this time slot. Please choose a different slot or cancel your existing appointment first."
+            
+            # The response is stored in the booking's own transaction
+            response = f"Appointment booked successfully for {patient_name}."
+            appointment = book_appointment(
+                slot_id, self.current_phone, patient_name, db=db,
+                before_commit=lambda appt: stage_idempotent_response(
+                    idempotency_key, {"message": response, "appointment_id": str(appt.id)},
+                    db=db, request_hash=request_hash
+                )
+            )
+            if appointment:
+                self.pending_booking = None
+                self.conversation_context.append(f"Booked appointment: slot {slot_id} for {patient_name}")
+                return response
         return "That slot is no longer available. Please try another."
 
     """
@@ -81,21 +252,23 @@ class AppointmentAssistant(Agent):
     For admin: returns all appointments in the system.
     """
     @function_tool()
+    @record_tool
     async def retrieve_appointments_tool(self, context: RunContext, is_admin: bool = False) -> str:
         if not is_admin and not self.current_phone:
             return "Please identify the user first."
         
-        if is_admin:
-            appointments = get_all_appointments()
-        else:
-            appointments = get_user_appointments(self.current_phone)
-        
-        if not appointments:
-            return "No appointments booked yet."
-        
-        appt_list = []
-        for appt in appointments:
-            appt_list.append(f"Appointment ID {appt.id}: {appt.patient_name} - Status: {appt.status}")
+        with read_session_scope(self.current_phone) as db:
+            if is_admin:
+                appointments = get_all_appointments(db=db)
+            else:
+                appointments = get_user_appointments(self.current_phone, db=db)
+            
+            if not appointments:
+                return "No appointments booked yet."
+            
+            appt_list = []
+            for appt in appointments:
+                appt_list.append(f"Appointment ID {appt.id}: {appt.patient_name} - Status: {appt.status}")
         
         return f"You have {len(appointments)} appointment(s):\n" + "\n".join(appt_list)
 
@@ -105,22 +278,24 @@ class AppointmentAssistant(Agent):
     Frees up the slot.
     """
     @function_tool()
+    @record_tool
     async def cancel_appointment_tool(self, context: RunContext, appointment_id: str) -> str:
         if not self.current_phone:
             return "Please identify the user first."
         
-        # Verify ownership
-        user_appointments = get_user_appointments(self.current_phone)
-        appointment_found = False
-        for appt in user_appointments:
-            if str(appt.id) == appointment_id:
-                appointment_found = True
-                break
-        
-        if not appointment_found:
-            return "Could not find that appointment in your records. Please check the appointment ID."
-        
-        success = cancel_appointment(appointment_id)
+        with session_scope() as db:
+            # Verify ownership
+            user_appointments = get_user_appointments(self.current_phone, db=db)
+            appointment_found = False
+            for appt in user_appointments:
+                if str(appt.id) == appointment_id:
+                    appointment_found = True
+                    break
+            
+            if not appointment_found:
+                return "Could not find that appointment in your records. Please check the appointment ID."
+            
+            success = cancel_appointment(appointment_id, db=db)
         if success:
             self.conversation_context.append(f"Cancelled appointment: {appointment_id}")
             return "Appointment cancelled successfully."
@@ -132,19 +307,35 @@ class AppointmentAssistant(Agent):
     Frees old slot, books new slot.
     """
     @function_tool()
+    @record_tool
     async def modify_appointment_tool(self, context: RunContext, appointment_id: str, new_slot_id: str) -> str:
         if not self.current_phone:
             return "Please identify the user first."
         
-        # Check if user has appointments
-        appointments = get_user_appointments(self.current_phone)
-        if not appointments:
-            return "No appointments booked."
+        idempotency_key = f"agent:{self.call_id}:modify:{appointment_id}:{new_slot_id}"
         
-        appointment = modify_appointment(appointment_id, new_slot_id)
-        if appointment:
-            self.conversation_context.append(f"Modified appointment {appointment_id} to slot {new_slot_id}")
-            return "Appointment modified successfully."
+        with session_scope() as db:
+            # Check if user has appointments
+            appointments = get_user_appointments(self.current_phone, db=db)
+            if not appointments:
+                return "No appointments booked."
+            
+            # Claim the key; a retry of a modification that is still in place replays without touching the slots
+            stored = claim_idempotency_key(idempotency_key, "agent_modify", new_slot_id, db)
+            if stored and any(
+                str(appt.id) == appointment_id and str(appt.slot_id) == new_slot_id for appt in appointments
+            ):
+                return stored["response"]
+            
+            # The response is stored in the modification's own transaction
+            response = "Appointment modified successfully."
+            appointment = modify_appointment(
+                appointment_id, new_slot_id, db=db,
+                before_commit=lambda appt: stage_idempotent_response(idempotency_key, response, db=db)
+            )
+            if appointment:
+                self.conversation_context.append(f"Modified appointment {appointment_id} to slot {new_slot_id}")
+                return response
         return "Could not modify. The new slot may be unavailable."
 
     """
@@ -152,7 +343,12 @@ class AppointmentAssistant(Agent):
     Determines summary case based on conversation context and saves to database.
     """
     @function_tool()
+    @record_tool
     async def end_conversation(self, context: RunContext) -> str:
+        # Summary is saved once per call (tool call, hang-up and job shutdown can all end it)
+        if self.end_message:
+            return self.end_message
+        
         # Calculate call duration
         call_end_time = time.time()
         duration_seconds = call_end_time - self.call_start_time
@@ -175,6 +371,10 @@ class AppointmentAssistant(Agent):
             summary_text += "Case: No action taken\n"
             summary_text += "No appointments booked, modified, or cancelled."
         
+        # A slot held but not booked is freed for other callers right away
+        if self.current_phone:
+            release_holds(self.current_phone)
+        
         # Save to database with cost breakdown
         save_call_summary({
             "patient_phone": self.current_phone,
@@ -184,4 +384,5 @@ class AppointmentAssistant(Agent):
             "total_cost": costs["total_cost"]
         })
         
-        return f"Conversation ended. Call lasted {costs['duration_minutes']} minutes. Total cost: ${costs['total_cost']}"
+        self.end_message = f"Conversation ended. Call lasted {costs['duration_minutes']} minutes. Total cost: ${costs['total_cost']}"
+        return self.end_message
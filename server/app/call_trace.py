@@ -0,0 +1,236 @@
+import sys
+import os
+import json
+import time
+import uuid
+import asyncio
+import inspect
+import argparse
+import functools
+import importlib
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from observability.tracing import start_span, hash_phone
+
+# Opt-in: set CALL_TRACE_DIR to write one NDJSON trace file per call
+TRACE_DIR_ENV = "CALL_TRACE_DIR"
+# Transcripts are what the caller said (names, dates of birth, ...) -> only recorded with CALL_TRACE_TRANSCRIPTS=1
+TRANSCRIPTS_ENV = "CALL_TRACE_TRANSCRIPTS"
+
+REDACTED = "[redacted]"
+
+# Tool arguments that are not part of the recorded workload
+SKIPPED_ARGS = ("self", "context")
+
+
+class TraceRecorder:
+    # Open a trace file for a single call
+    def __init__(self, path: str, call_id: str = None, transcripts: bool = False):
+        self.path = path
+        self.call_id = call_id or uuid.uuid4().hex
+        self.transcripts = transcripts
+        self.started_at = time.monotonic()
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+
+    # Create a recorder if tracing is enabled, otherwise return None
+    @classmethod
+    def from_env(cls, call_id: str = None):
+        trace_dir = os.getenv(TRACE_DIR_ENV)
+        if not trace_dir:
+            return None
+        os.makedirs(trace_dir, exist_ok=True)
+        call_id = call_id or uuid.uuid4().hex
+        return cls(os.path.join(trace_dir, f"{call_id}.ndjson"), call_id, os.getenv(TRANSCRIPTS_ENV) == "1")
+
+    def _write(self, event: dict):
+        # Tools can still run while the call is torn down, after close()
+        if not self._file.closed:
+            self._file.write(json.dumps(event, separators=(",", ":"), default=str) + "\n")
+
+    # Append one tool invocation as a compact NDJSON line; phone numbers are stored as hash_phone()
+    # and names are redacted
+    def record(self, tool: str, args: dict, phone: str, duration_ms: float, result: str, error: bool = False):
+        event = {
+            "call": self.call_id,
+            "t": round(time.monotonic() - self.started_at, 3),
+            "tool": tool,
+            "args": redact_args(args),
+            "phone_hash": hash_phone(phone) if phone else None,
+            "ms": round(duration_ms, 2),
+            "bytes": len(result.encode("utf-8")) if result else 0,
+        }
+        if error:
+            event["error"] = True
+        self._write(event)
+
+    # Append a final user transcript (used to benchmark the intent fast path), only when opted in
+    def record_transcript(self, text: str, fast_path: str = None):
+        if not self.transcripts:
+            return
+        event = {"call": self.call_id, "t": round(time.monotonic() - self.started_at, 3), "transcript": text}
+        if fast_path:
+            event["fast_path"] = fast_path
+        self._write(event)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+# Tool arguments as stored in a trace -> phone numbers hashed, names redacted, ids kept for replay
+def redact_args(args: dict) -> dict:
+    redacted = {}
+    for key, value in args.items():
+        if "phone" in key and value:
+            redacted[f"{key}_hash"] = hash_phone(value)
+        elif "name" in key and value:
+            redacted[key] = REDACTED
+        else:
+            redacted[key] = value
+    return redacted
+
+
+# Decorator for AppointmentAssistant tools -> a tracing span per call, and a trace record when
+# the agent has a recorder
+def record_tool(func):
+    signature = inspect.signature(func)
+    span_name = f"tool.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        with start_span(span_name) as span:
+            if span.recording and self.current_phone:
+                span.set(**{"phone.hash": hash_phone(self.current_phone)})
+            return await recorded(self, *args, **kwargs)
+
+    async def recorded(self, *args, **kwargs):
+        recorder = getattr(self, "trace_recorder", None)
+        if recorder is None:
+            return await func(self, *args, **kwargs)
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        tool_args = {k: v for k, v in bound.arguments.items() if k not in SKIPPED_ARGS}
+        phone = self.current_phone
+
+        start = time.perf_counter()
+        try:
+            result = await func(self, *args, **kwargs)
+        except Exception:
+            recorder.record(func.__name__, tool_args, phone, (time.perf_counter() - start) * 1000, None, error=True)
+            raise
+        recorder.record(func.__name__, tool_args, phone, (time.perf_counter() - start) * 1000, result)
+        return result
+
+    return wrapper
+
+
+# Load all events from a trace file, ordered by their offset in the call
+def load_trace(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    return sorted(events, key=lambda e: e["t"])
+
+
+# Stand-in caller for a recorded phone hash -> a stable scratch number (000xxxxxxx) per caller
+def replay_phone(phone_hash: str) -> str:
+    return f"000{int(phone_hash[:12], 16) % 10 ** 7:07d}" if phone_hash else None
+
+
+"""
+Run the db_client work a recorded tool invocation performed, as its stand-in caller.
+Without write=True only the reads run (identify_user looks the caller up instead of creating
+them); bookings, holds, cancellations and modifications are skipped.
+"""
+def replay_event(backend, event: dict, write: bool = False):
+    tool = event.get("tool")
+    args = event.get("args", {})
+    phone = replay_phone(event.get("phone_hash"))
+
+    if tool == "identify_user" and args.get("phone_number_hash"):
+        caller = replay_phone(args["phone_number_hash"])
+        if write:
+            backend.get_or_create_user(caller)
+        else:
+            backend.get_user_by_phone(caller)
+    elif tool == "fetch_slots":
+        backend.get_available_slots(phone)
+    elif tool == "hold_slot_tool" and phone and write:
+        backend.hold_slot(args["slot_id"], phone)
+    elif tool == "book_appointment_tool" and phone:
+        backend.get_user_appointments(phone)
+        if write:
+            backend.book_appointment(args["slot_id"], phone, args["patient_name"])
+    elif tool == "retrieve_appointments_tool":
+        if args.get("is_admin"):
+            backend.get_all_appointments()
+        elif phone:
+            backend.get_user_appointments(phone)
+    elif tool == "cancel_appointment_tool" and phone:
+        backend.get_user_appointments(phone)
+        if write:
+            backend.cancel_appointment(args["appointment_id"])
+    elif tool == "modify_appointment_tool" and phone:
+        backend.get_user_appointments(phone)
+        if write:
+            backend.modify_appointment(args["appointment_id"], args["new_slot_id"])
+    else:
+        # transcripts, end_conversation and calls made before identification do no comparable db work
+        return False
+    return True
+
+
+# Replay one trace, keeping the original gaps between tool calls divided by speed
+async def replay_trace(events: list, backend, speed: float = 1.0, write: bool = False) -> list:
+    timings = []
+    previous_t = 0.0
+    for event in events:
+        if speed > 0:
+            await asyncio.sleep(max(event["t"] - previous_t, 0) / speed)
+        previous_t = event["t"]
+
+        start = time.perf_counter()
+        replayed = await asyncio.to_thread(replay_event, backend, event, write)
+        if replayed:
+            timings.append((event["tool"], (time.perf_counter() - start) * 1000, event["ms"]))
+    return timings
+
+
+# Replay several traces concurrently and summarize latency per tool
+async def replay_traces(paths: list, backend, speed: float = 1.0, write: bool = False) -> dict:
+    results = await asyncio.gather(*(replay_trace(load_trace(p), backend, speed, write) for p in paths))
+
+    by_tool = {}
+    for timings in results:
+        for tool, replay_ms, recorded_ms in timings:
+            by_tool.setdefault(tool, {"replay": [], "recorded": []})
+            by_tool[tool]["replay"].append(replay_ms)
+            by_tool[tool]["recorded"].append(recorded_ms)
+
+    report = {}
+    for tool, samples in by_tool.items():
+        replay = sorted(samples["replay"])
+        report[tool] = {
+            "calls": len(replay),
+            "p50_ms": round(statistics.median(replay), 2),
+            "p95_ms": round(replay[int(0.95 * (len(replay) - 1))], 2),
+            "recorded_p50_ms": round(statistics.median(samples["recorded"]), 2),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded call traces against a db_client backend")
+    parser.add_argument("traces", nargs="+", help="NDJSON trace files")
+    parser.add_argument("--backend", default="database.db_client", help="module exposing the db_client functions")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = original pacing, 10 = 10x faster, 0 = no delays")
+    parser.add_argument("--write", action="store_true",
+                        help="also replay bookings, holds, cancellations and modifications (scratch databases only)")
+    options = parser.parse_args()
+
+    backend = importlib.import_module(options.backend)
+    if options.write and hasattr(backend, "DAILY_STATS_ENABLED"):
+        backend.DAILY_STATS_ENABLED = False  # replayed bookings are synthetic, keep them out of daily_stats
+    report = asyncio.run(replay_traces(options.traces, backend, options.speed, options.write))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,95 @@
+import os
+from livekit.agents import llm
+
+# How much of the call history is sent to the LLM each turn
+KEEP_TURNS = int(os.getenv("CONTEXT_KEEP_TURNS", "6"))              # last N user turns kept verbatim
+MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "6000"))           # 0 = no cap
+TOOL_OUTPUT_CHARS = int(os.getenv("CONTEXT_TOOL_OUTPUT_CHARS", "240"))
+
+CHARS_PER_TOKEN = 4
+
+
+# Rough token count, good enough for budgeting (no tokenizer on the hot path)
+def estimate_tokens(item) -> int:
+    if item.type == "message":
+        chars = len(item.text_content or "")
+    elif item.type == "function_call":
+        chars = len(item.name) + len(item.arguments or "")
+    elif item.type == "function_call_output":
+        chars = len(item.output or "")
+    else:
+        chars = 0
+    return chars // CHARS_PER_TOKEN + 4
+
+
+# "Available slots: ... 40 lines ..." -> first line plus a note that the list is stale
+def compact_output(output: llm.FunctionCallOutput, max_chars: int) -> llm.FunctionCallOutput:
+    text = output.output or ""
+    if len(text) <= max_chars:
+        return output
+    lines = text.splitlines()
+    summary = lines[0][:max_chars].rstrip()
+    note = f"[earlier result, {len(lines)} lines omitted; call {output.name or 'the tool'} again for current data]"
+    return output.model_copy(update={"output": f"{summary} {note}"})
+
+
+class ContextPolicy:
+    def __init__(self, keep_turns: int = KEEP_TURNS, max_tokens: int = MAX_TOKENS,
+                 tool_output_chars: int = TOOL_OUTPUT_CHARS):
+        self.keep_turns = keep_turns
+        self.max_tokens = max_tokens
+        self.tool_output_chars = tool_output_chars
+
+    # Index of the first item of the last keep_turns user turns
+    def _recent_start(self, items: list) -> int:
+        user_turns = [i for i, item in enumerate(items) if item.type == "message" and item.role == "user"]
+        if len(user_turns) <= self.keep_turns:
+            return user_turns[0] if user_turns else len(items)
+        return user_turns[-self.keep_turns] if self.keep_turns else len(items)
+
+    @staticmethod
+    def _is_instructions(item) -> bool:
+        return item.type == "message" and item.role in ("system", "developer")
+
+    """
+    Bound the chat context in place.
+    Instructions and the last keep_turns turns are kept verbatim, older tool outputs are
+    compacted, and the oldest turns are dropped while the estimate is over max_tokens.
+    Returns True if anything changed.
+    """
+    def apply(self, chat_ctx: llm.ChatContext) -> bool:
+        items = chat_ctx.items
+        recent_start = self._recent_start(items)
+        changed = False
+
+        for i in range(recent_start):
+            item = items[i]
+            if item.type == "function_call_output":
+                compacted = compact_output(item, self.tool_output_chars)
+                if compacted is not item:
+                    items[i] = compacted
+                    changed = True
+
+        if self.max_tokens <= 0:
+            return changed
+
+        total = sum(estimate_tokens(item) for item in items)
+        # Drop the oldest non-instruction items, but never the turn being answered
+        last_user = max((i for i, item in enumerate(items) if item.type == "message" and item.role == "user"),
+                        default=len(items))
+        i = 0
+        while total > self.max_tokens and i < last_user:
+            if self._is_instructions(items[i]):
+                i += 1
+                continue
+            total -= estimate_tokens(items.pop(i))
+            last_user -= 1
+            changed = True
+            # Don't leave a tool output without its call (or a call without its output)
+            while i < last_user and items[i].type in ("function_call", "function_call_output"):
+                total -= estimate_tokens(items.pop(i))
+                last_user -= 1
+        return changed
+
+    def prompt_tokens(self, chat_ctx: llm.ChatContext) -> int:
+        return sum(estimate_tokens(item) for item in chat_ctx.items)
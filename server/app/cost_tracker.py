@@ -1,34 +1,93 @@
-class CostTracker:
-    PRICING = {
+from datetime import datetime, date
+from decimal import Decimal
+
+# Vendor rates per minute, versioned by the date they take effect (oldest first).
+# Add a new entry when a rate changes, then run app/repricing.py to update stored summaries.
+PRICING_VERSIONS = [
+    (date(2025, 1, 1), {
         "deepgram_flux": 0.0077,
         "livekit_cloud": 0.0425,
         "beyond_presence": 0.35,
-    }
-    
-    # Initialize cost tracker
-    def __init__(self):
+    }),
+]
+
+# Rate name -> cost field in the breakdown, in the order they are summed
+COST_FIELDS = {
+    "deepgram_flux": "deepgram_cost",
+    "livekit_cloud": "livekit_cost",
+    "beyond_presence": "beyond_presence_cost",
+}
+
+
+# Costs are stored with 4 decimals -> exact prices are counted in units of 0.0001
+COST_UNITS = 10 ** 4
+
+
+# Decimal places needed to write every rate of these versions as an integer
+def rate_places(versions: list = None) -> int:
+    versions = versions or PRICING_VERSIONS
+    return max(0, *(-Decimal(str(rate)).as_tuple().exponent for _, rates in versions for rate in rates.values()))
+
+
+# Rate as an integer count of 10**-places
+def scaled_rate(rate: float, places: int) -> int:
+    return int(Decimal(str(rate)).scaleb(places))
+
+
+# numerator / denominator rounded half up, on non-negative integers or NumPy integer arrays
+# (same as Postgres round() on numeric)
+def round_half_up(numerator, denominator: int):
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+"""
+Exact costs of a call of whole seconds -> ({cost field: cost}, total).
+seconds * rate / 60 is computed on integers and rounded half up to 4 decimals; app/repricing.py
+prices stored calls the same way, so re-pricing at an unchanged version changes nothing.
+"""
+def price_seconds(seconds: int, rates: dict) -> tuple:
+    places = rate_places([(None, rates)])
+    per_minute = 60 * 10 ** places
+    scaled = {field: seconds * scaled_rate(rates[name], places) * COST_UNITS for name, field in COST_FIELDS.items()}
+    costs = {field: round_half_up(value, per_minute) / COST_UNITS for field, value in scaled.items()}
+    return costs, round_half_up(sum(scaled.values()), per_minute) / COST_UNITS
+
+
+# Pricing in effect on a given day -> (version, rates); days before the first version use the first
+def pricing_for(day: date = None, versions: list = None):
+    versions = versions or PRICING_VERSIONS
+    day = day or date.today()
+    if isinstance(day, datetime):
+        day = day.date()
+    effective, rates = versions[0]
+    for version_date, version_rates in versions:
+        if version_date <= day:
+            effective, rates = version_date, version_rates
+    return effective.isoformat(), rates
+
+
+class CostTracker:
+    PRICING = PRICING_VERSIONS[-1][1]
+
+    # Initialize cost tracker (call_date selects the pricing version, default today)
+    def __init__(self, call_date: date = None):
         self.call_duration_seconds = 0
+        self.pricing_version, self.pricing = pricing_for(call_date)
 
-    # Track total call duration in seconds
+    # Track total call duration in whole seconds (as stored in call_summaries)
     def track_call_duration(self, duration_seconds: float):
-        self.call_duration_seconds = duration_seconds
+        self.call_duration_seconds = int(duration_seconds)
     
     # Calculate costs based on call duration
     def calculate_costs(self) -> dict:
-        duration_minutes = self.call_duration_seconds / 60.0
-        
-        deepgram_cost = duration_minutes * self.PRICING["deepgram_flux"]
-        livekit_cost = duration_minutes * self.PRICING["livekit_cloud"]
-        beyond_presence_cost = duration_minutes * self.PRICING["beyond_presence"]
-        total_cost = deepgram_cost + livekit_cost + beyond_presence_cost
+        costs, total_cost = price_seconds(self.call_duration_seconds, self.pricing)
         
         return {
             "duration_seconds": self.call_duration_seconds,
-            "duration_minutes": round(duration_minutes, 2),
-            "deepgram_cost": round(deepgram_cost, 4),
-            "livekit_cost": round(livekit_cost, 4),
-            "beyond_presence_cost": round(beyond_presence_cost, 4),
-            "total_cost": round(total_cost, 4)
+            "duration_minutes": round_half_up(self.call_duration_seconds * 100, 60) / 100,
+            **costs,
+            "total_cost": total_cost,
+            "pricing_version": self.pricing_version
         }
     
     # Get formatted cost summary
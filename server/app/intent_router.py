@@ -0,0 +1,77 @@
+import os
+import re
+from typing import Optional
+
+# Set INTENT_FAST_PATH=0 to send every turn to the LLM
+FAST_PATH_ENABLED = os.getenv("INTENT_FAST_PATH", "1").lower() not in ("0", "false", "no")
+
+# Words allowed around a bare phone number ("my number is 555 123 4567")
+PHONE_FILLER = {
+    "my", "number", "phone", "is", "it", "it's", "its", "the", "uh", "um", "sure", "yes", "yeah",
+    "ok", "okay", "so", "and", "that's", "thats", "here", "you", "go", "mobile", "cell",
+}
+
+# A bare "yes" to the booking the agent just read back ("yes, confirm", "yeah go ahead and book it").
+# Only used while a booking is pending (see AppointmentAssistant._pending_booking_args)
+AFFIRMATIVE = {"yes", "yeah", "yep", "yup", "sure", "confirm", "confirmed", "correct", "ok", "okay", "absolutely"}
+CONFIRM_FILLER = AFFIRMATIVE | {
+    "please", "go", "ahead", "and", "book", "it", "that", "that's", "thats", "is", "right", "sounds", "good",
+    "great", "perfect", "fine", "works", "do", "for", "me", "thanks", "thank", "you",
+}
+
+SLOTS_QUESTION = re.compile(
+    r"\b(what|which|any|show|list|tell|check|see|are there|do you have|available|open|free)\b.*"
+    r"\b(slots?|times|openings?|availability|available)\b"
+)
+# Anything that needs the LLM's judgement -> no fast path
+SLOTS_EXCLUDE = re.compile(
+    r"\b(book|cancel|change|modify|move|reschedule|my appointments?|monday|tuesday|\d{1,2}(:\d{2})?\s*(am|pm)?)\b"
+)
+
+
+class Intent:
+    def __init__(self, name: str, args: dict = None):
+        self.name = name
+        self.args = args or {}
+
+    def __repr__(self):
+        return f"Intent({self.name}, {self.args})"
+
+
+def _words(text: str) -> list:
+    return re.findall(r"[a-z']+", text.lower())
+
+
+# Deterministic pre-classifier over the STT transcript; None means "let the LLM handle it"
+def classify(text: str) -> Optional[Intent]:
+    text = (text or "").strip()
+    if not text:
+        return None
+
+    digits = re.sub(r"\D", "", text)
+    if digits and all(word in PHONE_FILLER for word in _words(text)):
+        if len(digits) == 10:
+            return Intent("identify_user", {"phone_number": digits})
+        if len(digits) >= 7:
+            return Intent("invalid_phone")
+
+    words = _words(text)
+    if not digits and words and all(word in CONFIRM_FILLER for word in words) and AFFIRMATIVE.intersection(words):
+        return Intent("confirm_booking")
+
+    lowered = text.lower()
+    if SLOTS_QUESTION.search(lowered) and not SLOTS_EXCLUDE.search(lowered):
+        return Intent("fetch_slots")
+
+    return None
+
+
+# "Monday 05:00 PM to 05:30 PM (ID: ...)" lines from fetch_slots -> "Monday at 5:00 PM, ..."
+def spoken_slots(fetch_slots_output: str) -> str:
+    times = {}
+    for day, start in re.findall(r"^(\w+) (\d{2}:\d{2} [AP]M) to", fetch_slots_output, re.M):
+        times.setdefault(day, []).append(start.lstrip("0"))
+    if not times:
+        return "I'm sorry, there are no open slots right now."
+    parts = [f"{day} at {', '.join(starts)}" for day, starts in times.items()]
+    return f"We have openings on {' and on '.join(parts)}. Which time works best for you?"
@@ -1,12 +1,20 @@
 import sys
 import os
+import json
+import time
+import csv
+import io
+import hashlib
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Header, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Callable
+from sqlalchemy.orm import Session
+from datetime import date, datetime
 from livekit import api
 from dotenv import load_dotenv
 
@@ -14,12 +22,20 @@ from database.db_client import (
     get_all_appointments, get_user_appointments, book_appointment,
     cancel_appointment, modify_appointment, get_available_slots,
     get_user_by_phone, get_or_create_user, get_call_summaries_by_phone,
-    get_all_summaries, get_db
+    get_all_summaries, get_session, get_read_session, get_caller_read_session, get_pool_stats,
+    claim_idempotency_key, stage_idempotent_response, hold_slot, search_patients, get_patient_overview,
+    stream_call_summaries, stream_appointments, get_daily_stats
 )
 from database.models import Appointment, Slot, User, CallSummary
+from app.agent_dispatch import AGENT_NAME, PREDISPATCH_ENABLED, room_config, schedule_predispatch
+from observability.tracing import TracingMiddleware
+from observability.logging_setup import configure_logging
 
 load_dotenv()
 
+# Log records are written by a listener thread, never on the request path
+configure_logging()
+
 app = FastAPI(title="SuperByrn Voice AI Agent API", version="1.0.0")
 
 # CORS middleware
@@ -31,6 +47,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# One span per request (route template, status), parent of the db_client and SQL spans it runs
+app.add_middleware(TracingMiddleware)
+
 # Pydantic Models
 class BookAppointmentRequest(BaseModel):
     slot_id: str
@@ -48,6 +67,9 @@ class CreateUserRequest(BaseModel):
 class LiveKitTokenRequest(BaseModel):
     phone: str
 
+class HoldSlotRequest(BaseModel):
+    phone: str
+
 class SlotResponse(BaseModel):
     id: str
     day_of_week: str
@@ -93,52 +115,172 @@ class CallSummaryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PatientMatch(BaseModel):
+    phone: str
+    name: Optional[str]
+    score: float
+    appointments: int
+    last_booked_at: Optional[datetime] = None
+
+class PatientSearchResponse(BaseModel):
+    query: str
+    mode: Optional[str]
+    total: int
+    limit: int
+    offset: int
+    results: List[PatientMatch]
+
+class PatientBilling(BaseModel):
+    total_calls: int
+    total_cost: float
+    total_duration_seconds: int
+
+class PatientOverviewResponse(BaseModel):
+    phone: str
+    user: Optional[UserResponse]
+    appointments: List[AppointmentResponse]
+    recent_summaries: List[CallSummaryResponse]
+    billing: PatientBilling
+
+class DailyStatResponse(BaseModel):
+    day: date
+    calls: int
+    call_seconds: int
+    total_cost: float
+    booked: int
+    cancelled: int
+    modified: int
+
+class DailyStatsTotals(BaseModel):
+    calls: int
+    call_seconds: int
+    total_cost: float
+    booked: int
+    cancelled: int
+    modified: int
+    active_appointments: int
+
+class DailyStatsResponse(BaseModel):
+    phone: Optional[str]
+    since: Optional[date]
+    until: Optional[date]
+    days: List[DailyStatResponse]
+    totals: DailyStatsTotals
+
+# Idempotency-Key helpers -> a retried request gets the stored response instead of redoing the work
+def request_fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+"""
+Claim the key before the write: a retry or a concurrent duplicate waits for the first request's
+transaction, then gets its stored response; a key reused for a different request is a 422
+"""
+def claim_idempotent(key: Optional[str], scope: str, request_hash: str, db: Session) -> Optional[JSONResponse]:
+    if not key:
+        return None
+    stored = claim_idempotency_key(key, scope, request_hash, db)
+    if not stored:
+        return None
+    if stored["scope"] != scope or stored["request_hash"] != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    return JSONResponse(status_code=stored["status_code"], content=stored["response"])
+
+# before_commit hook for the write -> the response is stored in the write's own transaction
+def store_idempotent(key: Optional[str], build_response: Callable, db: Session) -> Callable:
+    def store(result):
+        if key:
+            stage_idempotent_response(key, jsonable_encoder(build_response(result)), db=db)
+    return store
+
+def appointment_response(appointment) -> AppointmentResponse:
+    return AppointmentResponse(
+        id=str(appointment.id),
+        user_phone=appointment.user_phone,
+        slot_id=str(appointment.slot_id),
+        patient_name=appointment.patient_name,
+        patient_phone=appointment.patient_phone,
+        status=appointment.status,
+        notes=appointment.notes,
+        booked_at=appointment.booked_at,
+        updated_at=appointment.updated_at
+    )
+
+# Export helpers -> encode row batches as they arrive from the cursor, one chunk of output per batch
+def export_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return jsonable_encoder(value)
+
+def export_chunks(batches, fmt: str):
+    header_written = False
+    for rows in batches:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not header_written:
+                writer.writerow(rows[0].keys())
+                header_written = True
+            writer.writerows([export_value(v) for v in row.values()] for row in rows)
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(jsonable_encoder(dict(row))) + "\n" for row in rows)
+
+def export_response(batches, fmt: str, name: str) -> StreamingResponse:
+    if fmt == "csv":
+        return StreamingResponse(export_chunks(batches, fmt), media_type="text/csv",
+                                 headers={"Content-Disposition": f'attachment; filename="{name}.csv"'})
+    return StreamingResponse(export_chunks(batches, fmt), media_type="application/x-ndjson")
+
 @app.get("/")
 async def root():
     return {"message": "SuperByrn Voice AI Agent API", "version": "1.0.0"}
 
+"""
+Get database connection pool statistics
+Returns checked out connections, overflow and checkout wait times
+"""
+@app.get("/v1/health/db")
+async def database_pool_stats():
+    return get_pool_stats()
+
 # 1. Appointment Endpoints
 """
 Get all appointments (admin)
 Returns list of all appointments in the system
 """
 @app.get("/v1/appointments")
-async def list_all_appointments():
-    appointments = get_all_appointments(include_cancelled=True)
+async def list_all_appointments(db: Session = Depends(get_read_session)):
+    appointments = get_all_appointments(include_cancelled=True, db=db)
     if not appointments:
         return []
     
-    db = get_db()
-    try:
-        result = []
-        for appt in appointments:
-            # Get slot info
-            slot = db.query(Slot).filter(Slot.id == appt.slot_id).first()
-            slot_data = None
-            if slot:
-                slot_data = {
-                    "id": str(slot.id),
-                    "day_of_week": slot.day_of_week,
-                    "start_time": slot.start_time.strftime("%I:%M %p") if slot.start_time else "",
-                    "end_time": slot.end_time.strftime("%I:%M %p") if slot.end_time else "",
-                    "is_available": slot.is_available
-                }
-            
-            result.append({
-                "id": str(appt.id),
-                "user_phone": appt.user_phone,
-                "slot_id": str(appt.slot_id),
-                "patient_name": appt.patient_name,
-                "patient_phone": appt.patient_phone,
-                "status": appt.status,
-                "notes": appt.notes,
-                "booked_at": appt.booked_at,
-                "updated_at": appt.updated_at,
-                "slot": slot_data
-            })
-        return result
-    finally:
-        db.close()
+    result = []
+    for appt in appointments:
+        # Get slot info
+        slot = db.get(Slot, appt.slot_id) if appt.slot_id else None
+        slot_data = None
+        if slot:
+            slot_data = {
+                "id": str(slot.id),
+                "day_of_week": slot.day_of_week,
+                "start_time": slot.start_time.strftime("%I:%M %p") if slot.start_time else "",
+                "end_time": slot.end_time.strftime("%I:%M %p") if slot.end_time else "",
+                "is_available": slot.is_available
+            }
+        
+        result.append({
+            "id": str(appt.id),
+            "user_phone": appt.user_phone,
+            "slot_id": str(appt.slot_id),
+            "patient_name": appt.patient_name,
+            "patient_phone": appt.patient_phone,
+            "status": appt.status,
+            "notes": appt.notes,
+            "booked_at": appt.booked_at,
+            "updated_at": appt.updated_at,
+            "slot": slot_data
+        })
+    return result
 
 
 """
@@ -146,8 +288,8 @@ Get appointments by phone number (user)
 Returns appointments for a specific user
 """
 @app.get("/v1/appointments/{phone}", response_model=List[AppointmentResponse])
-async def get_appointments_by_phone(phone: str):
-    appointments = get_user_appointments(phone, include_cancelled=True)
+async def get_appointments_by_phone(phone: str, db: Session = Depends(get_caller_read_session)):
+    appointments = get_user_appointments(phone, include_cancelled=True, db=db)
     if not appointments:
         raise HTTPException(status_code=404, detail="No appointments found for this user")
     
@@ -169,28 +311,30 @@ Book a new appointment
 Creates appointment and marks slot as unavailable
 """
 @app.post("/v1/appointments", response_model=AppointmentResponse)
-async def create_appointment(request: BookAppointmentRequest):
+async def create_appointment(
+    request: BookAppointmentRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_session)
+):
+    request_hash = request_fingerprint(request.model_dump())
+    replayed = claim_idempotent(idempotency_key, "book", request_hash, db)
+    if replayed:
+        return replayed
+
     appointment = book_appointment(
         slot_id=request.slot_id,
         user_phone=request.phone,
         patient_name=request.patient_name,
-        notes=request.notes
+        notes=request.notes,
+        db=db,
+        before_commit=store_idempotent(idempotency_key, appointment_response, db)
     )
 
     if not appointment:
+        db.rollback()  # release the claimed key
         raise HTTPException(status_code=400, detail="Slot not available")
     
-    return AppointmentResponse(
-        id=str(appointment.id),
-        user_phone=appointment.user_phone,
-        slot_id=str(appointment.slot_id),
-        patient_name=appointment.patient_name,
-        patient_phone=appointment.patient_phone,
-        status=appointment.status,
-        notes=appointment.notes,
-        booked_at=appointment.booked_at,
-        updated_at=appointment.updated_at
-    )
+    return appointment_response(appointment)
 
 
 """
@@ -198,13 +342,25 @@ Cancel an appointment
 Marks appointment as cancelled and frees up the slot
 """
 @app.post("/v1/appointments/{appointment_id}/cancel")
-async def cancel_appointment_endpoint(appointment_id: str):
-    success = cancel_appointment(appointment_id)
+async def cancel_appointment_endpoint(
+    appointment_id: str,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_session)
+):
+    request_hash = request_fingerprint(appointment_id)
+    replayed = claim_idempotent(idempotency_key, "cancel", request_hash, db)
+    if replayed:
+        return replayed
+
+    response = {"message": "Appointment cancelled successfully"}
+    success = cancel_appointment(appointment_id, db=db,
+                                 before_commit=store_idempotent(idempotency_key, lambda _: response, db))
     
     if not success:
+        db.rollback()  # release the claimed key
         raise HTTPException(status_code=404, detail="Appointment not found")
         
-    return {"message": "Appointment cancelled successfully"}
+    return response
 
 
 """
@@ -212,22 +368,25 @@ Modify an appointment to a different slot
 Frees old slot and books new slot
 """
 @app.put("/v1/appointments/{appointment_id}", response_model=AppointmentResponse)
-async def modify_appointment_endpoint(appointment_id: str, request: ModifyAppointmentRequest):
-    appointment = modify_appointment(appointment_id, request.new_slot_id)
+async def modify_appointment_endpoint(
+    appointment_id: str,
+    request: ModifyAppointmentRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_session)
+):
+    request_hash = request_fingerprint(appointment_id, request.model_dump())
+    replayed = claim_idempotent(idempotency_key, "modify", request_hash, db)
+    if replayed:
+        return replayed
+
+    appointment = modify_appointment(appointment_id, request.new_slot_id, db=db,
+                                     before_commit=store_idempotent(idempotency_key, appointment_response, db))
     
     if not appointment:
+        db.rollback()  # release the claimed key
         raise HTTPException(status_code=400, detail="Could not modify appointment. New slot may be unavailable.")
     
-    return AppointmentResponse(
-        id=str(appointment.id),
-        user_phone=appointment.user_phone,
-        slot_id=str(appointment.slot_id),
-        patient_name=appointment.patient_name,
-        status=appointment.status,
-        notes=appointment.notes,
-        booked_at=appointment.booked_at,
-        updated_at=appointment.updated_at
-    )
+    return appointment_response(appointment)
 
 
 # 2. Slot Endpoints
@@ -236,31 +395,26 @@ Get all slots with availability status
 Returns all slots in the system
 """
 @app.get("/v1/slots", response_model=List[SlotResponse])
-async def list_all_slots():
-    db = get_db()
-    
-    try:
-        slots = db.query(Slot).all()
-        
-        return [SlotResponse(
-            id=str(slot.id),
-            day_of_week=slot.day_of_week,
-            start_time=slot.start_time.strftime("%H:%M"),
-            end_time=slot.end_time.strftime("%H:%M"),
-            is_available=slot.is_available
-        ) for slot in slots]
+async def list_all_slots(db: Session = Depends(get_read_session)):
+    slots = db.query(Slot).all()
     
-    finally:
-        db.close()
+    return [SlotResponse(
+        id=str(slot.id),
+        day_of_week=slot.day_of_week,
+        start_time=slot.start_time.strftime("%H:%M"),
+        end_time=slot.end_time.strftime("%H:%M"),
+        is_available=slot.is_available
+    ) for slot in slots]
 
 
 """
 Get only available slots
-Returns slots where is_available = True
+Returns slots where is_available = True, leaving out slots another caller holds
+(pass phone to keep the caller's own held slot in the list)
 """
 @app.get("/v1/slots/available", response_model=List[SlotResponse])
-async def list_available_slots():
-    slots = get_available_slots()
+async def list_available_slots(phone: Optional[str] = None, db: Session = Depends(get_read_session)):
+    slots = get_available_slots(phone, db=db)
     
     return [SlotResponse(
         id=str(slot.id),
@@ -271,14 +425,26 @@ async def list_available_slots():
     ) for slot in slots]
 
 
+"""
+Hold a slot for a caller
+Reserves an available slot for SLOT_HOLD_TTL_SECONDS while the booking is confirmed;
+holding it again extends the hold. 409 if it is booked or held by another caller.
+"""
+@app.post("/v1/slots/{slot_id}/hold")
+async def hold_available_slot(slot_id: str, request: HoldSlotRequest, db: Session = Depends(get_session)):
+    if not hold_slot(slot_id, request.phone, db=db):
+        raise HTTPException(status_code=409, detail="Slot is not available")
+    return {"slot_id": slot_id, "held": True}
+
+
 # 3. User Endpoints
 """
 Get user by phone number
 Returns user information
 """
 @app.get("/v1/users/{phone}", response_model=UserResponse)
-async def get_user(phone: str):
-    user = get_user_by_phone(phone)
+async def get_user(phone: str, db: Session = Depends(get_caller_read_session)):
+    user = get_user_by_phone(phone, db=db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -294,8 +460,8 @@ Create or get user
 Creates new user if doesn't exist, otherwise returns existing
 """
 @app.post("/v1/users", response_model=UserResponse)
-async def create_or_get_user(request: CreateUserRequest):
-    user = get_or_create_user(phone=request.phone, name=request.name)
+async def create_or_get_user(request: CreateUserRequest, db: Session = Depends(get_session)):
+    user = get_or_create_user(phone=request.phone, name=request.name, db=db)
     
     return UserResponse(
         phone_number=user.phone_number,
@@ -307,23 +473,19 @@ async def create_or_get_user(request: CreateUserRequest):
 # 4. Call Summary Endpoints
 """
 Get all call summaries (admin)
-Returns all call summaries in the system
+Returns all call summaries in the system, or only those created in [since, until)
 """
 @app.get("/v1/summaries", response_model=List[CallSummaryResponse])
-async def list_all_summaries():
-    db = get_db()
-    try:
-        summaries = db.query(CallSummary).all()
-        
-        return [CallSummaryResponse(
-            id=str(summary.id),
-            patient_phone=summary.patient_phone,
-            summary_text=summary.summary_text,
-            created_at=summary.created_at
-        ) for summary in summaries]
+async def list_all_summaries(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                             db: Session = Depends(get_read_session)):
+    summaries = get_all_summaries(since, until, db=db)
     
-    finally:
-        db.close()
+    return [CallSummaryResponse(
+        id=str(summary.id),
+        patient_phone=summary.patient_phone,
+        summary_text=summary.summary_text,
+        created_at=summary.created_at
+    ) for summary in summaries]
 
 
 """
@@ -331,8 +493,9 @@ Get call summaries by phone number
 Returns summaries for a specific user
 """
 @app.get("/v1/summaries/{phone}", response_model=List[CallSummaryResponse])
-async def get_summaries_by_phone(phone: str):
-    summaries = get_call_summaries_by_phone(phone)
+async def get_summaries_by_phone(phone: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                                 db: Session = Depends(get_caller_read_session)):
+    summaries = get_call_summaries_by_phone(phone, since, until, db=db)
     
     return [CallSummaryResponse(
         id=str(summary.id),
@@ -348,11 +511,12 @@ async def get_summaries_by_phone(phone: str):
 # 5. Billing Endpoints
 """
 Get billing summary for all calls (admin)
-Returns total cost and all call summaries
+Returns total cost and all call summaries, optionally for calls created in [since, until)
 """
 @app.get("/v1/billing")
-async def get_all_billing():
-    summaries = get_all_summaries()
+async def get_all_billing(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                          db: Session = Depends(get_read_session)):
+    summaries = get_all_summaries(since, until, db=db)
     total_cost = sum(float(s.total_cost or 0) for s in summaries)
     total_calls = len(summaries)
     
@@ -377,8 +541,9 @@ Get billing for specific user
 Returns total cost and call summaries for one user
 """
 @app.get("/v1/billing/{phone}")
-async def get_user_billing(phone: str):
-    summaries = get_call_summaries_by_phone(phone)
+async def get_user_billing(phone: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           db: Session = Depends(get_caller_read_session)):
+    summaries = get_call_summaries_by_phone(phone, since, until, db=db)
     total_cost = sum(float(s.total_cost or 0) for s in summaries)
     
     return {
@@ -400,7 +565,9 @@ async def get_user_billing(phone: str):
 # 6. LiveKit Endpoints
 """
 Generate LiveKit room token
-Creates access token for frontend to join LiveKit room
+Creates access token for frontend to join LiveKit room.
+With AGENT_NAME set the agent is dispatched explicitly; with LIVEKIT_PREDISPATCH the room is
+created and the agent dispatched now, so its session and avatar start while the browser connects.
 """
 @app.post("/v1/livekit/token")
 async def generate_livekit_token(request: LiveKitTokenRequest):
@@ -423,10 +590,147 @@ async def generate_livekit_token(request: LiveKitTokenRequest):
         room=room_name,
         agent=True,
     ))
+
+    dispatch = "automatic"
+    if AGENT_NAME:
+        issued_at = time.time()
+        token.with_room_config(room_config(request.phone, issued_at))
+        dispatch = "on_join"
+        if PREDISPATCH_ENABLED:
+            schedule_predispatch(livekit_url, livekit_api_key, livekit_api_secret, room_name, request.phone, issued_at)
+            dispatch = "predispatched"
     
     return {
         "token": token.to_jwt(),
         "url": livekit_url,
-        "room": room_name
+        "room": room_name,
+        "dispatch": dispatch
     }
 
+
+# 7. Export Endpoints
+"""
+Export call summaries (finance)
+Streams rows from a server-side cursor as NDJSON or CSV; memory stays flat for any number of calls.
+since/until filter on created_at and are applied in SQL.
+"""
+@app.get("/v1/export/summaries")
+async def export_summaries(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    phone: Optional[str] = None,
+):
+    return export_response(stream_call_summaries(since, until, phone), format, "call_summaries")
+
+
+"""
+Export appointments (ops)
+Streams appointments with their slot day and time as NDJSON or CSV.
+since/until filter on booked_at and are applied in SQL.
+"""
+@app.get("/v1/export/appointments")
+async def export_appointments(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+):
+    return export_response(stream_appointments(since, until, status), format, "appointments")
+
+
+# 8. Patient Endpoints
+"""
+Search patients (admin)
+Matches q against patient names and phone numbers (prefix and fuzzy), best matches first,
+one result per phone with its appointment count. Paginate with limit/offset.
+"""
+@app.get("/v1/patients/search", response_model=PatientSearchResponse)
+async def search_patient_records(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_session),
+):
+    found = search_patients(q, limit, offset, db=db)
+    return PatientSearchResponse(query=q, limit=limit, offset=offset, **found)
+
+
+"""
+Get patient overview
+Returns the user, active appointments with slot times, the most recent call summaries and
+billing totals in one response (replaces separate user, appointments, summaries and billing calls)
+"""
+@app.get("/v1/patients/{phone}/overview", response_model=PatientOverviewResponse)
+async def get_patient_overview_by_phone(phone: str, summaries: int = Query(5, ge=0, le=50),
+                                        db: Session = Depends(get_caller_read_session)):
+    overview = get_patient_overview(phone, summaries, db=db)
+    user = overview["user"]
+    if not user and not overview["appointments"] and not overview["billing"]["total_calls"]:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    
+    return PatientOverviewResponse(
+        phone=user.phone_number if user else phone,
+        user=UserResponse(phone_number=user.phone_number, name=user.name, created_at=user.created_at) if user else None,
+        appointments=[AppointmentResponse(
+            id=str(appt.id),
+            user_phone=appt.user_phone,
+            slot_id=str(appt.slot_id),
+            patient_name=appt.patient_name,
+            patient_phone=appt.patient_phone,
+            status=appt.status,
+            notes=appt.notes,
+            booked_at=appt.booked_at,
+            updated_at=appt.updated_at,
+            slot=SlotResponse(
+                id=str(slot.id),
+                day_of_week=slot.day_of_week,
+                start_time=slot.start_time.strftime("%I:%M %p"),
+                end_time=slot.end_time.strftime("%I:%M %p"),
+                is_available=slot.is_available
+            ) if slot else None
+        ) for appt, slot in overview["appointments"]],
+        recent_summaries=[CallSummaryResponse(
+            id=str(summary.id),
+            patient_phone=summary.patient_phone,
+            summary_text=summary.summary_text,
+            call_duration_seconds=summary.call_duration_seconds,
+            total_cost=float(summary.total_cost) if summary.total_cost is not None else None,
+            cost_breakdown=summary.cost_breakdown,
+            created_at=summary.created_at
+        ) for summary in overview["summaries"]],
+        billing=PatientBilling(**overview["billing"])
+    )
+
+
+# 9. Stats Endpoints
+"""
+Get daily stats
+Returns the daily_stats rollup for days in [since, until) (all days by default), for one patient
+or all patients: calls, call seconds, cost, bookings, cancellations and modifications per day,
+plus their totals. active_appointments is bookings minus cancellations over the range (all
+active appointments when since is not set).
+"""
+@app.get("/v1/stats/daily", response_model=DailyStatsResponse)
+async def get_daily_stats_series(since: Optional[date] = None, until: Optional[date] = None,
+                                 phone: Optional[str] = None, db: Session = Depends(get_read_session)):
+    days = [DailyStatResponse(
+        day=row.day,
+        calls=row.calls,
+        call_seconds=row.call_seconds,
+        total_cost=float(row.total_cost),
+        booked=row.booked,
+        cancelled=row.cancelled,
+        modified=row.modified
+    ) for row in get_daily_stats(since, until, phone, db=db)]
+    totals = {name: sum(getattr(d, name) for d in days)
+              for name in ("calls", "call_seconds", "total_cost", "booked", "cancelled", "modified")}
+    totals["total_cost"] = round(totals["total_cost"], 4)
+    
+    return DailyStatsResponse(
+        phone=phone,
+        since=since,
+        until=until,
+        days=days,
+        totals=DailyStatsTotals(**totals, active_appointments=totals["booked"] - totals["cancelled"])
+    )
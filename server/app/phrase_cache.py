@@ -0,0 +1,138 @@
+import os
+import wave
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+# Synthesized audio for fixed phrases, shared by all calls on this machine
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "superbyrn_tts_cache"))
+MEMORY_ITEMS = int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "64"))
+FRAME_MS = 20
+
+
+class CachedPhrase:
+    def __init__(self, pcm: bytes, sample_rate: int, num_channels: int):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+
+    # Split the stored 16-bit PCM into 20 ms frames for playback
+    def frames(self) -> list:
+        samples_per_frame = self.sample_rate * FRAME_MS // 1000
+        frame_bytes = samples_per_frame * self.num_channels * 2
+        frames = []
+        for start in range(0, len(self.pcm), frame_bytes):
+            chunk = self.pcm[start:start + frame_bytes]
+            frames.append(rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            ))
+        return frames
+
+
+class PhraseCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, max_memory_items: int = MEMORY_ITEMS):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Audio depends on the exact text, the voice and the TTS model
+    @staticmethod
+    def key(text: str, voice: str, model: str) -> str:
+        return hashlib.sha256(f"{model}|{voice}|{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _remember(self, key: str, phrase: CachedPhrase):
+        with self._lock:
+            self._memory[key] = phrase
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    # Memory first, then disk
+    def get(self, key: str):
+        with self._lock:
+            phrase = self._memory.get(key)
+            if phrase is not None:
+                self._memory.move_to_end(key)
+                return phrase
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with wave.open(path, "rb") as f:
+            phrase = CachedPhrase(f.readframes(f.getnframes()), f.getframerate(), f.getnchannels())
+        self._remember(key, phrase)
+        return phrase
+
+    # Write to a temp file and rename, so concurrent workers never read a partial file
+    def put(self, key: str, phrase: CachedPhrase):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with wave.open(tmp_path, "wb") as f:
+            f.setnchannels(phrase.num_channels)
+            f.setsampwidth(2)
+            f.setframerate(phrase.sample_rate)
+            f.writeframes(phrase.pcm)
+        os.replace(tmp_path, path)
+        self._remember(key, phrase)
+
+    # Yield TTS frames as they arrive and store the phrase once synthesis has finished,
+    # so a miss costs no more latency than live TTS
+    async def _synthesize(self, tts, text: str, key: str):
+        pcm = bytearray()
+        sample_rate, num_channels = tts.sample_rate, tts.num_channels
+        async with tts.synthesize(text) as stream:
+            async for audio in stream:
+                pcm.extend(bytes(audio.frame.data))
+                sample_rate, num_channels = audio.frame.sample_rate, audio.frame.num_channels
+                yield audio.frame
+        phrase = CachedPhrase(bytes(pcm), sample_rate, num_channels)
+        try:
+            self.put(key, phrase)
+        except OSError as e:
+            logger.warning(f"Could not write cached phrase to disk: {e}")
+            self._remember(key, phrase)
+
+    @staticmethod
+    async def _replay(phrase: CachedPhrase):
+        for frame in phrase.frames():
+            yield frame
+
+    # Audio for a phrase: replayed from the cache, or streamed from TTS while the cache fills.
+    # The lookup runs here, so a broken cache raises before playback starts
+    def frames(self, tts, text: str, voice: str, model: str):
+        key = self.key(text, voice, model)
+        phrase = self.get(key)
+        if phrase is None:
+            return self._synthesize(tts, text, key)
+        return self._replay(phrase)
+
+    # Cached audio for a phrase, synthesizing it once on a miss (e.g. to warm the cache)
+    async def get_or_synthesize(self, tts, text: str, voice: str, model: str) -> CachedPhrase:
+        key = self.key(text, voice, model)
+        phrase = self.get(key)
+        if phrase is None:
+            async for _ in self._synthesize(tts, text, key):
+                pass
+            phrase = self.get(key)
+        return phrase
+
+    # Speak a fixed phrase from cached audio -> no TTS round-trip after the first time
+    async def say(self, session, text: str, voice: str, model: str, **kwargs):
+        try:
+            audio = self.frames(session.tts, text, voice, model)
+        except Exception as e:
+            logger.warning(f"Phrase cache unavailable, using live TTS: {e}")
+            return session.say(text, **kwargs)
+        return session.say(text, audio=audio, **kwargs)
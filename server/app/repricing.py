@@ -0,0 +1,225 @@
+"""
+Batch re-pricing of stored call summaries.
+Recomputes cost_breakdown and total_cost from call_duration_seconds with the pricing version
+in effect on the day of each call (see PRICING_VERSIONS in cost_tracker.py). Summaries are
+streamed in chunks as plain rows, never as ORM objects.
+
+Costs are recomputed from the stored whole-second duration, which is also what live calls are
+priced on. Both engines compute seconds * rate / 60 exactly (integers in NumPy through
+cost_tracker's helpers, numeric in Postgres) and round half up, so they write the same values as
+CostTracker and a re-price at an unchanged version updates nothing.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import numpy as np
+from sqlalchemy import select, update, bindparam, cast, func, text, and_, or_, Numeric
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_client import get_engine
+from database.models import CallSummary
+from database.daily_stats import refresh_daily_costs, utc_day
+from cost_tracker import PRICING_VERSIONS, COST_FIELDS, COST_UNITS, rate_places, scaled_rate, round_half_up
+
+summaries = CallSummary.__table__
+
+# One statement per chunk -> Postgres joins the arrays back into rows
+PG_BULK_UPDATE = text("""
+    UPDATE call_summaries AS c
+    SET total_cost = v.total_cost, cost_breakdown = CAST(v.cost_breakdown AS json)
+    FROM (
+        SELECT unnest(CAST(:ids AS uuid[])) AS id,
+               unnest(CAST(:totals AS numeric[])) AS total_cost,
+               unnest(CAST(:breakdowns AS text[])) AS cost_breakdown
+    ) AS v
+    WHERE c.id = v.id
+""")
+
+
+# Days are UTC days, like the pricing version of a live call and the daily_stats rollup
+def _utc_midnight(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time(), timezone.utc)
+
+
+def _window(since: date = None, until: date = None) -> list:
+    conditions = []
+    if since:
+        conditions.append(summaries.c.created_at >= _utc_midnight(since))
+    if until:
+        conditions.append(summaries.c.created_at < _utc_midnight(until))
+    return conditions
+
+
+# Vectorized costs for one chunk -> (changed row mask, breakdown columns)
+def price_chunk(days: np.ndarray, seconds: np.ndarray, old_totals: np.ndarray, old_versions: np.ndarray,
+                versions: list) -> tuple:
+    effective = np.array([d for d, _ in versions], dtype="datetime64[D]")
+    labels = np.array([d.isoformat() for d, _ in versions])
+    places = rate_places(versions)
+    rates = np.array([[scaled_rate(r[name], places) for name in COST_FIELDS] for _, r in versions], dtype=np.int64)
+
+    # Version in effect on each call's day; NaT (no created_at) sorts last -> current pricing
+    version_idx = np.clip(np.searchsorted(effective, days, side="right") - 1, 0, None)
+    # cost = seconds * rate / 60, exact: seconds * scaled rate * COST_UNITS over 60 * 10**places
+    scaled = seconds[:, None] * rates[version_idx] * COST_UNITS
+    per_minute = 60 * 10 ** places
+    costs = round_half_up(scaled, per_minute)
+    totals = round_half_up(scaled.sum(axis=1), per_minute)
+
+    new_versions = labels[version_idx]
+    changed = (new_versions != old_versions) | np.isnan(old_totals) | (np.rint(old_totals * COST_UNITS) != totals)
+    return changed, {
+        "duration_seconds": seconds,
+        "duration_minutes": round_half_up(seconds * 100, 60) / 100,
+        "costs": costs / COST_UNITS,
+        "total_cost": totals / COST_UNITS,
+        "pricing_version": new_versions,
+    }
+
+
+def _breakdown(columns: dict, i: int) -> str:
+    breakdown = {
+        "duration_seconds": int(columns["duration_seconds"][i]),
+        "duration_minutes": float(columns["duration_minutes"][i]),
+    }
+    for j, field in enumerate(COST_FIELDS.values()):
+        breakdown[field] = float(columns["costs"][i, j])
+    breakdown["total_cost"] = float(columns["total_cost"][i])
+    breakdown["pricing_version"] = str(columns["pricing_version"][i])
+    return json.dumps(breakdown)
+
+
+def _bulk_update(conn, ids: list, totals: list, breakdowns: list):
+    if conn.dialect.name == "postgresql":
+        conn.execute(PG_BULK_UPDATE, {"ids": [str(i) for i in ids], "totals": totals, "breakdowns": breakdowns})
+        return
+    # Other databases (local SQLite) -> executemany
+    stmt = update(summaries).where(summaries.c.id == bindparam("b_id")).values(
+        total_cost=bindparam("b_total"), cost_breakdown=bindparam("b_breakdown")
+    )
+    conn.execute(stmt, [
+        {"b_id": i, "b_total": t, "b_breakdown": json.loads(b)} for i, t, b in zip(ids, totals, breakdowns)
+    ])
+
+
+"""
+NumPy engine.
+Streams (id, day, duration, total, version) rows through a server-side cursor, prices each chunk
+with array operations and writes back only the rows whose cost changed. Each chunk is committed
+on a second connection, so an interrupted run keeps its progress.
+"""
+def reprice_numpy(chunk_size: int = 10000, since: date = None, until: date = None, versions: list = None,
+                  dry_run: bool = False, engine=None) -> dict:
+    versions = versions or PRICING_VERSIONS
+    engine = engine or get_engine()
+    query = select(
+        summaries.c.id,
+        utc_day(summaries.c.created_at, engine.dialect.name),
+        func.coalesce(summaries.c.call_duration_seconds, 0),
+        summaries.c.total_cost,
+        summaries.c.cost_breakdown["pricing_version"].as_string(),
+    ).where(*_window(since, until))
+
+    scanned = updated = 0
+    start = time.perf_counter()
+    with engine.connect() as reader, engine.connect() as writer:
+        result = reader.execute(query.execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            ids, days, seconds, old_totals, old_versions = zip(*rows)
+            changed, columns = price_chunk(
+                np.array(days, dtype="datetime64[D]"),
+                np.array(seconds, dtype=np.int64),
+                np.array([np.nan if t is None else float(t) for t in old_totals]),
+                np.array([v or "" for v in old_versions]),
+                versions,
+            )
+            scanned += len(rows)
+            changed_idx = np.flatnonzero(changed)
+            updated += len(changed_idx)
+            if dry_run or not len(changed_idx):
+                continue
+            _bulk_update(
+                writer,
+                [ids[i] for i in changed_idx],
+                columns["total_cost"][changed_idx].tolist(),
+                [_breakdown(columns, i) for i in changed_idx],
+            )
+            writer.commit()
+
+    return {"engine": "numpy", "scanned": scanned, "updated": updated, "dry_run": dry_run,
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+"""
+Set-based SQL engine (Postgres).
+One UPDATE per pricing version; the database computes the costs, nothing is transferred.
+"""
+def reprice_sql(since: date = None, until: date = None, versions: list = None, dry_run: bool = False,
+                engine=None) -> dict:
+    versions = versions or PRICING_VERSIONS
+    engine = engine or get_engine()
+    if engine.dialect.name != "postgresql":
+        raise ValueError("The SQL re-pricing engine needs PostgreSQL; use the numpy engine instead")
+
+    seconds = func.coalesce(summaries.c.call_duration_seconds, 0)
+    exact_seconds = cast(seconds, Numeric)
+    # Compare created_at itself (not its date) so each UPDATE only touches that version's partitions
+    created_at = summaries.c.created_at
+
+    updated = 0
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        for i, (effective, rates) in enumerate(versions):
+            in_version = [] if i == 0 else [created_at >= _utc_midnight(effective)]
+            if i + 1 < len(versions):
+                in_version.append(created_at < _utc_midnight(versions[i + 1][0]))
+            else:
+                in_version = [or_(and_(*in_version), created_at.is_(None))] if in_version else []
+
+            # Multiply before dividing: a cost that is exactly on a rounding boundary stays exact
+            rate = {name: Decimal(str(rates[name])) for name in COST_FIELDS}
+            costs = {field: exact_seconds * rate[name] / 60 for name, field in COST_FIELDS.items()}
+            total = func.round(exact_seconds * sum(rate.values()) / 60, 4)
+            breakdown = func.json_build_object(
+                "duration_seconds", seconds,
+                "duration_minutes", func.round(exact_seconds / 60, 2),
+                *[arg for field, cost in costs.items() for arg in (field, func.round(cost, 4))],
+                "total_cost", total,
+                "pricing_version", effective.isoformat(),
+            )
+            stmt = update(summaries).where(*in_version, *_window(since, until)).where(or_(
+                summaries.c.total_cost.is_(None),
+                summaries.c.total_cost != total,
+                summaries.c.cost_breakdown["pricing_version"].as_string().is_distinct_from(effective.isoformat()),
+            )).values(total_cost=total, cost_breakdown=breakdown)
+            updated += conn.execute(stmt).rowcount
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+
+    return {"engine": "sql", "updated": updated, "dry_run": dry_run, "seconds": round(time.perf_counter() - start, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-price stored call summaries with the versioned pricing tables")
+    parser.add_argument("--engine", choices=["numpy", "sql"], default="numpy")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--since", type=date.fromisoformat, help="only calls on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="only calls before this date (YYYY-MM-DD)")
+    parser.add_argument("--dry-run", action="store_true", help="count the rows that would change")
+    options = parser.parse_args()
+
+    if options.engine == "sql":
+        report = reprice_sql(options.since, options.until, dry_run=options.dry_run)
+    else:
+        report = reprice_numpy(options.chunk_size, options.since, options.until, dry_run=options.dry_run)
+    # daily_stats sums total_cost -> re-sum the cost of the re-priced days (other counters untouched)
+    if report["updated"] and not options.dry_run:
+        report["daily_stats"] = refresh_daily_costs(options.since, options.until)
+    print(json.dumps(report))
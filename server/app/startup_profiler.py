@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Set AGENT_STARTUP_PROFILE=1 in the shell (read before .env is loaded)
+PROFILE_ENV = "AGENT_STARTUP_PROFILE"
+# Number of modules listed in the import time report
+TOP_IMPORTS = int(os.getenv("AGENT_STARTUP_PROFILE_TOP", "15"))
+
+
+# Seconds since the OS started this process, so interpreter startup is included
+def _process_started_at() -> float:
+    try:
+        import psutil
+        return psutil.Process().create_time()
+    except Exception:
+        return time.time()
+
+
+# Times each module's execution, like -X importtime: cumulative includes the imports it
+# triggers, self does not. Installed first on sys.meta_path, it finds the spec through the
+# other finders and swaps in a timing loader that hands the module back to the real one
+class _ImportTimer:
+    def __init__(self):
+        self.modules = {}  # name -> [self seconds, cumulative seconds]
+        self._local = threading.local()
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        if self not in sys.meta_path:
+            return None
+        for finder in sys.meta_path[sys.meta_path.index(self) + 1:]:
+            find_spec = getattr(finder, "find_spec", None)
+            spec = find_spec(name, path, target) if find_spec else None
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def run(self, loader, module):
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)  # time spent in nested imports
+        start = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            self.modules[module.__name__] = [cumulative - nested, cumulative]
+
+    # Slowest modules by self time -> (name, self seconds, cumulative seconds)
+    def top(self, limit: int) -> list:
+        ranked = sorted(self.modules.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, own, cumulative) for name, (own, cumulative) in ranked[:limit]]
+
+
+class _TimedLoader:
+    def __init__(self, loader, timer: _ImportTimer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # The module keeps the real loader (resources, reloads, pickling)
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.timer.run(self.loader, module)
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = os.getenv(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+        self.started_at = _process_started_at()
+        self.marks = []
+        self.imports = None
+        if self.enabled:
+            self.imports = _ImportTimer()
+            self.imports.install()
+
+    # Record how long after process start a startup stage finished
+    def mark(self, stage: str):
+        if not self.enabled:
+            return
+        elapsed = time.time() - self.started_at
+        self.marks.append((stage, elapsed))
+        logger.info(f"[startup] {stage}: {elapsed * 1000:.1f} ms after process start (pid {os.getpid()})")
+
+    # Log every stage with the time spent since the previous one, then the slowest imports
+    # (imports after this point are no longer timed)
+    def report(self):
+        if not self.enabled:
+            return
+        previous = 0.0
+        lines = []
+        for stage, elapsed in self.marks:
+            lines.append(f"  {stage:<12} {elapsed * 1000:8.1f} ms  (+{(elapsed - previous) * 1000:.1f} ms)")
+            previous = elapsed
+        self.imports.uninstall()
+        lines.append(f"  top {TOP_IMPORTS} imports by self time ({len(self.imports.modules)} modules timed):")
+        for name, own, cumulative in self.imports.top(TOP_IMPORTS):
+            lines.append(f"    {own * 1000:8.1f} ms self  {cumulative * 1000:8.1f} ms cumulative  {name}")
+        logger.info("[startup] profile:\n" + "\n".join(lines))
+
+
+profiler = StartupProfiler()
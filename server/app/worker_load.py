@@ -0,0 +1,73 @@
+import os
+import logging
+import threading
+from collections import deque
+from livekit.agents import JobRequest
+from livekit.agents.utils.hw import get_cpu_monitor
+
+logger = logging.getLogger(__name__)
+
+# Admission settings -> a worker at or above LOAD_THRESHOLD stops taking calls
+MAX_SESSIONS = int(os.getenv("AGENT_MAX_SESSIONS", "4"))
+LOAD_THRESHOLD = float(os.getenv("AGENT_LOAD_THRESHOLD", "0.75"))
+
+
+class WorkerLoadMonitor:
+    # CPU is sampled for the whole host, so it covers the job processes that run the calls
+    def __init__(self, max_sessions: int = MAX_SESSIONS, threshold: float = LOAD_THRESHOLD):
+        self.max_sessions = max_sessions
+        self.threshold = threshold
+        self.server = None
+        self._cpu_monitor = get_cpu_monitor()
+        self._cpu_samples = deque(maxlen=5)
+        self._cpu_thread = None
+
+    # Attach to the AgentServer -> load function for self-hosted workers, request filter everywhere
+    def attach(self, server):
+        self.server = server
+        server.load_fnc = self.load_fnc
+        server.on("worker_started", lambda *args: self.start())
+
+    # Start CPU sampling (background thread)
+    def start(self):
+        if self._cpu_thread is None:
+            self._cpu_thread = threading.Thread(target=self._sample_cpu, daemon=True, name="worker_load_cpu")
+            self._cpu_thread.start()
+
+    def _sample_cpu(self):
+        while True:
+            self._cpu_samples.append(self._cpu_monitor.cpu_percent(interval=0.5))
+
+    def active_sessions(self) -> int:
+        return len(self.server.active_jobs) if self.server else 0
+
+    # Each component is normalised so 1.0 means saturated
+    def components(self, active_sessions: int = None) -> dict:
+        if active_sessions is None:
+            active_sessions = self.active_sessions()
+        cpu = sum(self._cpu_samples) / len(self._cpu_samples) if self._cpu_samples else 0.0
+        return {
+            "cpu": cpu,
+            "sessions": active_sessions / self.max_sessions if self.max_sessions else 0.0,
+        }
+
+    def load(self, active_sessions: int = None) -> float:
+        return min(max(self.components(active_sessions).values()), 1.0)
+
+    def load_fnc(self, server) -> float:
+        return self.load(len(server.active_jobs))
+
+    # Job request filter -> saturated workers hand the call back to the dispatcher
+    async def on_request(self, req: JobRequest):
+        self.start()
+        components = self.components()
+        load = min(max(components.values()), 1.0)
+        if load >= self.threshold:
+            logger.warning(
+                f"Rejecting job {req.id}: load {load:.2f} >= {self.threshold} "
+                f"(cpu {components['cpu']:.2f}, sessions {components['sessions']:.2f})"
+            )
+            # terminate=False lets the dispatcher offer the job to another worker
+            await req.reject(terminate=False)
+            return
+        await req.accept()
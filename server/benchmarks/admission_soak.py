@@ -0,0 +1,96 @@
+"""
+Admission soak test for WorkerLoadMonitor.
+
+Simulates calls on a single event loop. Every call processes a 20 ms audio
+frame with a configurable amount of CPU work (standing in for VAD, turn
+detection and noise cancellation) and records how late each frame is handled.
+Calls keep arriving faster than the loop can serve them; the run is repeated
+with and without the admission policy from app/worker_load.py:
+
+    python benchmarks/admission_soak.py --calls 40 --frame-work-ms 2 --max-sessions 8
+
+With admission enabled, per-call frame latency stays flat and excess calls
+are rejected (the dispatcher would route them to another worker).
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from worker_load import WorkerLoadMonitor
+
+FRAME_SECONDS = 0.02
+
+
+def burn_cpu(ms: float):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+# One simulated call -> returns the lateness of every frame in ms
+async def simulated_call(duration: float, frame_work_ms: float) -> list:
+    delays = []
+    next_frame = time.perf_counter()
+    end = next_frame + duration
+    while next_frame < end:
+        next_frame += FRAME_SECONDS
+        await asyncio.sleep(max(next_frame - time.perf_counter(), 0))
+        delays.append(max(time.perf_counter() - next_frame, 0) * 1000)
+        burn_cpu(frame_work_ms)
+    return delays
+
+
+async def soak(calls: int, arrival_interval: float, duration: float, frame_work_ms: float, max_sessions: int,
+               admission: bool) -> dict:
+    monitor = WorkerLoadMonitor(max_sessions=max_sessions)
+    monitor.start()
+    await asyncio.sleep(1.0)  # let the monitors collect a first window
+
+    active = set()
+    results = []
+    rejected = 0
+    for _ in range(calls):
+        if admission and monitor.load(len(active)) >= monitor.threshold:
+            rejected += 1
+        else:
+            task = asyncio.create_task(simulated_call(duration, frame_work_ms))
+            active.add(task)
+            task.add_done_callback(active.discard)
+            results.append(task)
+        await asyncio.sleep(arrival_interval)
+
+    per_call_p95 = []
+    for delays in await asyncio.gather(*results):
+        delays.sort()
+        per_call_p95.append(delays[int(0.95 * (len(delays) - 1))])
+
+    return {
+        "admission": admission,
+        "accepted": len(results),
+        "rejected": rejected,
+        "median_call_p95_ms": round(statistics.median(per_call_p95), 2),
+        "worst_call_p95_ms": round(max(per_call_p95), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak test for load-aware job admission")
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--arrival-interval", type=float, default=0.25, help="seconds between new calls")
+    parser.add_argument("--duration", type=float, default=8.0, help="seconds per call")
+    parser.add_argument("--frame-work-ms", type=float, default=2.0, help="CPU time per 20 ms frame")
+    parser.add_argument("--max-sessions", type=int, default=8, help="AGENT_MAX_SESSIONS for the simulated worker")
+    options = parser.parse_args()
+
+    for admission in (False, True):
+        report = asyncio.run(soak(
+            options.calls, options.arrival_interval, options.duration, options.frame_work_ms,
+            options.max_sessions, admission
+        ))
+        print(json.dumps(report))
@@ -0,0 +1,109 @@
+"""
+Chat context benchmark.
+
+Builds synthetic calls of increasing length (every turn lists the open slots,
+as a real booking call does) and compares the prompt sent to the LLM with and
+without the ContextPolicy from app/context_policy.py:
+
+    python benchmarks/context_ttft.py --turns 5 10 20 40
+
+Without --live, time to first token is estimated from prompt size
+(--base-ms + --ms-per-1k-tokens). With --live, the prompts are streamed through
+the same LLM the agent uses (needs LIVEKIT_API_KEY / LIVEKIT_API_SECRET) and
+the measured time to first token is reported.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from livekit.agents import llm
+from prompts import DOCTOR_APPOINTMENT_PROMPT
+from context_policy import ContextPolicy
+
+DAYS = ["Monday", "Tuesday"]
+
+
+def slot_list_output(slots: int) -> str:
+    lines = []
+    for i in range(slots):
+        hour = 9 + i // 4
+        lines.append(f"{DAYS[i % 2]} {hour % 12 or 12:02d}:00 {'AM' if hour < 12 else 'PM'} to "
+                     f"{hour % 12 or 12:02d}:30 {'AM' if hour < 12 else 'PM'} (ID: {uuid.uuid4()})")
+    return "Available slots:\n" + "\n".join(lines)
+
+
+# A call with `turns` user turns, each one fetching the slot list and getting a spoken reply
+def synthetic_call(turns: int, slots: int) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="system", content=DOCTOR_APPOINTMENT_PROMPT)
+    for turn in range(turns):
+        chat_ctx.add_message(role="user", content=f"What times do you have open? (turn {turn})")
+        call_id = uuid.uuid4().hex
+        chat_ctx.items.append(llm.FunctionCall(call_id=call_id, name="fetch_slots", arguments="{}"))
+        chat_ctx.items.append(llm.FunctionCallOutput(call_id=call_id, name="fetch_slots",
+                                                     output=slot_list_output(slots), is_error=False))
+        chat_ctx.add_message(role="assistant", content="We have openings on Monday and Tuesday. Which works best?")
+    chat_ctx.add_message(role="user", content="Monday at nine, please.")
+    return chat_ctx
+
+
+async def first_token_ms(model, chat_ctx: llm.ChatContext) -> float:
+    start = time.perf_counter()
+    async with model.chat(chat_ctx=chat_ctx) as stream:
+        async for _ in stream:
+            return (time.perf_counter() - start) * 1000
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(options) -> list:
+    policy = ContextPolicy(options.keep_turns, options.max_tokens, options.tool_output_chars)
+    model = None
+    if options.live:
+        from livekit.agents import inference
+        model = inference.LLM(options.model)
+
+    rows = []
+    for turns in options.turns:
+        full = synthetic_call(turns, options.slots)
+        bounded = full.copy()
+        start = time.perf_counter()
+        policy.apply(bounded)
+        apply_ms = (time.perf_counter() - start) * 1000
+
+        row = {"turns": turns, "policy_ms": round(apply_ms, 3)}
+        for label, chat_ctx in (("full", full), ("bounded", bounded)):
+            tokens = policy.prompt_tokens(chat_ctx)
+            row[f"{label}_items"] = len(chat_ctx.items)
+            row[f"{label}_tokens"] = tokens
+            if model is not None:
+                samples = [await first_token_ms(model, chat_ctx) for _ in range(options.repeat)]
+                row[f"{label}_ttft_ms"] = round(statistics.median(samples), 1)
+            else:
+                row[f"{label}_ttft_ms_est"] = round(options.base_ms + tokens / 1000 * options.ms_per_1k_tokens, 1)
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt size and time to first token against call length")
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--slots", type=int, default=24, help="slots listed per fetch_slots call")
+    parser.add_argument("--keep-turns", type=int, default=6)
+    parser.add_argument("--max-tokens", type=int, default=6000)
+    parser.add_argument("--tool-output-chars", type=int, default=240)
+    parser.add_argument("--live", action="store_true", help="measure time to first token against the real LLM")
+    parser.add_argument("--model", default="openai/gpt-4.1-mini")
+    parser.add_argument("--repeat", type=int, default=3, help="live requests per prompt")
+    parser.add_argument("--base-ms", type=float, default=350.0, help="estimated TTFT for an empty prompt")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=60.0, help="estimated TTFT added per 1k prompt tokens")
+    options = parser.parse_args()
+
+    for row in asyncio.run(run(options)):
+        print(json.dumps(row))
@@ -0,0 +1,118 @@
+"""
+Daily stats benchmark.
+
+Seeds --calls scratch call summaries spread over --days days of 2001 (so they stay apart from
+real data) in the database in DATABASE_URL, rebuilds their daily_stats rows with the backfill
+and compares the two ways the admin dashboard can get its cost and call totals:
+
+    raw:     GET /v1/billing       (every call summary, summed by the API)
+    rollup:  GET /v1/stats/daily   (one row per day)
+
+    python benchmarks/daily_stats.py --calls 50000 --days 365 --iterations 20
+
+Reports server time, SQL rows read and response size per dashboard load (in-process, so
+network transfer comes on top). The scratch rows are removed at the end.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import statistics
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, insert, delete
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from database import db_client
+from database.models import CallSummary
+from database.daily_stats import backfill_daily_stats
+from app import main
+
+START = date(2001, 1, 1)
+PHONE_PREFIX = "000930"
+
+
+def seed(calls: int, days: int):
+    rows = [
+        {"id": uuid.uuid4(), "patient_phone": f"{PHONE_PREFIX}{i % 500:04d}", "summary_text": "benchmark",
+         "call_duration_seconds": 60 + i % 300, "total_cost": round(0.3 + (i % 300) / 200, 4),
+         "cost_breakdown": {"total_cost": 0.8},
+         "created_at": datetime.combine(START, datetime.min.time()) + timedelta(seconds=random.randrange(days * 86400))}
+        for i in range(calls)
+    ]
+    with db_client.get_engine().begin() as conn:
+        for start in range(0, len(rows), 5000):
+            conn.execute(insert(CallSummary.__table__), rows[start:start + 5000])
+    return backfill_daily_stats(START, START + timedelta(days=days))
+
+
+def cleanup(days: int):
+    summaries = CallSummary.__table__
+    end = datetime.combine(START + timedelta(days=days), datetime.min.time())
+    with db_client.get_engine().begin() as conn:
+        conn.execute(delete(summaries).where(summaries.c.created_at < end,
+                                             summaries.c.patient_phone.like(f"{PHONE_PREFIX}%")))
+    backfill_daily_stats(START, START + timedelta(days=days))
+
+
+def raw(client: TestClient):
+    return client.get("/v1/billing")
+
+
+def rollup(client: TestClient):
+    return client.get("/v1/stats/daily")
+
+
+# Rows one dashboard load reads: its SELECTs re-run as SELECT count(*) after the timed runs
+# (cursor.rowcount is -1 for SELECT on SQLite and driver-dependent elsewhere)
+def rows_read(flow, client: TestClient) -> int:
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    engine = db_client.get_engine()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        flow(client).raise_for_status()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    with engine.connect() as conn:
+        return sum(conn.exec_driver_sql(f"SELECT count(*) FROM ({statement}) AS q", parameters).scalar()
+                   for statement, parameters in statements if statement.lstrip().upper().startswith("SELECT"))
+
+
+def measure(flow, client: TestClient, iterations: int) -> dict:
+    flow(client)  # warm-up
+    timings, size = [], 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = flow(client)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        size = len(response.content)
+    return {
+        "flow": flow.__name__,
+        "rows_read": rows_read(flow, client),
+        "response_kb": round(size / 1024, 1),
+        "ms_p50": round(statistics.median(timings), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard totals from raw call summaries vs the daily rollup")
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    options = parser.parse_args()
+
+    random.seed(options.seed)
+    print(json.dumps({"backfill": seed(options.calls, options.days)}))
+    try:
+        client = TestClient(main.app)
+        for flow in (raw, rollup):
+            print(json.dumps(measure(flow, client, options.iterations)))
+    finally:
+        cleanup(options.days)
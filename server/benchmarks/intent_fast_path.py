@@ -0,0 +1,116 @@
+"""
+Intent fast path benchmark.
+
+Runs the rule-based classifier from app/intent_router.py over recorded
+transcripts and estimates how much turn latency it saves.
+
+Inputs are call traces recorded with CALL_TRACE_DIR and CALL_TRACE_TRANSCRIPTS=1
+(transcript events followed by the tool the LLM chose) or plain text files with
+one utterance per line:
+
+    python benchmarks/intent_fast_path.py traces/*.ndjson
+    python benchmarks/intent_fast_path.py utterances.txt --llm-ms 900
+
+For traces, the time between a transcript and the LLM's next tool call is the
+measured cost of that LLM round-trip, and the LLM's tool choice is used to check
+that the fast path agrees with it. A "yes, confirm" only takes the fast path while a
+booking is pending, so in traces it is counted only when the last tool called
+was hold_slot_tool; in text files it is always counted.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from intent_router import classify
+
+# Fast path intents and the tool the LLM would have called for them
+EXPECTED_TOOL = {"identify_user": "identify_user", "invalid_phone": "identify_user", "fetch_slots": "fetch_slots",
+                 "confirm_booking": "book_appointment_tool"}
+
+
+# Whether the turn passes the agent's guard for context-dependent intents
+def guarded(intent, last_tool) -> bool:
+    if intent.name == "confirm_booking":
+        return last_tool in (None, "hold_slot_tool")
+    return True
+
+
+# (utterance, tool the LLM called next or None, seconds until that call or None,
+#  last tool called before the utterance: None for text files, "" if there was none)
+def load_turns(path: str) -> list:
+    if not path.endswith(".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            return [(line.strip(), None, None, None) for line in f if line.strip()]
+
+    with open(path, encoding="utf-8") as f:
+        events = sorted((json.loads(line) for line in f if line.strip()), key=lambda e: e["t"])
+    turns = []
+    last_tool = ""
+    for i, event in enumerate(events):
+        if "transcript" not in event:
+            last_tool = event.get("tool") or last_tool
+            continue
+        next_tool, gap = None, None
+        for later in events[i + 1:]:
+            if "transcript" in later:
+                break
+            if later.get("tool"):
+                next_tool = later["tool"]
+                # Turns that already took the fast path don't measure the LLM
+                gap = None if event.get("fast_path") else later["t"] - event["t"]
+                break
+        turns.append((event["transcript"], next_tool, gap, last_tool))
+    return turns
+
+
+def benchmark(paths: list, llm_ms: float) -> dict:
+    turns = [turn for path in paths for turn in load_turns(path)]
+    hits = {}
+    classify_us = []
+    agree = disagree = 0
+    llm_gaps = []
+
+    for text, llm_tool, gap, last_tool in turns:
+        start = time.perf_counter()
+        intent = classify(text)
+        classify_us.append((time.perf_counter() - start) * 1e6)
+        if gap is not None and llm_tool:
+            llm_gaps.append(gap * 1000)
+        if intent is None or not guarded(intent, last_tool):
+            continue
+        hits[intent.name] = hits.get(intent.name, 0) + 1
+        if llm_tool:
+            if EXPECTED_TOOL[intent.name] == llm_tool:
+                agree += 1
+            else:
+                disagree += 1
+
+    saved_per_hit = statistics.median(llm_gaps) if llm_gaps else llm_ms
+    total_hits = sum(hits.values())
+    classify_us.sort()
+    return {
+        "turns": len(turns),
+        "fast_path_hits": hits,
+        "hit_rate": round(total_hits / len(turns), 3) if turns else 0.0,
+        "agreement_with_llm": {"agree": agree, "disagree": disagree},
+        "classifier_p50_us": round(classify_us[len(classify_us) // 2], 1) if classify_us else 0.0,
+        "classifier_p99_us": round(classify_us[int(0.99 * (len(classify_us) - 1))], 1) if classify_us else 0.0,
+        "llm_round_trip_ms": round(saved_per_hit, 1),
+        "llm_round_trip_source": "measured from traces" if llm_gaps else "--llm-ms",
+        "estimated_saved_ms_per_hit": round(saved_per_hit, 1),
+        "estimated_saved_s_total": round(total_hits * saved_per_hit / 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the rule-based intent fast path on recorded transcripts")
+    parser.add_argument("inputs", nargs="+", help="trace .ndjson files or text files with one utterance per line")
+    parser.add_argument("--llm-ms", type=float, default=900.0, help="LLM round-trip to assume when traces have no timings")
+    options = parser.parse_args()
+
+    print(json.dumps(benchmark(options.inputs, options.llm_ms), indent=2))
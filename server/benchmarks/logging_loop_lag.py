@@ -0,0 +1,129 @@
+"""
+Logging loop-lag benchmark.
+
+Runs simulated calls on one event loop, each logging --records-per-tick records every 20 ms
+(the audio frame cadence), while a probe measures how late the loop wakes up from a 10 ms
+sleep. Logs go to a pipe drained at --sink-kbps, like a log collector that falls behind:
+
+    direct:  a JSON StreamHandler on the root logger, written from the loop
+    queue:   the same handler behind observability/logging_setup.py's queue and listener thread
+
+    python benchmarks/logging_loop_lag.py --calls 8 --records-per-tick 5 --seconds 5 --sink-kbps 64
+
+Reports loop lag percentiles, records written to the sink and records dropped by the queue.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import threading
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from observability import logging_setup
+
+TICK = 0.02
+PROBE = 0.01
+
+
+class Sink:
+    # Read end of a pipe, drained at a limited rate by a thread (unlimited once stop() is called)
+    def __init__(self, kbps: float):
+        read_fd, write_fd = os.pipe()
+        self.reader = os.fdopen(read_fd, "rb", buffering=0)
+        self.writer = os.fdopen(write_fd, "w", buffering=1)
+        self.kbps = kbps
+        self.lines = 0
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            chunk = self.reader.read(4096)
+            if not chunk:
+                return
+            self.lines += chunk.count(b"\n")
+            if self.kbps:
+                time.sleep(len(chunk) / (self.kbps * 1024))
+
+    def stop(self):
+        self.kbps = 0
+        self.writer.close()
+        self._thread.join()
+
+
+async def call(index: int, options, stop: asyncio.Event):
+    logger = logging.getLogger("benchmark.call")
+    frame = 0
+    while not stop.is_set():
+        for _ in range(options.records_per_tick):
+            logger.info("frame %d processed", frame, extra={"call_id": f"call-{index}", "frame": frame})
+        frame += 1
+        await asyncio.sleep(TICK)
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE)
+        lags.append(max(time.perf_counter() - start - PROBE, 0.0) * 1000)
+
+
+async def workload(options) -> list:
+    lags, stop = [], asyncio.Event()
+    tasks = [asyncio.create_task(call(i, options, stop)) for i in range(options.calls)]
+    tasks.append(asyncio.create_task(probe(lags, stop)))
+    await asyncio.sleep(options.seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return lags
+
+
+def run(mode: str, options) -> dict:
+    sink = Sink(options.sink_kbps)
+    handler = logging.StreamHandler(sink.writer)
+    handler.setFormatter(logging_setup.JsonFormatter())
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    if mode == "queue":
+        logging_setup.configure_logging(queue_size=options.queue_size)
+
+    start = time.perf_counter()
+    lags = asyncio.run(workload(options))
+    elapsed = time.perf_counter() - start
+    written_during_run = sink.lines
+    dropped = logging_setup.dropped_records()
+
+    sink.kbps = 0  # let the queue drain quickly
+    logging_setup.shutdown_logging()
+    root.handlers.clear()
+    sink.stop()
+    lags.sort()
+    return {
+        "mode": mode,
+        "seconds": round(elapsed, 2),
+        "lag_ms_p50": round(statistics.median(lags), 2),
+        "lag_ms_p99": round(lags[int(len(lags) * 0.99)], 2),
+        "lag_ms_max": round(lags[-1], 2),
+        "written_during_run": written_during_run,
+        "dropped": dropped,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event-loop lag under heavy logging: direct vs queued handlers")
+    parser.add_argument("--calls", type=int, default=8)
+    parser.add_argument("--records-per-tick", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--sink-kbps", type=float, default=64.0, help="rate the log sink drains, 0 for unlimited")
+    parser.add_argument("--queue-size", type=int, default=logging_setup.QUEUE_SIZE)
+    options = parser.parse_args()
+
+    for mode in ("direct", "queue"):
+        print(json.dumps(run(mode, options)))
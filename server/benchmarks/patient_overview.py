@@ -0,0 +1,117 @@
+"""
+Patient overview benchmark.
+
+Seeds one scratch patient (phone 0009100000) with appointments and call summaries
+in the database in DATABASE_URL, then compares what a client needs for the
+post-call screen:
+
+    separate: GET /v1/users/{phone}, /v1/appointments/{phone}, /v1/slots (slot times),
+              /v1/summaries/{phone}, /v1/billing/{phone}
+    overview: GET /v1/patients/{phone}/overview
+
+    python benchmarks/patient_overview.py --appointments 5 --calls 200 --iterations 50
+
+Reports HTTP requests, SQL statements and server time per page load (in-process,
+so network round-trips come on top). The scratch rows are removed at the end.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+from datetime import datetime, timedelta, time as clock
+from sqlalchemy import event, insert, delete
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from database import db_client
+from database.models import User, Slot, Appointment, CallSummary
+from app import main
+
+PHONE = "0009100000"
+DAY = "Overview"
+
+
+def seed(appointments: int, calls: int):
+    engine = db_client.get_engine()
+    slot_ids = [uuid.uuid4() for _ in range(appointments)]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"phone_number": PHONE, "name": "Overview Patient", "created_at": now}])
+        if slot_ids:
+            conn.execute(insert(Slot.__table__), [
+                {"id": slot_id, "day_of_week": DAY, "start_time": clock(9 + i), "end_time": clock(9 + i, 30), "is_available": False}
+                for i, slot_id in enumerate(slot_ids)
+            ])
+            conn.execute(insert(Appointment.__table__), [
+                {"id": uuid.uuid4(), "user_phone": PHONE, "slot_id": slot_id, "patient_name": "Overview Patient",
+                 "patient_phone": PHONE, "status": "confirmed", "booked_at": now, "updated_at": now}
+                for slot_id in slot_ids
+            ])
+        if calls:
+            conn.execute(insert(CallSummary.__table__), [
+                {"id": uuid.uuid4(), "patient_phone": PHONE, "summary_text": "benchmark", "call_duration_seconds": 120,
+                 "total_cost": 0.8, "cost_breakdown": {"total_cost": 0.8}, "created_at": now - timedelta(days=i % 60)}
+                for i in range(calls)
+            ])
+
+
+def cleanup():
+    with db_client.get_engine().begin() as conn:
+        conn.execute(delete(CallSummary.__table__).where(CallSummary.__table__.c.patient_phone == PHONE))
+        conn.execute(delete(Appointment.__table__).where(Appointment.__table__.c.patient_phone == PHONE))
+        conn.execute(delete(Slot.__table__).where(Slot.__table__.c.day_of_week == DAY))
+        conn.execute(delete(User.__table__).where(User.__table__.c.phone_number == PHONE))
+
+
+def separate(client: TestClient):
+    for path in (f"/v1/users/{PHONE}", f"/v1/appointments/{PHONE}", "/v1/slots",
+                 f"/v1/summaries/{PHONE}", f"/v1/billing/{PHONE}"):
+        client.get(path).raise_for_status()
+    return 5
+
+
+def overview(client: TestClient):
+    client.get(f"/v1/patients/{PHONE}/overview").raise_for_status()
+    return 1
+
+
+def measure(flow, client: TestClient, iterations: int) -> dict:
+    statements = []
+    listener = lambda *args: statements.append(1)
+    engine = db_client.get_engine()
+    flow(client)  # warm-up
+    timings = []
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            requests = flow(client)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return {
+        "flow": flow.__name__,
+        "http_requests": requests,
+        "sql_statements": len(statements) // iterations,
+        "ms_p50": round(statistics.median(timings), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Post-call page load: separate requests vs the patient overview")
+    parser.add_argument("--appointments", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=50)
+    options = parser.parse_args()
+
+    seed(options.appointments, options.calls)
+    try:
+        client = TestClient(main.app)
+        for flow in (separate, overview):
+            print(json.dumps(measure(flow, client, options.iterations)))
+    finally:
+        cleanup()
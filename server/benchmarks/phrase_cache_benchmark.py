@@ -0,0 +1,135 @@
+"""
+TTS phrase cache benchmark.
+
+Plays fixed phrases through app/phrase_cache.py with a local stub TTS in place of
+Cartesia and reports time to first frame and to last frame for the three paths:
+
+    miss         nothing cached: frames are streamed from the TTS while the cache fills
+    disk hit     a fresh PhraseCache (a new worker process) reading the .wav files
+    memory hit   the same PhraseCache again, served from the in-memory LRU
+
+    python benchmarks/phrase_cache_benchmark.py --first-chunk-ms 180 --chunk-ms 15
+
+It also checks that every path returns the same audio and that the stub TTS is
+called once per phrase, and exits non-zero otherwise.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from livekit import rtc
+from phrase_cache import PhraseCache
+
+PHRASES = [
+    "Hello! Thanks for calling. Could you tell me your phone number, please?",
+    "Please identify the user first",
+    "Invalid phone number. Please provide a 10-digit phone number.",
+]
+
+
+class _SynthesizedAudio:
+    def __init__(self, frame: rtc.AudioFrame):
+        self.frame = frame
+
+
+# Deterministic audio from the text, delivered in 20 ms chunks with TTS-like pacing
+class StubTTS:
+    sample_rate = 24000
+    num_channels = 1
+
+    def __init__(self, first_chunk_ms: float, chunk_ms: float):
+        self.first_chunk_ms = first_chunk_ms
+        self.chunk_ms = chunk_ms
+        self.calls = 0
+
+    def synthesize(self, text: str):
+        self.calls += 1
+        return _StubStream(self, text)
+
+
+class _StubStream:
+    def __init__(self, tts: StubTTS, text: str):
+        self.tts = tts
+        self.text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        samples = self.tts.sample_rate // 50
+        await asyncio.sleep(self.tts.first_chunk_ms / 1000)
+        # ~60 ms of audio per character, like normal speech
+        for i in range(len(self.text) * 3):
+            if i:
+                await asyncio.sleep(self.tts.chunk_ms / 1000)
+            value = (ord(self.text[i // 3]) * 37 + i) % 2000 - 1000
+            data = int(value).to_bytes(2, "little", signed=True) * samples
+            yield _SynthesizedAudio(rtc.AudioFrame(data=data, sample_rate=self.tts.sample_rate,
+                                                   num_channels=1, samples_per_channel=samples))
+
+
+# Drain one phrase the way session.say would, timing the first and last frame
+async def play(cache: PhraseCache, tts: StubTTS, text: str):
+    start = time.perf_counter()
+    first = None
+    pcm = bytearray()
+    async for frame in cache.frames(tts, text, voice="stub-voice", model="stub-model"):
+        if first is None:
+            first = time.perf_counter()
+        pcm.extend(bytes(frame.data))
+    return (first - start) * 1000, (time.perf_counter() - start) * 1000, bytes(pcm)
+
+
+async def run(options) -> int:
+    tts = StubTTS(options.first_chunk_ms, options.chunk_ms)
+    results = {"miss": [], "disk hit": [], "memory hit": []}
+    failures = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for text in PHRASES:
+            worker = PhraseCache(cache_dir=cache_dir)
+            *timing, live = await play(worker, tts, text)
+            results["miss"].append(timing)
+
+            # A new worker starts with an empty LRU, so it reads the .wav written above
+            worker = PhraseCache(cache_dir=cache_dir)
+            *timing, from_disk = await play(worker, tts, text)
+            results["disk hit"].append(timing)
+
+            *timing, from_memory = await play(worker, tts, text)
+            results["memory hit"].append(timing)
+
+            if not (live == from_disk == from_memory):
+                failures.append(f"audio differs between cache paths for {text!r}")
+
+    if tts.calls != len(PHRASES):
+        failures.append(f"stub TTS called {tts.calls} times for {len(PHRASES)} phrases")
+
+    print(f"{len(PHRASES)} phrases, stub TTS: first chunk {options.first_chunk_ms:.0f} ms, "
+          f"{options.chunk_ms:.0f} ms per 20 ms chunk")
+    print(f"{'path':<12} {'first frame ms':>15} {'last frame ms':>14}")
+    for path, timings in results.items():
+        first = statistics.median(t[0] for t in timings)
+        last = statistics.median(t[1] for t in timings)
+        print(f"{path:<12} {first:>15.2f} {last:>14.2f}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the TTS phrase cache with a stub TTS")
+    parser.add_argument("--first-chunk-ms", type=float, default=180.0, help="stub TTS time to first audio")
+    parser.add_argument("--chunk-ms", type=float, default=5.0, help="stub TTS delay between chunks")
+    options = parser.parse_args()
+    sys.exit(asyncio.run(run(options)))
@@ -0,0 +1,144 @@
+"""
+Agent pre-dispatch benchmark.
+
+Starts a local mock of the LiveKit server API (RoomService / AgentDispatchService
+over Twirp), points the token endpoint at it and measures click-to-greeting with
+and without LIVEKIT_PREDISPATCH:
+
+    python benchmarks/predispatch_latency.py --connect-ms 700 --avatar-ms 1500
+
+The token request and the room/dispatch API calls are real (app/agent_dispatch.py
+against the mock). The browser connection and the agent's startup (worker
+assignment, session start, avatar start) are simulated with the given timings.
+Without pre-dispatch the agent starts when the caller joins; with it the agent
+starts when the mock receives CreateDispatch, while the browser is still connecting.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit import api
+
+AGENT_NAME = "appointment-agent"
+
+
+class MockLiveKit:
+    def __init__(self, api_ms: float):
+        self.api_ms = api_ms
+        self.rooms = {}
+        self.dispatches = {}
+        self.dispatched = {}  # room -> asyncio.Event, set when the agent is dispatched
+
+    def dispatched_event(self, room: str) -> asyncio.Event:
+        return self.dispatched.setdefault(room, asyncio.Event())
+
+    async def handle(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.api_ms / 1000)
+        body = await request.read()
+        method = request.match_info["method"]
+        if method == "CreateRoom":
+            req = api.CreateRoomRequest.FromString(body)
+            room = self.rooms.setdefault(req.name, api.Room(name=req.name, sid=f"RM_{len(self.rooms)}"))
+            reply = room
+        elif method == "ListDispatch":
+            req = api.ListAgentDispatchRequest.FromString(body)
+            reply = api.ListAgentDispatchResponse(agent_dispatches=self.dispatches.get(req.room, []))
+        elif method == "CreateDispatch":
+            req = api.CreateAgentDispatchRequest.FromString(body)
+            reply = api.AgentDispatch(id=f"AD_{req.room}", agent_name=req.agent_name, room=req.room,
+                                      metadata=req.metadata)
+            self.dispatches.setdefault(req.room, []).append(reply)
+            self.dispatched_event(req.room).set()
+        else:
+            return web.json_response({"code": "bad_route", "msg": method}, status=404)
+        return web.Response(body=reply.SerializeToString(), content_type="application/protobuf")
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post("/twirp/livekit.{service}/{method}", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+
+async def simulated_agent(startup_ms: float) -> float:
+    await asyncio.sleep(startup_ms / 1000)
+    return time.perf_counter()
+
+
+# One call: click -> token -> browser connects; agent starts on dispatch (or on join) -> greeting
+async def call(main, mock: MockLiveKit, phone: str, options) -> dict:
+    click = time.perf_counter()
+    token = await main.generate_livekit_token(main.LiveKitTokenRequest(phone=phone))
+    token_ms = (time.perf_counter() - click) * 1000
+    room = token["room"]
+    agent_startup_ms = options.assign_ms + options.session_ms + options.avatar_ms
+
+    agent_task = None
+    if token["dispatch"] == "predispatched":
+        async def agent_after_dispatch():
+            await mock.dispatched_event(room).wait()
+            return await simulated_agent(agent_startup_ms)
+        agent_task = asyncio.create_task(agent_after_dispatch())
+
+    await asyncio.sleep(options.connect_ms / 1000)
+    joined = time.perf_counter()
+    if agent_task is None:
+        agent_task = asyncio.create_task(simulated_agent(agent_startup_ms))
+    agent_ready = await agent_task
+
+    # The agent greets once it is ready and the caller's audio has settled (agent_orchestrator.py)
+    greeting = max(agent_ready, joined + 0.5)
+    return {"token_ms": token_ms, "click_to_greeting_ms": (greeting - click) * 1000}
+
+
+async def run(options) -> list:
+    mock = MockLiveKit(options.api_ms)
+    runner = await mock.start(options.port)
+    os.environ.update({
+        "LIVEKIT_URL": f"http://127.0.0.1:{options.port}",
+        "LIVEKIT_API_KEY": "devkey",
+        "LIVEKIT_API_SECRET": "devsecret-devsecret-devsecret-devsecret",
+        "AGENT_NAME": AGENT_NAME,
+    })
+    from app import agent_dispatch, main
+
+    rows = []
+    try:
+        for predispatch in (False, True):
+            main.PREDISPATCH_ENABLED = predispatch
+            results = [await call(main, mock, f"555000{predispatch:d}{i:03d}", options) for i in range(options.calls)]
+            rows.append({
+                "predispatch": predispatch,
+                "calls": len(results),
+                "token_ms_p50": round(statistics.median(r["token_ms"] for r in results), 1),
+                "click_to_greeting_ms_p50": round(statistics.median(r["click_to_greeting_ms"] for r in results), 1),
+            })
+        rows.append({"rooms_created_on_mock": len(mock.rooms), "dispatches_on_mock": sum(map(len, mock.dispatches.values()))})
+    finally:
+        await asyncio.gather(*agent_dispatch._background_tasks, return_exceptions=True)
+        await runner.cleanup()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Click-to-greeting with and without agent pre-dispatch")
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--port", type=int, default=7881)
+    parser.add_argument("--api-ms", type=float, default=40.0, help="latency of each LiveKit API call")
+    parser.add_argument("--connect-ms", type=float, default=700.0, help="browser WebRTC connection time")
+    parser.add_argument("--assign-ms", type=float, default=250.0, help="job dispatch to a worker")
+    parser.add_argument("--session-ms", type=float, default=600.0, help="AgentSession start")
+    parser.add_argument("--avatar-ms", type=float, default=1500.0, help="avatar start")
+    options = parser.parse_args()
+
+    for row in asyncio.run(run(options)):
+        print(json.dumps(row))
@@ -0,0 +1,176 @@
+"""
+Read-replica routing check.
+
+Points the API and the agent tools at a primary (DATABASE_URL) and one replica
+(DATABASE_REPLICA_URLS), both with the schema from database/init_db.py. For a local
+run, any second database works as the replica: it is never written to by the app,
+so a row that differs between the two shows which one served a read.
+
+    DATABASE_URL=postgresql://localhost/app DATABASE_REPLICA_URLS=postgresql://localhost/app_replica \\
+        python benchmarks/replica_routing.py --sticky-seconds 2
+
+Seeds scratch callers (phones 000930000x) with a different name on each database,
+then checks, by counting statements on each engine:
+
+    GET endpoints and the read tools (fetch_slots, retrieve_appointments_tool) use the replica
+    a booking goes to the primary, and the caller's reads then stay on the primary
+    other callers keep reading from the replica
+    after --sticky-seconds the caller is back on the replica
+
+Prints one JSON line per check and exits non-zero if any fails. Scratch rows are
+removed from both databases at the end; the booking is not counted in daily_stats.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import datetime, time as clock
+from sqlalchemy import event, insert, delete
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+PHONE = "0009300000"
+OTHER_PHONE = "0009300001"
+DAY = "Replica"
+SLOT_ID = uuid.UUID("00000000-0000-0000-0000-000000930000")
+
+
+def seed(engine, name: str):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [
+            {"phone_number": phone, "name": name, "created_at": now} for phone in (PHONE, OTHER_PHONE)
+        ])
+        conn.execute(insert(Slot.__table__), [
+            {"id": SLOT_ID, "day_of_week": DAY, "start_time": clock(9), "end_time": clock(9, 30), "is_available": True}
+        ])
+
+
+def cleanup(engine):
+    phones = (PHONE, OTHER_PHONE)
+    with engine.begin() as conn:
+        conn.execute(delete(Appointment.__table__).where(Appointment.__table__.c.user_phone.in_(phones)))
+        conn.execute(delete(SlotHold.__table__).where(SlotHold.__table__.c.slot_id == SLOT_ID))
+        conn.execute(delete(Slot.__table__).where(Slot.__table__.c.day_of_week == DAY))
+        conn.execute(delete(User.__table__).where(User.__table__.c.phone_number.in_(phones)))
+
+
+class Router:
+    def __init__(self, primary, replica):
+        self.counts = {"primary": 0, "replica": 0}
+        for label, engine in (("primary", primary), ("replica", replica)):
+            event.listen(engine, "before_cursor_execute", self._counter(label))
+
+    def _counter(self, label: str):
+        def count(*args):
+            self.counts[label] += 1
+        return count
+
+    # Run a read or write and return which database(s) executed its statements
+    def served_by(self, action):
+        before = dict(self.counts)
+        result = action()
+        used = [label for label in self.counts if self.counts[label] > before[label]]
+        return "+".join(used) or "none", result
+
+
+def run(options) -> int:
+    client = TestClient(main.app)
+    replica = db_client.get_replicas()[0]
+    router = Router(db_client.get_engine(), replica.engine)
+    assistant = agent_tools.AppointmentAssistant()
+    assistant.current_phone = PHONE
+    results = []
+
+    def check(name: str, expected: str, action, validate=lambda result: True):
+        used, result = router.served_by(action)
+        ok = used == expected and validate(result)
+        results.append(ok)
+        print(json.dumps({"check": name, "expected": expected, "served_by": used, "ok": ok}))
+
+    # The process-wide user cache would answer without a query, so it is cleared first
+    def user_name(phone: str):
+        db_client._user_cache.clear()
+        response = client.get(f"/v1/users/{phone}")
+        response.raise_for_status()
+        return response.json()["name"]
+
+    def book():
+        response = client.post("/v1/appointments", json={
+            "slot_id": str(SLOT_ID), "phone": PHONE, "patient_name": "Replica Check"})
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def tool(coroutine):
+        return lambda: asyncio.run(coroutine())
+
+    print(json.dumps({"replica": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag_seconds,
+                      "sticky_seconds": db_client.REPLICA_STICKY_SECONDS}))
+
+    check("GET /v1/slots", "replica", lambda: client.get("/v1/slots").raise_for_status())
+    check("GET /v1/users/{phone} before a write", "replica", lambda: user_name(PHONE),
+          lambda name: name == "Replica Copy")
+    check("tool fetch_slots", "replica", tool(lambda: assistant.fetch_slots(None)),
+          lambda reply: str(SLOT_ID) in reply)
+
+    appointment_id = None
+
+    def booking():
+        nonlocal appointment_id
+        appointment_id = book()
+    check("POST /v1/appointments", "primary", booking)
+
+    check("GET /v1/users/{phone} after the caller's write", "primary", lambda: user_name(PHONE),
+          lambda name: name == "Primary Copy")
+    check("GET /v1/appointments/{phone} after the caller's write", "primary",
+          lambda: client.get(f"/v1/appointments/{PHONE}").json(),
+          lambda appointments: any(a["id"] == appointment_id for a in appointments))
+    check("tool retrieve_appointments_tool after the caller's write", "primary",
+          tool(lambda: assistant.retrieve_appointments_tool(None)), lambda reply: "Replica Check" in reply)
+    check("GET /v1/users/{phone} for another caller", "replica", lambda: user_name(OTHER_PHONE),
+          lambda name: name == "Replica Copy")
+    check("GET /v1/slots after the write", "replica", lambda: client.get("/v1/slots").raise_for_status())
+
+    time.sleep(db_client.REPLICA_STICKY_SECONDS + 0.5)
+    check("GET /v1/users/{phone} after the sticky window", "replica", lambda: user_name(PHONE),
+          lambda name: name == "Replica Copy")
+
+    health = client.get("/v1/health/db").json()
+    print(json.dumps({"health_replicas": health.get("replicas")}))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that reads go to the replica and stick to the primary after a write")
+    parser.add_argument("--sticky-seconds", type=int, default=2, help="REPLICA_STICKY_SECONDS for this run")
+    options = parser.parse_args()
+
+    replica_urls = [url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    if not os.getenv("DATABASE_URL") or len(replica_urls) != 1:
+        sys.exit("Set DATABASE_URL and exactly one DATABASE_REPLICA_URLS (a second database with the same schema)")
+    # Read by db_client at import
+    os.environ["REPLICA_STICKY_SECONDS"] = str(options.sticky_seconds)
+
+    from fastapi.testclient import TestClient
+    from database import db_client
+    from database.models import User, Slot, Appointment, SlotHold
+    from app import main
+    import agent_tools
+
+    db_client.DAILY_STATS_ENABLED = False
+    primary_engine = db_client.get_engine()
+    replica_engine = db_client.get_replicas()[0].engine
+    cleanup(primary_engine)
+    cleanup(replica_engine)
+    seed(primary_engine, "Primary Copy")
+    seed(replica_engine, "Replica Copy")
+    try:
+        status = run(options)
+    finally:
+        cleanup(primary_engine)
+        cleanup(replica_engine)
+    sys.exit(status)
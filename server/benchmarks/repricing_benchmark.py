@@ -0,0 +1,112 @@
+"""
+Re-pricing benchmark.
+
+Seeds synthetic call summaries into a scratch window (year 2001) of the database
+in DATABASE_URL, re-prices them with both engines from app/repricing.py under a
+two-version pricing table, checks that the engines write the same total and breakdown for every
+row (exits with status 1 if any differ) and removes the rows:
+
+    python benchmarks/repricing_benchmark.py --calls 200000 --chunk-size 20000
+
+Only rows inside the scratch window are touched.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert, delete, select, func
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_client import get_engine
+from repricing import reprice_numpy, reprice_sql, summaries
+
+WINDOW = (date(2001, 1, 1), date(2002, 1, 1))
+VERSIONS = [
+    (date(2001, 1, 1), {"deepgram_flux": 0.0077, "livekit_cloud": 0.0425, "beyond_presence": 0.35}),
+    (date(2001, 7, 1), {"deepgram_flux": 0.0065, "livekit_cloud": 0.04, "beyond_presence": 0.30}),
+]
+
+
+def seed(engine, calls: int):
+    rows = []
+    start = datetime(2001, 1, 1)
+    for _ in range(calls):
+        seconds = random.randint(20, 900)
+        rows.append({
+            "id": uuid.uuid4(),
+            "patient_phone": "5550000000",
+            "summary_text": "benchmark",
+            "call_duration_seconds": seconds,
+            "cost_breakdown": {"duration_seconds": seconds, "total_cost": 0.0},
+            "total_cost": 0,
+            "created_at": start + timedelta(seconds=random.randint(0, 364 * 86400)),
+        })
+    with engine.begin() as conn:
+        for i in range(0, len(rows), 10000):
+            conn.execute(insert(summaries), rows[i:i + 10000])
+
+
+def window_total(engine) -> float:
+    with engine.connect() as conn:
+        return float(conn.execute(
+            select(func.sum(summaries.c.total_cost)).where(summaries.c.created_at >= WINDOW[0],
+                                                             summaries.c.created_at < WINDOW[1])
+        ).scalar() or 0)
+
+
+# id -> (total_cost, cost_breakdown) for every row in the scratch window
+def window_rows(engine) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(summaries.c.id, summaries.c.total_cost, summaries.c.cost_breakdown)
+            .where(summaries.c.created_at >= WINDOW[0], summaries.c.created_at < WINDOW[1])
+        )
+        return {row.id: (row.total_cost, row.cost_breakdown) for row in rows}
+
+
+def reset(engine):
+    with engine.begin() as conn:
+        conn.execute(summaries.update().where(summaries.c.created_at >= WINDOW[0], summaries.c.created_at < WINDOW[1])
+                     .values(total_cost=0, cost_breakdown={"total_cost": 0.0}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch re-pricing of call summaries")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    options = parser.parse_args()
+
+    engine = get_engine()
+    start = time.perf_counter()
+    seed(engine, options.calls)
+    print(json.dumps({"seeded": options.calls, "seconds": round(time.perf_counter() - start, 2)}))
+
+    try:
+        print(json.dumps(reprice_numpy(options.chunk_size, *WINDOW, versions=VERSIONS, engine=engine)))
+        numpy_total = window_total(engine)
+        numpy_rows = window_rows(engine)
+        print(json.dumps(reprice_numpy(options.chunk_size, *WINDOW, versions=VERSIONS, engine=engine)))  # no-op rerun
+        if engine.dialect.name == "postgresql":
+            reset(engine)
+            print(json.dumps(reprice_sql(*WINDOW, versions=VERSIONS, engine=engine)))
+            sql_total = window_total(engine)
+            sql_rows = window_rows(engine)
+            mismatched = [row_id for row_id, values in numpy_rows.items() if sql_rows.get(row_id) != values]
+            print(json.dumps({"numpy_total": numpy_total, "sql_total": sql_total,
+                              "difference": round(abs(numpy_total - sql_total), 4),
+                              "mismatched_rows": len(mismatched)}))
+            if mismatched or numpy_total != sql_total:
+                print(json.dumps({"error": "engines disagree", "examples": [
+                    {"id": str(row_id), "numpy": numpy_rows[row_id], "sql": sql_rows.get(row_id)}
+                    for row_id in mismatched[:5]
+                ]}, default=str))
+                sys.exit(1)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(summaries).where(summaries.c.created_at >= WINDOW[0], summaries.c.created_at < WINDOW[1]))
@@ -0,0 +1,131 @@
+"""
+Slot hold simulation.
+
+Simulates concurrent callers competing for a small set of scratch slots in the
+database in DATABASE_URL. Each caller lists the available slots, picks one of the
+first few, spends --confirm-turns turns confirming their name and then books; a
+booking that fails sends the caller back to the slot list. Runs once without
+holds and once holding the slot as soon as it is picked (app/agent_tools.py):
+
+    python benchmarks/slot_hold_simulation.py --callers 40 --slots 12 --turn-ms 400
+
+The calls into database/db_client.py are real; the LLM/TTS turns are sleeps.
+Scratch slots (day_of_week "Sim") and callers (phones 000900xxxx) are removed
+at the end; the simulated bookings are not counted in daily_stats.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import time as clock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_client
+from database.models import Slot, SlotHold, Appointment, User
+
+DAY = "Sim"
+PHONE_PREFIX = "000900"
+
+
+def seed(slots: int):
+    with db_client.session_scope() as db:
+        for i in range(slots):
+            db.add(Slot(day_of_week=DAY, start_time=clock(i // 4, i % 4 * 15), end_time=clock(i // 4, i % 4 * 15 + 14)))
+        db.commit()
+
+
+def scratch_slot_ids(db) -> list:
+    return [slot_id for (slot_id,) in db.query(Slot.id).filter(Slot.day_of_week == DAY)]
+
+
+def reset(drop: bool = False):
+    with db_client.session_scope() as db:
+        slot_ids = scratch_slot_ids(db)
+        db.query(SlotHold).filter(SlotHold.slot_id.in_(slot_ids)).delete(synchronize_session=False)
+        db.query(Appointment).filter(Appointment.slot_id.in_(slot_ids)).delete(synchronize_session=False)
+        if drop:
+            db.query(Slot).filter(Slot.day_of_week == DAY).delete(synchronize_session=False)
+            db.query(User).filter(User.phone_number.like(f"{PHONE_PREFIX}%")).delete(synchronize_session=False)
+        else:
+            db.query(Slot).filter(Slot.day_of_week == DAY).update({"is_available": True}, synchronize_session=False)
+        db.commit()
+
+
+def turn(options):
+    time.sleep(random.uniform(0.5, 1.5) * options.turn_ms / 1000)
+
+
+# One caller -> turns spent until booked (or until no slot is left)
+def caller(index: int, use_holds: bool, options, stats: dict, lock: threading.Lock):
+    phone = f"{PHONE_PREFIX}{index:04d}"
+    name = f"Sim Caller {index}"
+    counts = {"turns": 0, "failed_booking_turns": 0, "failed_holds": 0, "booked": 0}
+    time.sleep(random.uniform(0, options.arrival_ms / 1000))
+
+    while counts["turns"] < options.max_turns:
+        # Agent lists the slots, the caller picks one of the first few offered
+        counts["turns"] += 1
+        offered = [s.id for s in db_client.get_available_slots(phone if use_holds else None) if s.day_of_week == DAY]
+        if not offered:
+            break
+        turn(options)
+        slot_id = str(random.choice(offered[:options.choices]))
+
+        if use_holds and not db_client.hold_slot(slot_id, phone):
+            counts["failed_holds"] += 1
+            continue
+
+        # Confirmation turns, then the booking turn
+        for _ in range(options.confirm_turns):
+            counts["turns"] += 1
+            turn(options)
+        counts["turns"] += 1
+        if db_client.book_appointment(slot_id, phone, name):
+            counts["booked"] = 1
+            break
+        counts["failed_booking_turns"] += 1
+
+    if use_holds:
+        db_client.release_holds(phone)
+    with lock:
+        for key, value in counts.items():
+            stats[key] = stats.get(key, 0) + value
+
+
+def simulate(use_holds: bool, options) -> dict:
+    reset()
+    stats, lock = {}, threading.Lock()
+    threads = [threading.Thread(target=caller, args=(i, use_holds, options, stats, lock)) for i in range(options.callers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    return {"holds": use_holds, "callers": options.callers, "slots": options.slots, **stats}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Failed booking turns with and without slot holds")
+    parser.add_argument("--callers", type=int, default=40)
+    parser.add_argument("--slots", type=int, default=12)
+    parser.add_argument("--choices", type=int, default=3, help="callers pick among the first N slots offered")
+    parser.add_argument("--confirm-turns", type=int, default=3, help="turns between picking a slot and booking it")
+    parser.add_argument("--turn-ms", type=float, default=400.0, help="mean duration of one LLM/TTS turn")
+    parser.add_argument("--arrival-ms", type=float, default=2000.0, help="callers arrive spread over this window")
+    parser.add_argument("--max-turns", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=7)
+    options = parser.parse_args()
+
+    db_client.DAILY_STATS_ENABLED = False
+    seed(options.slots)
+    try:
+        for use_holds in (False, True):
+            random.seed(options.seed)
+            print(json.dumps(simulate(use_holds, options)))
+    finally:
+        reset(drop=True)
@@ -0,0 +1,99 @@
+"""
+Agent worker startup benchmark.
+
+Measures how long it takes to import agent_orchestrator (the worker's path to
+registering) and agent_tools (the per-job prewarm), and which modules dominate
+import time. Results can be compared against a stored baseline so startup
+regressions fail loudly:
+
+    python benchmarks/startup_benchmark.py --runs 5 --update-baseline
+    python benchmarks/startup_benchmark.py --runs 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(SERVER_DIR, "app")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+TARGETS = {
+    "worker": "agent_orchestrator",
+    "prewarm": "agent_tools",
+}
+
+
+# Import a module in a fresh interpreter and return wall time plus -X importtime rows
+def run_import(module: str):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([APP_DIR, SERVER_DIR]))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall_ms, modules
+
+
+def benchmark(runs: int, top: int) -> dict:
+    report = {}
+    for label, module in TARGETS.items():
+        walls = []
+        last_modules = {}
+        for _ in range(runs):
+            wall_ms, last_modules = run_import(module)
+            walls.append(wall_ms)
+
+        # Top-level packages by cumulative import time (from the last run)
+        top_level = {name: cum for name, (_, cum) in last_modules.items() if "." not in name}
+        slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]
+        report[label] = {
+            "module": module,
+            "median_ms": round(statistics.median(walls), 1),
+            "min_ms": round(min(walls), 1),
+            "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark agent worker startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to report")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    options = parser.parse_args()
+
+    report = benchmark(options.runs, options.top)
+    print(json.dumps(report, indent=2))
+
+    if options.update_baseline:
+        with open(options.baseline, "w") as f:
+            json.dump({label: {"median_ms": r["median_ms"]} for label, r in report.items()}, f, indent=2)
+        print(f"Baseline written to {options.baseline}")
+    elif os.path.exists(options.baseline):
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{label}: {report[label]['median_ms']} ms vs baseline {base['median_ms']} ms"
+            for label, base in baseline.items()
+            if label in report and report[label]["median_ms"] > base["median_ms"] * (1 + options.tolerance)
+        ]
+        if regressions:
+            print("Startup regression:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
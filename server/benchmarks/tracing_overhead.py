@@ -0,0 +1,124 @@
+"""
+Tracing overhead benchmark.
+
+Times the hot read paths against the database in DATABASE_URL with tracing off, at a low
+sample rate and with every trace recorded (observability/tracing.py, in-memory exporter):
+
+    db:   db_client.get_available_slots() + get_user_appointments()
+    api:  GET /v1/slots/available + GET /v1/appointments/{phone}
+
+    python benchmarks/tracing_overhead.py --iterations 500 --low-rate 0.01
+
+Then prints one API request and one agent turn's tool calls as span trees, to check that
+API request -> db_client -> SQL and tool -> db_client -> SQL are linked parent to child.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from fastapi.testclient import TestClient
+from database import db_client
+from observability import tracing
+from database.models import User
+from app import main
+
+PHONE = "0009200000"
+
+
+def db_flow(client):
+    db_client.get_available_slots(PHONE)
+    db_client.get_user_appointments(PHONE)
+
+
+def api_flow(client):
+    client.get("/v1/slots/available", params={"phone": PHONE}).raise_for_status()
+    client.get(f"/v1/appointments/{PHONE}")  # 404 for the scratch caller, same queries
+
+
+def measure(flow, client, iterations: int) -> float:
+    for _ in range(20):
+        flow(client)  # warm-up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        flow(client)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def tree(spans: list) -> list:
+    children = {}
+    for span in spans:
+        children.setdefault(span.parent_id, []).append(span)
+    lines = []
+
+    def walk(span, depth):
+        lines.append("  " * depth + span.name)
+        for child in sorted(children.get(span.span_id, []), key=lambda s: s.start_ns):
+            walk(child, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+    return lines
+
+
+def linkage(client, exporter):
+    import agent_tools
+
+    tracing.configure(exporter, sample_rate=1.0)
+    exporter.clear()
+    client.get(f"/v1/appointments/{PHONE}")
+    tracing.flush()
+    print("\n".join(tree(list(exporter.spans))))
+
+    exporter.clear()
+    assistant = agent_tools.AppointmentAssistant()
+
+    async def call():
+        await assistant.identify_user(None, PHONE)
+        await assistant.retrieve_appointments_tool(None)
+    asyncio.run(call())
+    tracing.flush()
+    print("\n".join(tree(list(exporter.spans))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Request latency with tracing off, sampled and fully recorded")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--low-rate", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=3)
+    options = parser.parse_args()
+
+    logging.getLogger("httpx2").setLevel(logging.WARNING)
+    client = TestClient(main.app)
+    exporter = tracing.InMemoryExporter(maxlen=100000)
+    settings = [("off", None, None), (f"sampled {options.low_rate}", exporter, options.low_rate), ("all", exporter, 1.0)]
+    for flow in (db_flow, api_flow):
+        # Settings take turns over several rounds, best median wins (evens out machine noise)
+        best = {}
+        for _ in range(options.rounds):
+            for label, exp, rate in settings:
+                tracing.configure(exp, sample_rate=rate)
+                exporter.clear()
+                ms = measure(flow, client, options.iterations)
+                best[label] = min(best.get(label, ms), ms)
+        baseline = best["off"]
+        for label, ms in best.items():
+            print(json.dumps({"flow": flow.__name__, "tracing": label, "ms_p50": round(ms, 3),
+                              "overhead_pct": round((ms / baseline - 1) * 100, 2)}))
+
+    try:
+        linkage(client, exporter)
+    finally:
+        tracing.configure(None)
+        with db_client.session_scope() as db:
+            db.query(User).filter(User.phone_number == PHONE).delete(synchronize_session=False)
+            db.commit()
@@ -0,0 +1,141 @@
+"""
+Backfill of the daily_stats rollup.
+
+db_client keeps daily_stats current as calls are saved and appointments are booked, cancelled
+or modified. backfill rebuilds it from the raw rows for a range of days: after the table is
+first created, or to repair drift. costs only re-sums total_cost from call_summaries and leaves
+every other counter alone: app/repricing.py runs it for the window it re-priced.
+
+    python database/daily_stats.py backfill
+    python database/daily_stats.py backfill --since 2025-06-01 --until 2025-07-01
+    python database/daily_stats.py costs --since 2025-06-01 --until 2025-07-01
+
+The range's rows are replaced in one transaction. Appointments only keep their latest status,
+so a rebuilt day counts a booking on its booked_at, a cancellation on its updated_at, and one
+modification for an appointment whose status is still 'modified'. Calls in archived partitions
+(partitions.py archive) are gone from call_summaries, so backfill the retained months only.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date, datetime, timezone
+from sqlalchemy import select, insert, update, delete, union_all, literal, cast, func, Date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_client import get_engine, ALL_PATIENTS, DAILY_COUNTERS
+from database.models import CallSummary, Appointment, DailyStat
+
+summaries = CallSummary.__table__
+appointments = Appointment.__table__
+stats = DailyStat.__table__
+
+
+def _in_days(column, since: date = None, until: date = None) -> list:
+    conditions = []
+    if since:
+        conditions.append(column >= datetime.combine(since, datetime.min.time(), timezone.utc))
+    if until:
+        conditions.append(column < datetime.combine(until, datetime.min.time(), timezone.utc))
+    return conditions
+
+
+# UTC day of a timestamp, like db_client's incremental updates (a plain CAST AS DATE would follow the
+# session time zone); SQLite stores UTC already and has no date type
+def utc_day(column, dialect: str):
+    return func.date(column) if dialect == "sqlite" else cast(func.timezone("UTC", column), Date)
+
+
+# One row per raw event -> (day, phone, counters), same attribution as db_client's incremental updates
+def _event(at, phone, where: list, since: date, until: date, dialect: str, **counts):
+    columns = [utc_day(at, dialect).label("day"), phone.label("phone")]
+    columns += [counts.get(name, literal(0)).label(name) for name in DAILY_COUNTERS]
+    return select(*columns).where(*where, *_in_days(at, since, until))
+
+
+def _events(since: date, until: date, dialect: str):
+    return union_all(
+        _event(summaries.c.created_at, func.coalesce(summaries.c.patient_phone, ALL_PATIENTS), [], since, until, dialect,
+               calls=literal(1), call_seconds=func.coalesce(summaries.c.call_duration_seconds, 0),
+               total_cost=func.coalesce(summaries.c.total_cost, 0)),
+        _event(appointments.c.booked_at, appointments.c.patient_phone, [], since, until, dialect, booked=literal(1)),
+        _event(appointments.c.updated_at, appointments.c.patient_phone, [appointments.c.status == "cancelled"],
+               since, until, dialect, cancelled=literal(1)),
+        _event(appointments.c.updated_at, appointments.c.patient_phone, [appointments.c.status == "modified"],
+               since, until, dialect, modified=literal(1)),
+    ).subquery("events")
+
+
+# Rollup rows from the events -> per patient (phone None) or for all patients
+def _rollup(events, phone=None):
+    sums = [func.sum(events.c[name]) for name in DAILY_COUNTERS]
+    if phone is None:
+        return select(events.c.phone, events.c.day, *sums, func.now()).where(
+            events.c.phone != ALL_PATIENTS).group_by(events.c.phone, events.c.day)
+    return select(literal(phone), events.c.day, *sums, func.now()).group_by(events.c.day)
+
+
+"""
+Rebuild daily_stats for days in [since, until) (all days without bounds) from call_summaries
+and appointments. Returns a report with the number of rollup rows written.
+"""
+def backfill_daily_stats(since: date = None, until: date = None, engine=None) -> dict:
+    engine = engine or get_engine()
+    start = time.perf_counter()
+    columns = ["phone", "day", *DAILY_COUNTERS, "updated_at"]
+    with engine.begin() as conn:
+        days = []
+        if since:
+            days.append(stats.c.day >= since)
+        if until:
+            days.append(stats.c.day < until)
+        conn.execute(delete(stats).where(*days))
+        events = _events(since, until, engine.dialect.name)
+        written = conn.execute(insert(stats).from_select(columns, _rollup(events))).rowcount
+        written += conn.execute(insert(stats).from_select(columns, _rollup(events, ALL_PATIENTS))).rowcount
+    return {"rows": written, "since": since and since.isoformat(), "until": until and until.isoformat(),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+# Call costs per patient and day, plus per day for all patients, from call_summaries
+def _call_costs(since: date, until: date, dialect: str):
+    day = utc_day(summaries.c.created_at, dialect)
+    window = _in_days(summaries.c.created_at, since, until)
+    total = func.sum(func.coalesce(summaries.c.total_cost, 0)).label("total_cost")
+    return union_all(
+        select(summaries.c.patient_phone.label("phone"), day.label("day"), total)
+        .where(*window, summaries.c.patient_phone != ALL_PATIENTS).group_by(summaries.c.patient_phone, day),
+        select(literal(ALL_PATIENTS).label("phone"), day.label("day"), total).where(*window).group_by(day),
+    ).subquery("costs")
+
+
+"""
+Re-sum total_cost of the daily_stats rows for days in [since, until) from call_summaries, after
+a re-pricing run. Calls, bookings, cancellations and modifications are left as they are.
+Returns a report with the number of rollup rows updated.
+"""
+def refresh_daily_costs(since: date = None, until: date = None, engine=None) -> dict:
+    engine = engine or get_engine()
+    start = time.perf_counter()
+    costs = _call_costs(since, until, engine.dialect.name)
+    with engine.begin() as conn:
+        updated = conn.execute(
+            update(stats).where(stats.c.phone == costs.c.phone, stats.c.day == costs.c.day)
+            .values(total_cost=costs.c.total_cost, updated_at=func.now())
+        ).rowcount
+    return {"rows": updated, "since": since and since.isoformat(), "until": until and until.isoformat(),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily_stats rollup from calls and appointments")
+    parser.add_argument("command", choices=["backfill", "costs"])
+    parser.add_argument("--since", type=date.fromisoformat, help="first day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="rebuild days before this one (YYYY-MM-DD)")
+    options = parser.parse_args()
+
+    if options.command == "costs":
+        print(json.dumps(refresh_daily_costs(options.since, options.until)))
+    else:
+        print(json.dumps(backfill_daily_stats(options.since, options.until)))
@@ -1,124 +1,555 @@
 import os
+import re
+import time
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime
-from sqlalchemy import create_engine
+import threading
+import itertools
+from typing import Optional, List, Dict, Any, Iterator, Callable
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import create_engine, select, union_all, text, or_, func, case, literal
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, NullPool
 from dotenv import load_dotenv
-from .models import User, Slot, Appointment, CallSummary
+from .models import User, Slot, Appointment, CallSummary, IdempotencyKey, SlotHold, DailyStat
+from .cache import TTLCache
+from observability.tracing import traced, instrument_engine
 
 load_dotenv()
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if DATABASE_URL:
-    logger.info("DATABASE_URL found, initializing database connection...")
-    try:
+# Pool settings -> DB_POOL_MODE=null disables client side pooling (Supabase transaction pooler)
+POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+
+# Stored responses for retried booking/modification requests
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+_idempotency_cache = TTLCache(maxsize=2048, ttl=IDEMPOTENCY_TTL_SECONDS)
+
+# Process-wide cache of known callers -> returning callers are identified without a db hit
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "3600"))
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+# Read replicas -> comma separated URLs; read-only endpoints and tools use them, writes use the primary
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "5"))
+# After a caller's own write their reads stay on the primary for this long (per process)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "30"))
+_recent_writers = TTLCache(maxsize=10000, ttl=REPLICA_STICKY_SECONDS)
+
+# Slot holds -> a slot the caller picked is reserved while the agent confirms their details
+HOLD_TTL_SECONDS = int(os.getenv("SLOT_HOLD_TTL_SECONDS", "120"))
+HOLD_SWEEP_SECONDS = int(os.getenv("SLOT_HOLD_SWEEP_SECONDS", "60"))
+
+# Rows fetched per round-trip by the streaming exports
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# Patient search -> minimum word similarity for a fuzzy name match (pg_trgm and the in-memory fallback)
+SEARCH_SIMILARITY = float(os.getenv("SEARCH_SIMILARITY", "0.3"))
+# The in-memory search index (non-Postgres backends) is rebuilt after this long, or after a write
+SEARCH_INDEX_TTL_SECONDS = int(os.getenv("SEARCH_INDEX_TTL_SECONDS", "60"))
+
+# daily_stats rollup -> phone '' holds the totals for all patients
+ALL_PATIENTS = ""
+DAILY_COUNTERS = ("calls", "call_seconds", "total_cost", "booked", "cancelled", "modified")
+# Off (DAILY_STATS=0, or set by the script) for processes that write synthetic calls and bookings,
+# e.g. benchmarks and trace replays, so they stay out of the rollup
+DAILY_STATS_ENABLED = os.getenv("DAILY_STATS", "1") != "0"
+
+
+class _PoolTelemetry:
+    # Counters shared by the pool classes below
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_out = 0
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_checkout(self, wait: float):
+        with self.lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_checkin(self):
+        with self.lock:
+            self.checked_out -= 1
+
+
+_telemetry = _PoolTelemetry()
+
+
+class _TimedPoolMixin:
+    # Time how long each checkout waits for a connection (queue wait or new connect)
+    def _do_get(self):
+        start = time.perf_counter()
+        conn = super()._do_get()
+        _telemetry.record_checkout(time.perf_counter() - start)
+        return conn
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        _telemetry.record_checkin()
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+_engine = None
+_SessionLocal = None
+_engine_lock = threading.Lock()
+
+
+def _create_engine(url: str = None):
+    url = url or DATABASE_URL
+    if POOL_MODE == "null":
+        engine = create_engine(url, poolclass=TimedNullPool, pool_pre_ping=True)
+    else:
         engine = create_engine(
-            DATABASE_URL,
-            poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
             pool_pre_ping=True,
-            pool_recycle=300,  
+            pool_recycle=POOL_RECYCLE,
         )
-        SessionLocal = sessionmaker(bind=engine)
-        logger.info("Database engine created successfully")
-    except Exception as e:
-        logger.error(f"Failed to create database engine: {e}")
-        engine = None
-        SessionLocal = None
-else:
-    logger.warning("DATABASE_URL not found in environment variables!")
-    engine = None
-    SessionLocal = None
+    # One span per SQL statement when tracing is on (see observability/tracing.py)
+    instrument_engine(engine)
+    return engine
+
+
+# Create the engine on first use so processes that never touch the database don't pay for it
+def get_engine():
+    global _engine, _SessionLocal
+    if _engine is None:
+        if not DATABASE_URL:
+            raise ValueError("Database config not found. Please set DATABASE_URL environment variable.")
+        with _engine_lock:
+            if _engine is None:
+                engine = _create_engine()
+                _SessionLocal = sessionmaker(bind=engine)
+                _engine = engine
+                logger.info(f"Database engine created (pool mode: {POOL_MODE})")
+    return _engine
 
 def get_db() -> Session:
-    if SessionLocal is None:
-        raise ValueError("Database config not found. Please set DATABASE_URL environment variable.")
-    return SessionLocal()
+    get_engine()
+    return _SessionLocal()
+
+
+# Replica lag: 0 on a primary (or a caught-up replica), else seconds since the last replayed transaction
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class _Replica:
+    def __init__(self, url: str):
+        self.engine = _create_engine(url)
+        self.name = f"{self.engine.url.host or 'local'}/{self.engine.url.database}"
+        self.lag_seconds = None
+        self.healthy = False
+        self.error = None
+
+    # Lagging or unreachable replicas are skipped until the next check says otherwise
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                lag = float(conn.execute(REPLICA_LAG_SQL).scalar()) if self.engine.dialect.name == "postgresql" else 0.0
+            self.lag_seconds, self.error = round(lag, 3), None
+            self.healthy = lag <= REPLICA_MAX_LAG_SECONDS
+        except Exception as e:
+            self.healthy, self.error = False, str(e).splitlines()[0]
+        if not self.healthy:
+            logger.warning(f"Replica {self.name} skipped: {self.error or f'lag {self.lag_seconds}s'}")
+
+
+_replicas = None
+_replica_cycle = itertools.count()
+
+def _monitor_replicas():
+    while True:
+        time.sleep(REPLICA_LAG_CHECK_SECONDS)
+        for replica in _replicas:
+            replica.check()
+
+# Replica engines are created on first read, checked once, then re-checked by a background thread
+def get_replicas() -> list:
+    global _replicas
+    if _replicas is None:
+        with _engine_lock:
+            if _replicas is None:
+                replicas = [_Replica(url) for url in REPLICA_URLS]
+                for replica in replicas:
+                    replica.check()
+                _replicas = replicas
+                if replicas:
+                    threading.Thread(target=_monitor_replicas, name="replica-lag-monitor", daemon=True).start()
+                    logger.info(f"Read replicas: {', '.join(r.name for r in replicas)}")
+    return _replicas
+
+# Record a caller's write -> their next reads go to the primary and see it
+def mark_write(phone: str):
+    if phone and REPLICA_URLS:
+        _recent_writers.set(normalize_phone(phone), True)
+
+# Engine for a read: a healthy replica (round robin), or the primary if there is none
+# or the caller wrote recently
+def _read_engine(phone: str = None):
+    if not REPLICA_URLS or (phone and _recent_writers.get(normalize_phone(phone))):
+        return get_engine()
+    healthy = [r for r in get_replicas() if r.healthy]
+    if not healthy:
+        return get_engine()
+    return healthy[next(_replica_cycle) % len(healthy)].engine
+
+
+@contextmanager
+def _scope(engine) -> Iterator[Session]:
+    get_engine()
+    with engine.connect() as connection:
+        db = _SessionLocal(bind=connection)
+        try:
+            yield db
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Unit of work -> one session and one connection checkout for a whole request or tool call
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    with _scope(get_engine()) as db:
+        yield db
+
+# Read-only unit of work -> routed to a replica when configured (see _read_engine)
+@contextmanager
+def read_session_scope(phone: str = None) -> Iterator[Session]:
+    with _scope(_read_engine(phone)) as db:
+        yield db
+
+# FastAPI dependency -> Depends(get_session)
+def get_session() -> Iterator[Session]:
+    with session_scope() as db:
+        yield db
+
+# FastAPI dependency for GET endpoints -> Depends(get_read_session)
+def get_read_session() -> Iterator[Session]:
+    with read_session_scope() as db:
+        yield db
+
+# FastAPI dependency for GET endpoints with a {phone} path -> sticky to the primary after that caller writes
+def get_caller_read_session(phone: str) -> Iterator[Session]:
+    with read_session_scope(phone) as db:
+        yield db
+
+# Use the caller's session if given, otherwise open one just for this call
+@contextmanager
+def _session(db: Optional[Session] = None) -> Iterator[Session]:
+    if db is not None:
+        yield db
+        return
+    with session_scope() as own_db:
+        yield own_db
+
+# Live pool statistics -> for monitoring
+def get_pool_stats() -> Dict[str, Any]:
+    with _telemetry.lock:
+        stats = {
+            "initialized": _engine is not None,
+            "mode": POOL_MODE,
+            "checked_out": _telemetry.checked_out,
+            "checkouts": _telemetry.checkouts,
+            "avg_wait_ms": round(_telemetry.total_wait / _telemetry.checkouts * 1000, 3) if _telemetry.checkouts else 0.0,
+            "max_wait_ms": round(_telemetry.max_wait * 1000, 3),
+        }
+    if _engine is not None and isinstance(_engine.pool, QueuePool):
+        stats.update({
+            "pool_size": _engine.pool.size(),
+            "checked_in": _engine.pool.checkedin(),
+            "overflow": max(_engine.pool.overflow(), 0),
+            "max_overflow": MAX_OVERFLOW,
+        })
+    if _replicas:
+        stats["replicas"] = [
+            {"name": r.name, "healthy": r.healthy, "lag_seconds": r.lag_seconds, "error": r.error}
+            for r in _replicas
+        ]
+    return stats
+
+# Strip formatting from phone numbers ("(555) 123-4567" -> "5551234567")
+def normalize_phone(phone: str) -> str:
+    return re.sub(r"[^\d+]", "", phone) if phone else phone
+
+# Cache a detached copy so it stays readable after the session closes
+def _cache_user(user: User) -> User:
+    cached = User(phone_number=user.phone_number, name=user.name, created_at=user.created_at)
+    _user_cache.set(cached.phone_number, cached)
+    return cached
 
 # CRUD -> reading a user -> for admin
-def get_user_by_phone(phone: str) -> Optional[User]:
-    db = get_db()
-    try:
-        return db.query(User).filter(User.phone_number == phone).first()
-    finally:
-        db.close()
+@traced("db.get_user_by_phone", capture=("phone",))
+def get_user_by_phone(phone: str, db: Session = None) -> Optional[User]:
+    phone = normalize_phone(phone)
+    cached = _user_cache.get(phone)
+    if cached is not None:
+        return cached
+    with _session(db) as db:
+        user = db.query(User).filter(User.phone_number == phone).first()
+        return _cache_user(user) if user else None
+
+# Insert the user if missing and return the stored row in one round-trip (Postgres); never commits,
+# that is left to the caller
+def _upsert_user(db: Session, phone: str, name: str) -> Optional[User]:
+    users = User.__table__
+    inserted = (
+        postgresql.insert(users)
+        .values(phone_number=phone, name=name, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=[users.c.phone_number])
+        .returning(users.c.phone_number, users.c.name, users.c.created_at)
+        .cte("inserted")
+    )
+    existing = select(users.c.phone_number, users.c.name, users.c.created_at).where(users.c.phone_number == phone)
+    row = db.execute(union_all(select(inserted), existing).limit(1)).first()
+    return User(phone_number=row.phone_number, name=row.name, created_at=row.created_at) if row else None
+
+# Run a caller's hook on the flushed result just before a write commits (e.g. to store the
+# idempotent response in the same transaction); refreshed so it matches what is returned after commit
+def _before_commit(db: Session, hook: Optional[Callable], result):
+    if hook is not None:
+        db.flush()
+        db.refresh(result)
+        hook(result)
+
+# Insert the user if missing, without committing (part of the caller's transaction)
+def _insert_user(db: Session, phone: str, name: str):
+    if db.get_bind().dialect.name == "postgresql":
+        users = User.__table__
+        db.execute(
+            postgresql.insert(users)
+            .values(phone_number=phone, name=name or "Unknown", created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[users.c.phone_number])
+        )
+    elif db.get(User, phone) is None:
+        db.add(User(phone_number=phone, name=name or "Unknown"))
+        db.flush()
 
 # CRUD -> creating a new user or getting an existing user
-def get_or_create_user(phone: str, name: str = None) -> User:
-    user = get_user_by_phone(phone)
-    if not user:
-        db = get_db()
-        try:
+@traced("db.get_or_create_user", capture=("phone",))
+def get_or_create_user(phone: str, name: str = None, db: Session = None) -> User:
+    phone = normalize_phone(phone)
+    cached = _user_cache.get(phone)
+    if cached is not None:
+        return cached
+    with _session(db) as db:
+        user = None
+        if db.get_bind().dialect.name == "postgresql":
+            user = _upsert_user(db, phone, name or "Unknown")
+            db.commit()
+            _patient_index.invalidate()
+        if not user:
+            # Other backends, or a concurrent insert not yet visible to the upsert's snapshot
+            user = db.query(User).filter(User.phone_number == phone).first()
+        if not user:
             user = User(phone_number=phone, name=name or "Unknown")
             db.add(user)
             db.commit()
+            _patient_index.invalidate()
             db.refresh(user)
-        finally:
-            db.close()
-    return user
+        return _cache_user(user)
+
+# Hold expiry uses aware UTC timestamps -> correct whatever the session time zone
+def _hold_clock() -> datetime:
+    return datetime.now(timezone.utc)
 
 # CRUD -> reading available slots -> for user
-def get_available_slots() -> List[Slot]:
-    db = get_db()
-    try:
-        return db.query(Slot).filter(Slot.is_available == True).all()
-    finally:
-        db.close()
+@traced("db.get_available_slots", capture=("phone",))
+def get_available_slots(phone: str = None, db: Session = None) -> List[Slot]:
+    with _session(db) as db:
+        # Slots on hold for another caller are not offered (the caller's own hold still is)
+        held = select(SlotHold.slot_id).where(SlotHold.expires_at > _hold_clock())
+        if phone:
+            held = held.where(SlotHold.phone != normalize_phone(phone))
+        return db.query(Slot).filter(Slot.is_available == True, Slot.id.not_in(held)).all()
+
+# Lock an available slot for the rest of the transaction (no-op lock on SQLite)
+def _lock_available_slot(db: Session, slot_id: str) -> Optional[Slot]:
+    return db.query(Slot).filter(Slot.id == slot_id, Slot.is_available == True).with_for_update().first()
+
+def _held_by_other(db: Session, slot_id: str, phone: str) -> bool:
+    return db.query(SlotHold.slot_id).filter(
+        SlotHold.slot_id == slot_id, SlotHold.expires_at > _hold_clock(), SlotHold.phone != phone
+    ).first() is not None
+
+"""
+Slot holds -> hold an available slot for a caller for ttl seconds.
+Returns False if the slot is booked or another caller holds it. Holding a slot again extends
+the hold; holding a new one releases the caller's other holds.
+"""
+@traced("db.hold_slot", capture=("slot_id", "phone"))
+def hold_slot(slot_id: str, phone: str, ttl: int = None, db: Session = None) -> bool:
+    phone = normalize_phone(phone)
+    now = _hold_clock()
+    expires_at = now + timedelta(seconds=ttl or HOLD_TTL_SECONDS)
+    _start_hold_sweeper()
+    with _session(db) as db:
+        if not _lock_available_slot(db, slot_id):
+            db.rollback()
+            return False
+        db.query(SlotHold).filter(SlotHold.phone == phone, SlotHold.slot_id != slot_id).delete(synchronize_session=False)
+
+        if db.get_bind().dialect.name == "postgresql":
+            holds = SlotHold.__table__
+            stmt = postgresql.insert(holds).values(slot_id=slot_id, phone=phone, expires_at=expires_at, created_at=now)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[holds.c.slot_id],
+                set_={"phone": stmt.excluded.phone, "expires_at": stmt.excluded.expires_at},
+                # Only take over an expired hold, or extend our own
+                where=or_(holds.c.expires_at <= now, holds.c.phone == stmt.excluded.phone),
+            ).returning(holds.c.phone)
+            held = db.execute(stmt).first() is not None
+        else:
+            held = not _held_by_other(db, slot_id, phone)
+            if held:
+                db.merge(SlotHold(slot_id=slot_id, phone=phone, expires_at=expires_at, created_at=now))
+        if held:
+            db.commit()
+        else:
+            db.rollback()
+        return held
+
+# Slot holds -> release a caller's holds (call ended without booking)
+@traced("db.release_holds", capture=("phone",))
+def release_holds(phone: str, db: Session = None) -> int:
+    with _session(db) as db:
+        released = db.query(SlotHold).filter(SlotHold.phone == normalize_phone(phone)).delete(synchronize_session=False)
+        db.commit()
+        return released
+
+# Slot holds -> delete expired holds (expired holds are already ignored; this keeps the table small)
+@traced("db.sweep_expired_holds")
+def sweep_expired_holds(db: Session = None) -> int:
+    with _session(db) as db:
+        swept = db.query(SlotHold).filter(SlotHold.expires_at <= _hold_clock()).delete(synchronize_session=False)
+        db.commit()
+        return swept
+
+_hold_sweeper = None
+
+def _sweep_holds_forever():
+    while True:
+        time.sleep(HOLD_SWEEP_SECONDS)
+        try:
+            swept = sweep_expired_holds()
+            if swept:
+                logger.info(f"Swept {swept} expired slot holds")
+        except Exception as e:
+            logger.warning(f"Slot hold sweep failed: {e}")
+
+# Background sweeper -> started by the first hold in this process
+def _start_hold_sweeper():
+    global _hold_sweeper
+    if _hold_sweeper is None:
+        with _engine_lock:
+            if _hold_sweeper is None:
+                _hold_sweeper = threading.Thread(target=_sweep_holds_forever, name="slot-hold-sweeper", daemon=True)
+                _hold_sweeper.start()
 
 # CRUD -> reading a slot -> for admin
-def get_slot_by_id(slot_id: str) -> Optional[Slot]:
-    db = get_db()
-    try:
+def get_slot_by_id(slot_id: str, db: Session = None) -> Optional[Slot]:
+    with _session(db) as db:
         return db.query(Slot).filter(Slot.id == slot_id).first()
-    finally:
-        db.close()
 
 
 # CRUD -> updating a slot -> avoid duplicate booking
-def mark_slot_unavailable(slot_id: str) -> bool:
-    db = get_db()
-    try:
+def mark_slot_unavailable(slot_id: str, db: Session = None) -> bool:
+    with _session(db) as db:
         slot = db.query(Slot).filter(Slot.id == slot_id).first()
         if slot:
             slot.is_available = False
             db.commit()
             return True
         return False
-    finally:
-        db.close()
 
 # CRUD -> updating a slot or setting 
-def mark_slot_available(slot_id: str) -> bool:
-    db = get_db()
-    try:
+def mark_slot_available(slot_id: str, db: Session = None) -> bool:
+    with _session(db) as db:
         slot = db.query(Slot).filter(Slot.id == slot_id).first()
         if slot:
             slot.is_available = True
             db.commit()
             return True
         return False
-    finally:
-        db.close()
+
+# Daily rollup -> add an event's counts to the day's all-patients row and the patient's own row, in
+# the caller's transaction (so the rollup commits or rolls back with the write it counts)
+def _bump_daily_stats(db: Session, day: date, phone: Optional[str], **deltas):
+    if not DAILY_STATS_ENABLED:
+        return
+    phones = [ALL_PATIENTS] + ([phone] if phone else [])
+    counts = {name: deltas.get(name, 0) for name in DAILY_COUNTERS}
+    if db.get_bind().dialect.name == "postgresql":
+        stats = DailyStat.__table__
+        stmt = postgresql.insert(stats).values([
+            {"phone": p, "day": day, **counts, "updated_at": datetime.utcnow()} for p in phones
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[stats.c.phone, stats.c.day],
+            set_={**{name: stats.c[name] + stmt.excluded[name] for name in DAILY_COUNTERS},
+                  "updated_at": stmt.excluded.updated_at},
+        )
+        db.execute(stmt)
+        return
+    # Other backends (local SQLite) -> read and update the rows
+    for p in phones:
+        row = db.get(DailyStat, (p, day))
+        if row is None:
+            row = DailyStat(phone=p, day=day, **{name: 0 for name in DAILY_COUNTERS})
+            db.add(row)
+        for name, value in counts.items():
+            if name == "total_cost":
+                value = Decimal(str(value))
+            setattr(row, name, getattr(row, name) + value)
 
 # CRUD -> creating an appointment
-def book_appointment(slot_id: str, user_phone: str, patient_name: str, notes: str = None) -> Optional[Appointment]:
-    db = get_db()
-    try:
-        # Check if slot is available
-        slot = db.query(Slot).filter(Slot.id == slot_id, Slot.is_available == True).first()
-        if not slot:
+@traced("db.book_appointment", capture=("slot_id", "user_phone"))
+def book_appointment(slot_id: str, user_phone: str, patient_name: str, notes: str = None, db: Session = None,
+                     before_commit: Callable[[Appointment], None] = None) -> Optional[Appointment]:
+    user_phone = normalize_phone(user_phone)
+    with _session(db) as db:
+        # Check if slot is available and not held by another caller; the lock makes the
+        # check, the booking and the release of the caller's hold one atomic step
+        slot = _lock_available_slot(db, slot_id)
+        if not slot or _held_by_other(db, slot_id, user_phone):
+            db.rollback()
             return None
         
-        # Get or create user
-        user = get_or_create_user(user_phone, patient_name)
+        # Create the user in the same transaction (an unavailable slot leaves no user behind)
+        if _user_cache.get(user_phone) is None:
+            _insert_user(db, user_phone, patient_name)
         
         # Create appointment
         appointment = Appointment(
@@ -131,46 +562,49 @@ def book_appointment(slot_id: str, user_phone: str, patient_name: str, notes: st
         )
         db.add(appointment)
         
-        # Mark slot as unavailable
+        # Mark slot as unavailable and convert the hold
         slot.is_available = False
+        db.query(SlotHold).filter(SlotHold.slot_id == slot_id).delete(synchronize_session=False)
+        _bump_daily_stats(db, datetime.utcnow().date(), user_phone, booked=1)
+        _before_commit(db, before_commit, appointment)
         
         db.commit()
+        mark_write(user_phone)
+        _patient_index.invalidate()  # new patient name and appointment count
         db.refresh(appointment)
         return appointment
-    finally:
-        db.close()
 
 # CRUD -> reading appointments -> for a user
-def get_user_appointments(phone: str, include_cancelled: bool = False) -> List[Appointment]:
-    db = get_db()
-    try:
+@traced("db.get_user_appointments", capture=("phone",))
+def get_user_appointments(phone: str, include_cancelled: bool = False, db: Session = None) -> List[Appointment]:
+    phone = normalize_phone(phone)
+    with _session(db) as db:
         query = db.query(Appointment).filter(Appointment.patient_phone == phone)
         if not include_cancelled:
             query = query.filter(Appointment.status != 'cancelled')
         return query.all()
-    finally:
-        db.close()
 
 # CRUD -> reading appointments -> for admin
-def get_all_appointments(include_cancelled: bool = False) -> List[Appointment]:
-    db = get_db()
-    try:
+@traced("db.get_all_appointments")
+def get_all_appointments(include_cancelled: bool = False, db: Session = None) -> List[Appointment]:
+    with _session(db) as db:
         query = db.query(Appointment)
         if not include_cancelled:
             query = query.filter(Appointment.status != 'cancelled')
         return query.all()
-    finally:
-        db.close()
 
 # CRUD -> updating an appointment -> cancel
-def cancel_appointment(appointment_id: str) -> bool:
-    db = get_db()
-    try:
+@traced("db.cancel_appointment", capture=("appointment_id",))
+def cancel_appointment(appointment_id: str, db: Session = None,
+                       before_commit: Callable[[Appointment], None] = None) -> bool:
+    with _session(db) as db:
         appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
         if not appointment:
             return False
         
-        # Update appointment status
+        # Update appointment status (counted once, however often it is cancelled)
+        if appointment.status != 'cancelled':
+            _bump_daily_stats(db, datetime.utcnow().date(), appointment.patient_phone, cancelled=1)
         appointment.status = 'cancelled'
         appointment.updated_at = datetime.utcnow()
         
@@ -178,24 +612,26 @@ def cancel_appointment(appointment_id: str) -> bool:
         slot = db.query(Slot).filter(Slot.id == appointment.slot_id).first()
         if slot:
             slot.is_available = True
+        _before_commit(db, before_commit, appointment)
         
         db.commit()
+        mark_write(appointment.patient_phone)
         return True
-    finally:
-        db.close()
 
 # CRUD -> updating an appointment -> modify
-def modify_appointment(appointment_id: str, new_slot_id: str) -> Optional[Appointment]:
-    db = get_db()
-    try:
+@traced("db.modify_appointment", capture=("appointment_id", "new_slot_id"))
+def modify_appointment(appointment_id: str, new_slot_id: str, db: Session = None,
+                       before_commit: Callable[[Appointment], None] = None) -> Optional[Appointment]:
+    with _session(db) as db:
         # Get appointment
         appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
         if not appointment:
             return None
         
-        # Check if new slot is available
-        new_slot = db.query(Slot).filter(Slot.id == new_slot_id, Slot.is_available == True).first()
-        if not new_slot:
+        # Check if new slot is available and not held by another caller
+        new_slot = _lock_available_slot(db, new_slot_id)
+        if not new_slot or _held_by_other(db, new_slot_id, appointment.patient_phone):
+            db.rollback()
             return None
         
         # Free up old slot
@@ -208,39 +644,401 @@ def modify_appointment(appointment_id: str, new_slot_id: str) -> Optional[Appoin
         appointment.status = 'modified'
         appointment.updated_at = datetime.utcnow()
         
-        # Mark new slot as unavailable
+        # Mark new slot as unavailable and convert the hold
         new_slot.is_available = False
+        db.query(SlotHold).filter(SlotHold.slot_id == new_slot_id).delete(synchronize_session=False)
+        _bump_daily_stats(db, appointment.updated_at.date(), appointment.patient_phone, modified=1)
+        _before_commit(db, before_commit, appointment)
         
         db.commit()
+        mark_write(appointment.patient_phone)
         db.refresh(appointment)
         return appointment
-    finally:
-        db.close()
 
 # CRUD -> saving a call summary -> for admin
-def save_call_summary(summary_data: Dict[str, Any]) -> CallSummary:
-    db = get_db()
-    try:
+@traced("db.save_call_summary")
+def save_call_summary(summary_data: Dict[str, Any], db: Session = None) -> CallSummary:
+    with _session(db) as db:
         summary = CallSummary(**summary_data)
         db.add(summary)
+        db.flush()
+        _bump_daily_stats(db, summary.created_at.date(), summary.patient_phone, calls=1,
+                          call_seconds=summary.call_duration_seconds or 0, total_cost=summary.total_cost or 0)
         db.commit()
+        mark_write(summary.patient_phone)
         db.refresh(summary)
         return summary
-    finally:
-        db.close()
+
+# call_summaries is partitioned by month on created_at -> a created_at range only scans those months
+def _summaries_in_range(query, since: datetime = None, until: datetime = None):
+    if since:
+        query = query.filter(CallSummary.created_at >= since)
+    if until:
+        query = query.filter(CallSummary.created_at < until)
+    return query.order_by(CallSummary.created_at.desc())
 
 # CRUD -> reading call summaries -> for a user
-def get_call_summaries_by_phone(phone: str) -> List[CallSummary]:
-    db = get_db()
-    try:
-        return db.query(CallSummary).filter(CallSummary.patient_phone == phone).all()
-    finally:
-        db.close()
+@traced("db.get_call_summaries_by_phone", capture=("phone",))
+def get_call_summaries_by_phone(phone: str, since: datetime = None, until: datetime = None,
+                                db: Session = None) -> List[CallSummary]:
+    phone = normalize_phone(phone)
+    with _session(db) as db:
+        query = db.query(CallSummary).filter(CallSummary.patient_phone == phone)
+        return _summaries_in_range(query, since, until).all()
+
+"""
+Patient overview -> user, active appointments with their slots, the most recent call summaries
+and billing totals for one phone. Three queries on one connection, no lazy loads.
+"""
+@traced("db.get_patient_overview", capture=("phone",))
+def get_patient_overview(phone: str, summary_limit: int = 5, db: Session = None) -> Dict[str, Any]:
+    phone = normalize_phone(phone)
+    users, summaries = User.__table__, CallSummary.__table__
+    with _session(db) as db:
+        # Billing totals and the user in one row (LEFT JOIN, so totals come back without a user too)
+        totals = select(
+            func.count().label("total_calls"),
+            func.coalesce(func.sum(summaries.c.total_cost), 0).label("total_cost"),
+            func.coalesce(func.sum(summaries.c.call_duration_seconds), 0).label("total_duration_seconds"),
+        ).where(summaries.c.patient_phone == phone).subquery("totals")
+        row = db.execute(
+            select(totals, users.c.phone_number, users.c.name, users.c.created_at)
+            .select_from(totals.outerjoin(users, users.c.phone_number == phone))
+        ).one()
+
+        appointments = db.execute(
+            select(Appointment, Slot).outerjoin(Slot, Appointment.slot_id == Slot.id)
+            .where(Appointment.patient_phone == phone, Appointment.status != 'cancelled')
+            .order_by(Appointment.booked_at)
+        ).all()
+        recent = db.query(CallSummary).filter(CallSummary.patient_phone == phone).order_by(
+            CallSummary.created_at.desc()
+        ).limit(summary_limit).all()
+
+    return {
+        "user": User(phone_number=row.phone_number, name=row.name, created_at=row.created_at) if row.phone_number else None,
+        "appointments": [(appointment, slot) for appointment, slot in appointments],
+        "summaries": recent,
+        "billing": {
+            "total_calls": row.total_calls,
+            "total_cost": round(float(row.total_cost), 4),
+            "total_duration_seconds": int(row.total_duration_seconds),
+        },
+    }
 
 # CRUD -> reading all call summaries -> for admin billing
-def get_all_summaries() -> List[CallSummary]:
-    db = get_db()
-    try:
-        return db.query(CallSummary).all()
-    finally:
-        db.close()
+@traced("db.get_all_summaries")
+def get_all_summaries(since: datetime = None, until: datetime = None, db: Session = None) -> List[CallSummary]:
+    with _session(db) as db:
+        return _summaries_in_range(db.query(CallSummary), since, until).all()
+
+# Daily rollup -> one row per day in [since, until), for one patient or (phone None) all patients
+@traced("db.get_daily_stats", capture=("phone",))
+def get_daily_stats(since: date = None, until: date = None, phone: str = None, db: Session = None) -> List[DailyStat]:
+    with _session(db) as db:
+        query = db.query(DailyStat).filter(DailyStat.phone == (normalize_phone(phone) if phone else ALL_PATIENTS))
+        if since:
+            query = query.filter(DailyStat.day >= since)
+        if until:
+            query = query.filter(DailyStat.day < until)
+        return query.order_by(DailyStat.day).all()
+
+# Streaming export -> yields batches of plain rows from a server-side cursor, so memory stays flat.
+# Opens its own session (on a replica if configured): the caller (a StreamingResponse) outlives
+# the request's dependencies.
+def _stream_rows(stmt, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    with read_session_scope() as db:
+        result = db.execute(stmt.execution_options(yield_per=chunk_size))
+        for rows in result.mappings().partitions():
+            yield rows
+
+# Export -> call summaries, optionally for one phone and a created_at range [since, until)
+def stream_call_summaries(since: datetime = None, until: datetime = None, phone: str = None,
+                          chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    table = CallSummary.__table__
+    stmt = select(
+        table.c.id, table.c.patient_phone, table.c.call_duration_seconds, table.c.total_cost,
+        table.c.cost_breakdown, table.c.summary_text, table.c.created_at,
+    ).order_by(table.c.created_at)
+    if since:
+        stmt = stmt.where(table.c.created_at >= since)
+    if until:
+        stmt = stmt.where(table.c.created_at < until)
+    if phone:
+        stmt = stmt.where(table.c.patient_phone == normalize_phone(phone))
+    return _stream_rows(stmt, chunk_size)
+
+# Export -> appointments with their slot, optionally by status and a booked_at range [since, until)
+def stream_appointments(since: datetime = None, until: datetime = None, status: str = None,
+                        chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    appointments, slots = Appointment.__table__, Slot.__table__
+    stmt = select(
+        appointments.c.id, appointments.c.patient_name, appointments.c.patient_phone, appointments.c.status,
+        appointments.c.slot_id, slots.c.day_of_week, slots.c.start_time, slots.c.end_time,
+        appointments.c.notes, appointments.c.booked_at, appointments.c.updated_at,
+    ).select_from(appointments.outerjoin(slots, appointments.c.slot_id == slots.c.id)).order_by(appointments.c.booked_at)
+    if since:
+        stmt = stmt.where(appointments.c.booked_at >= since)
+    if until:
+        stmt = stmt.where(appointments.c.booked_at < until)
+    if status:
+        stmt = stmt.where(appointments.c.status == status)
+    return _stream_rows(stmt, chunk_size)
+
+# Patient search -> split a query into a lowercased name part and a phone digits part (3+ digits)
+def _search_terms(query: str) -> tuple:
+    query = " ".join(query.lower().split())
+    digits = re.sub(r"\D", "", query)
+    name = " ".join(re.sub(r"[\d+()\-.]", " ", query).split())
+    return name or None, digits if len(digits) >= 3 else None
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+_search_modes = {}
+
+# Search backend of a database -> "trigram" (pg_trgm installed), "prefix" (Postgres without it) or "memory"
+def _search_mode(db: Session) -> str:
+    bind = db.get_bind()
+    key = str(bind.engine.url)
+    if key not in _search_modes:
+        if bind.dialect.name != "postgresql":
+            _search_modes[key] = "memory"
+        else:
+            trgm = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+            _search_modes[key] = "trigram" if trgm else "prefix"
+    return _search_modes[key]
+
+"""
+Patient search -> match condition and score for one (name, phone) column pair.
+Scores: exact name 3, name prefix 2, word prefix 1.5, otherwise the trigram word similarity;
+phone prefix adds 3, phone substring 1. Prefix mode only matches what a btree prefix index can serve.
+"""
+def _search_match(name_col, phone_col, name: str, digits: str, trigram: bool) -> tuple:
+    conditions, scores = [], []
+    if name:
+        lowered = func.lower(name_col)
+        escaped = _like_escape(name)
+        if trigram:
+            conditions += [name_col.ilike(f"%{escaped}%", escape="\\"), literal(name).op("<%")(name_col)]
+            fuzzy = func.word_similarity(name, name_col)
+        else:
+            conditions.append(lowered.like(f"{escaped}%", escape="\\"))
+            fuzzy = literal(0.0)
+        scores.append(case(
+            (lowered == name, 3.0),
+            (lowered.like(f"{escaped}%", escape="\\"), 2.0),
+            (lowered.like(f"% {escaped}%", escape="\\"), 1.5),
+            else_=fuzzy,
+        ))
+    if digits:
+        conditions.append(phone_col.like(f"%{digits}%" if trigram else f"{digits}%"))
+        scores.append(case((phone_col.like(f"{digits}%"), 3.0), else_=1.0))
+    return or_(*conditions), sum(scores[1:], scores[0])
+
+# Postgres search -> matching rows ranked and grouped per phone, paginated, with appointment counts
+def _search_sql(db: Session, name: str, digits: str, limit: int, offset: int, trigram: bool) -> tuple:
+    appointments, users = Appointment.__table__, User.__table__
+    if trigram:
+        db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"), {"t": str(SEARCH_SIMILARITY)})
+
+    appt_match, appt_score = _search_match(appointments.c.patient_name, appointments.c.patient_phone, name, digits, trigram)
+    user_match, user_score = _search_match(users.c.name, users.c.phone_number, name, digits, trigram)
+    matches = union_all(
+        select(appointments.c.patient_phone.label("phone"), appointments.c.patient_name.label("name"),
+               appointments.c.booked_at.label("seen_at"), appt_score.label("score")).where(appt_match),
+        select(users.c.phone_number, users.c.name, users.c.created_at, user_score).where(user_match),
+    ).cte("matches")
+
+    # Best scoring (then most recent) name seen for each phone
+    best_name = postgresql.array_agg(postgresql.aggregate_order_by(
+        matches.c.name, matches.c.name.is_(None), matches.c.score.desc(), matches.c.seen_at.desc().nulls_last()
+    ))[1]
+    patients = select(
+        matches.c.phone, func.max(matches.c.score).label("score"), best_name.label("name")
+    ).group_by(matches.c.phone).subquery("patients")
+    page = select(patients, func.count().over().label("total")).order_by(
+        patients.c.score.desc(), patients.c.phone
+    ).limit(limit).offset(offset).subquery("page")
+    stmt = select(
+        page.c.phone, page.c.name, page.c.score, page.c.total,
+        func.count(appointments.c.id).label("appointments"),
+        func.max(appointments.c.booked_at).label("last_booked_at"),
+    ).select_from(page.outerjoin(appointments, appointments.c.patient_phone == page.c.phone)).group_by(
+        page.c.phone, page.c.name, page.c.score, page.c.total
+    ).order_by(page.c.score.desc(), page.c.phone)
+
+    rows = db.execute(stmt).all()
+    if rows:
+        total = rows[0].total
+    elif offset:
+        total = db.execute(select(func.count()).select_from(patients)).scalar()
+    else:
+        total = 0
+    return total, [{
+        "phone": row.phone, "name": row.name, "score": round(float(row.score), 3),
+        "appointments": row.appointments, "last_booked_at": row.last_booked_at,
+    } for row in rows]
+
+
+def _trigrams(word: str) -> frozenset:
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class _PatientIndex:
+    # In-memory search fallback for non-Postgres backends -> every (phone, name) pair, scanned per query;
+    # writes that add or rename patients call invalidate() so the next search rebuilds it
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.entries = []  # (phone, name, lowered name, trigrams per word, seen_at)
+        self.stats = {}    # phone -> (appointments, last booked_at)
+
+    def invalidate(self):
+        self.built_at = None
+
+    def _build(self, db: Session):
+        appointments, users = Appointment.__table__, User.__table__
+        rows = db.execute(union_all(
+            select(appointments.c.patient_phone, appointments.c.patient_name, appointments.c.booked_at),
+            select(users.c.phone_number, users.c.name, users.c.created_at),
+        )).all()
+        self.entries = [
+            (phone, name, (name or "").lower(), [_trigrams(w) for w in (name or "").lower().split()], seen_at)
+            for phone, name, seen_at in rows
+        ]
+        self.stats = {phone: (count, last) for phone, count, last in db.execute(
+            select(appointments.c.patient_phone, func.count(), func.max(appointments.c.booked_at))
+            .group_by(appointments.c.patient_phone)
+        )}
+        self.built_at = time.monotonic()
+
+    # Same scores as the SQL search (_search_match in trigram mode)
+    def _score(self, entry: tuple, name: str, name_trigrams: frozenset, digits: str) -> float:
+        phone, _, lowered, words, _ = entry
+        score, matched = 0.0, False
+        if name:
+            fuzzy = max((len(name_trigrams & w) / len(name_trigrams | w) for w in words), default=0.0)
+            if lowered == name:
+                score = 3.0
+            elif lowered.startswith(name):
+                score = 2.0
+            elif f" {name}" in lowered:
+                score = 1.5
+            else:
+                score = fuzzy
+            matched = name in lowered or fuzzy >= SEARCH_SIMILARITY
+        if digits and phone and digits in phone:
+            score += 3.0 if phone.startswith(digits) else 1.0
+            matched = True
+        return score if matched else None
+
+    def search(self, db: Session, name: str, digits: str, limit: int, offset: int) -> tuple:
+        with self.lock:
+            if self.built_at is None or time.monotonic() - self.built_at > SEARCH_INDEX_TTL_SECONDS:
+                self._build(db)
+            entries, stats = self.entries, self.stats
+
+        name_trigrams = _trigrams(name) if name else frozenset()
+        best = {}
+        for entry in entries:
+            score = self._score(entry, name, name_trigrams, digits)
+            if score is None:
+                continue
+            phone, display_name, _, _, seen_at = entry
+            rank = (score, display_name is not None, seen_at or datetime.min)
+            if phone not in best or rank > best[phone][0]:
+                best[phone] = (rank, display_name)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0][0], item[0]))
+        return len(ranked), [{
+            "phone": phone, "name": display_name, "score": round(rank[0], 3),
+            "appointments": stats.get(phone, (0, None))[0], "last_booked_at": stats.get(phone, (0, None))[1],
+        } for phone, (rank, display_name) in ranked[offset:offset + limit]]
+
+
+_patient_index = _PatientIndex()
+
+"""
+Patient search -> admin lookup by name or phone over appointments and users.
+Prefix and fuzzy (trigram) matches, ranked best first and grouped per phone, with the
+patient's appointment count. Uses the pg_trgm / prefix indexes on Postgres (see init_db.py)
+and an in-memory index elsewhere.
+"""
+@traced("db.search_patients")
+def search_patients(query: str, limit: int = 20, offset: int = 0, db: Session = None) -> Dict[str, Any]:
+    name, digits = _search_terms(query)
+    if not name and not digits:
+        return {"mode": None, "total": 0, "results": []}
+    with _session(db) as db:
+        mode = _search_mode(db)
+        if mode == "memory":
+            total, results = _patient_index.search(db, name, digits, limit, offset)
+        else:
+            total, results = _search_sql(db, name, digits, limit, offset, trigram=mode == "trigram")
+    return {"mode": mode, "total": total, "results": results}
+
+# Idempotency -> reading a stored response for a retried request
+def get_idempotent_response(key: str, db: Session = None) -> Optional[Dict[str, Any]]:
+    stored = _idempotency_cache.get(key)
+    if stored is not None:
+        return stored
+    with _session(db) as db:
+        cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+        row = db.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key, IdempotencyKey.created_at >= cutoff
+        ).first()
+        if not row:
+            return None
+        stored = {
+            "scope": row.scope,
+            "request_hash": row.request_hash,
+            "response": row.response,
+            "status_code": row.status_code,
+        }
+        _idempotency_cache.set(key, stored)
+        return stored
+
+"""
+Idempotency -> claim a key in the caller's transaction, before its write.
+Returns None when the key is claimed (new, or its stored response expired), otherwise the stored
+response. The claim is an uncommitted row: a concurrent request with the same key waits on it
+until this transaction ends, then finds the stored response (or a free key after a rollback).
+Store the response with stage_idempotent_response() before the write commits.
+"""
+def claim_idempotency_key(key: str, scope: str, request_hash: str, db: Session) -> Optional[Dict[str, Any]]:
+    stored = _idempotency_cache.get(key)
+    if stored is not None:
+        return stored
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    if db.get_bind().dialect.name == "postgresql":
+        keys = IdempotencyKey.__table__
+        stmt = postgresql.insert(keys).values(key=key, scope=scope, request_hash=request_hash, created_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[keys.c.key],
+            set_={"scope": stmt.excluded.scope, "request_hash": stmt.excluded.request_hash,
+                  "response": None, "status_code": None, "created_at": stmt.excluded.created_at},
+            where=keys.c.created_at < cutoff,
+        ).returning(keys.c.key)
+        if db.execute(stmt).first() is not None:
+            return None
+    else:
+        row = db.get(IdempotencyKey, key)
+        if row is None or row.created_at.replace(tzinfo=None) < cutoff:
+            db.merge(IdempotencyKey(key=key, scope=scope, request_hash=request_hash, response=None,
+                                    status_code=None, created_at=now))
+            db.flush()
+            return None
+    return get_idempotent_response(key, db=db)
+
+# Idempotency -> the response of a claimed key, written in the same transaction as the request's write
+# (request_hash replaces the stored one when a key is reused after its write was undone)
+def stage_idempotent_response(key: str, response: Any, status_code: int = 200, db: Session = None,
+                              request_hash: str = None):
+    values = {"response": response, "status_code": status_code}
+    if request_hash is not None:
+        values["request_hash"] = request_hash
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(values, synchronize_session=False)
+    _idempotency_cache.pop(key)
@@ -1,20 +1,55 @@
 import os
 from datetime import time
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from models import Base, Slot
+from partitions import ensure_partitions
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Patient search indexes (Postgres) -> btree prefix indexes always, trigram indexes when pg_trgm is available
+PREFIX_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_appointments_patient_phone ON appointments (patient_phone varchar_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_appointments_patient_name_prefix ON appointments (lower(patient_name) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_phone_prefix ON users (phone_number varchar_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_name_prefix ON users (lower(name) text_pattern_ops)",
+]
+TRIGRAM_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_appointments_patient_name_trgm ON appointments USING gin (patient_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_appointments_patient_phone_trgm ON appointments USING gin (patient_phone gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_name_trgm ON users USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_phone_trgm ON users USING gin (phone_number gin_trgm_ops)",
+]
+
+def ensure_search_indexes(engine) -> bool:
+    with engine.begin() as conn:
+        for ddl in PREFIX_INDEXES:
+            conn.execute(text(ddl))
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for ddl in TRIGRAM_INDEXES:
+                conn.execute(text(ddl))
+        return True
+    except Exception as e:
+        # Search still works, with prefix matching only
+        print(f"pg_trgm unavailable, patient search uses prefix indexes only: {str(e).splitlines()[0]}")
+        return False
+
+
 def init_database():
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL not found")
     
     engine = create_engine(DATABASE_URL)
     Base.metadata.create_all(engine)
+    # call_summaries is partitioned by month on Postgres -> create the default and upcoming partitions
+    if engine.dialect.name == "postgresql":
+        ensure_partitions(engine)
+        ensure_search_indexes(engine)
     print("All tables created successfully!")
     return engine
 
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, Time, Integer, Text, ForeignKey, DECIMAL, JSON, DateTime, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, Date, Time, Integer, Text, ForeignKey, DECIMAL, JSON, DateTime, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, declarative_base
 
@@ -61,4 +61,47 @@ class CallSummary(Base):
     call_duration_seconds = Column(Integer)
     cost_breakdown = Column(JSON)  # JSONB in PostgreSQL
     total_cost = Column(DECIMAL(10, 4))
+    # Part of the key: on Postgres the table is range-partitioned by month on created_at (see partitions.py)
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_call_summaries_phone_created', 'patient_phone', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
+
+class SlotHold(Base):
+    __tablename__ = 'slot_holds'
+    
+    # One hold per slot; an expired hold is free for anyone to take over
+    slot_id = Column(UUID(as_uuid=True), ForeignKey('slots.id', ondelete='CASCADE'), primary_key=True)
+    phone = Column(String(20), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+    
+    key = Column(String(255), primary_key=True)
+    scope = Column(String(50), nullable=False)  # 'book', 'modify', 'cancel', 'agent_book'
+    request_hash = Column(String(64), nullable=False)
+    response = Column(JSON)
+    status_code = Column(Integer, default=200)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class DailyStat(Base):
+    __tablename__ = 'daily_stats'
+    
+    # Rollup kept up to date by db_client's writes: one row per patient and day, plus one per day
+    # for all patients (phone '')
+    phone = Column(String(20), primary_key=True, default='')
+    day = Column(Date, primary_key=True)
+    calls = Column(Integer, nullable=False, default=0)
+    call_seconds = Column(Integer, nullable=False, default=0)
+    total_cost = Column(DECIMAL(12, 4), nullable=False, default=0)
+    booked = Column(Integer, nullable=False, default=0)
+    cancelled = Column(Integer, nullable=False, default=0)
+    modified = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
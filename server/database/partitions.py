@@ -0,0 +1,247 @@
+"""
+Monthly range partitions for call_summaries (Postgres only).
+
+call_summaries is partitioned by created_at, one partition per month
+(call_summaries_y2025m06), plus a default partition that catches rows outside
+every monthly range. Queries that filter on created_at only touch the matching
+months.
+
+    python database/partitions.py ensure               # create this month and the next few
+    python database/partitions.py archive --keep-months 12 --format ndjson.gz
+    python database/partitions.py migrate              # convert an existing unpartitioned table
+
+archive detaches every monthly partition older than --keep-months, writes its
+rows to a compressed file in --archive-dir and drops it (--keep-detached renames
+it to call_summaries_y2025m06_archived instead). Run it daily; it also runs ensure.
+"""
+import os
+import re
+import gzip
+import json
+import logging
+import argparse
+from datetime import date
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from models import CallSummary
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TABLE = "call_summaries"
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+# Kept after archiving (--keep-detached) -> renamed so later runs skip it
+ARCHIVED_SUFFIX = "_archived"
+
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "12"))
+ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "archive")
+ARCHIVE_CHUNK_SIZE = 5000
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _bounds(month: date) -> tuple:
+    return f"{month.isoformat()} 00:00:00+00", f"{_add_months(month, 1).isoformat()} 00:00:00+00"
+
+
+def is_partitioned(conn) -> bool:
+    return conn.execute(text("SELECT relkind FROM pg_class WHERE relname = :t"), {"t": TABLE}).scalar() == "p"
+
+
+# Monthly partitions currently attached -> {name: month}
+def attached_partitions(conn) -> dict:
+    rows = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :t
+    """), {"t": TABLE}).scalars()
+    partitions = {}
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+
+# Monthly tables left detached by an interrupted archive run (archived ones end in ARCHIVED_SUFFIX
+# and don't match PARTITION_NAME)
+def detached_partitions(conn) -> dict:
+    attached = attached_partitions(conn)
+    names = conn.execute(text("SELECT tablename FROM pg_tables WHERE tablename LIKE :p"),
+                         {"p": f"{TABLE}_y%"}).scalars()
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match and name not in attached:
+            partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+
+"""
+Create the monthly partition for `month`.
+Rows for that month that already landed in the default partition are moved into it,
+so a late ensure never fails on "updated partition constraint for default partition".
+"""
+def create_partition(conn, month: date):
+    name = partition_name(month)
+    start, end = _bounds(month)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), {"start": start, "end": end})
+    conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    logger.info(f"Created partition {name}")
+
+
+# Default partition plus one partition per month from this month to months_ahead
+def ensure_partitions(engine, months_ahead: int = MONTHS_AHEAD) -> list:
+    created = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            logger.warning(f"{TABLE} is not partitioned; run `python database/partitions.py migrate`")
+            return created
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        existing = attached_partitions(conn)
+        this_month = date.today().replace(day=1)
+        for offset in range(months_ahead + 1):
+            month = _add_months(this_month, offset)
+            if partition_name(month) not in existing:
+                create_partition(conn, month)
+                created.append(partition_name(month))
+    return created
+
+
+def _export_ndjson_gz(conn, name: str, path: str) -> int:
+    rows = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        result = conn.execute(text(f"SELECT * FROM {name}").execution_options(yield_per=ARCHIVE_CHUNK_SIZE))
+        for batch in result.mappings().partitions():
+            f.write("".join(json.dumps(dict(row), default=str) + "\n" for row in batch))
+            rows += len(batch)
+    return rows
+
+
+def _export_parquet(conn, name: str, path: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet archives need pyarrow (pip install pyarrow); use --format ndjson.gz instead")
+
+    rows = 0
+    writer = None
+    result = conn.execute(text(f"SELECT * FROM {name}").execution_options(yield_per=ARCHIVE_CHUNK_SIZE))
+    try:
+        for batch in result.mappings().partitions():
+            records = [{k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()} for row in batch]
+            table = pa.Table.from_pylist(records, schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+"""
+Detach, export and drop every monthly partition older than keep_months.
+Each file is written to a temp name and renamed once complete; the table is only dropped
+(or, with drop=False, renamed with ARCHIVED_SUFFIX) after that, so an interrupted run is
+picked up again (detached tables are archived first).
+"""
+def archive_partitions(engine, keep_months: int = RETENTION_MONTHS, archive_dir: str = ARCHIVE_DIR,
+                       fmt: str = "ndjson.gz", drop: bool = True) -> list:
+    export = {"ndjson.gz": _export_ndjson_gz, "parquet": _export_parquet}[fmt]
+    cutoff = _add_months(date.today().replace(day=1), -keep_months)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            logger.warning(f"{TABLE} is not partitioned; nothing to archive")
+            return []
+        for name, month in sorted(attached_partitions(conn).items()):
+            if month < cutoff:
+                conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+                logger.info(f"Detached partition {name}")
+
+    archived = []
+    with engine.connect() as conn:
+        for name in sorted(detached_partitions(conn)):
+            path = os.path.join(archive_dir, f"{name}.{fmt}")
+            tmp_path = f"{path}.tmp"
+            rows = export(conn, name, tmp_path)
+            os.replace(tmp_path, path)
+            if drop:
+                conn.execute(text(f"DROP TABLE {name}"))
+            else:
+                conn.execute(text(f"ALTER TABLE {name} RENAME TO {name}{ARCHIVED_SUFFIX}"))
+            conn.commit()
+            logger.info(f"Archived {rows} rows from {name} to {path}")
+            archived.append({"partition": name, "rows": rows, "path": path})
+    return archived
+
+
+"""
+Convert an existing unpartitioned call_summaries table.
+Creates the partitioned table with the model's columns, a partition for every month that has
+rows (and the months ahead), copies the rows and swaps the tables in one transaction.
+The old table is kept as call_summaries_unpartitioned until you drop it.
+"""
+def migrate_to_partitioned(engine):
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            logger.info(f"{TABLE} is already partitioned")
+            return
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned"))
+        conn.execute(text(f"ALTER INDEX IF EXISTS {TABLE}_pkey RENAME TO {TABLE}_unpartitioned_pkey"))
+        conn.execute(text(f"UPDATE {TABLE}_unpartitioned SET created_at = now() WHERE created_at IS NULL"))
+        CallSummary.__table__.create(conn)
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        months = conn.execute(text(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM {TABLE}_unpartitioned"
+        )).scalars().all()
+        for month in sorted(months):
+            create_partition(conn, month)
+        columns = ", ".join(c.name for c in CallSummary.__table__.columns)
+        conn.execute(text(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {TABLE}_unpartitioned"))
+    ensure_partitions(engine)
+    logger.info(f"Migrated {TABLE} to monthly partitions")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of call_summaries")
+    parser.add_argument("command", choices=["ensure", "archive", "migrate"])
+    parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    parser.add_argument("--keep-months", type=int, default=RETENTION_MONTHS)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--format", choices=["ndjson.gz", "parquet"], default="ndjson.gz")
+    parser.add_argument("--keep-detached", action="store_true", help="archive but keep the partitions (renamed *_archived)")
+    options = parser.parse_args()
+
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    if options.command == "migrate":
+        migrate_to_partitioned(engine)
+    elif options.command == "ensure":
+        print(json.dumps(ensure_partitions(engine, options.months_ahead)))
+    else:
+        ensure_partitions(engine, options.months_ahead)
+        report = archive_partitions(engine, options.keep_months, options.archive_dir, options.format,
+                                    drop=not options.keep_detached)
+        print(json.dumps(report))
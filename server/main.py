@@ -1,5 +1,5 @@
 from sqlalchemy import create_engine
-# from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
 import os
 
@@ -16,15 +16,19 @@ DBNAME = os.getenv("dbname")
 # Construct the SQLAlchemy connection string
 DATABASE_URL = f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode=require"
 
-# Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Test the connection -> only when run directly, importing this module doesn't connect
 # If using Transaction Pooler or Session Pooler, we want to ensure we disable SQLAlchemy client side pooling -
 # https://docs.sqlalchemy.org/en/20/core/pooling.html#switching-pool-implementations
-# engine = create_engine(DATABASE_URL, poolclass=NullPool)
+def test_connection():
+    engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            print("Connection successful!")
+    except Exception as e:
+        print(f"Failed to connect: {e}")
+    finally:
+        engine.dispose()
 
-# Test the connection
-try:
-    with engine.connect() as connection:
-        print("Connection successful!")
-except Exception as e:
-    print(f"Failed to connect: {e}")
\ No newline at end of file
+
+if __name__ == "__main__":
+    test_connection()
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Non-blocking logging.
+configure_logging() puts the root logger's handlers behind a bounded queue: the calling thread
+(the event loop) only enqueues the record, and a listener thread formats and writes it. When the
+queue is full, records are dropped and counted instead of blocking the caller.
+
+LOG_LEVEL       root level when nothing else configured logging (default INFO)
+LOG_FORMAT      json (default) | text
+LOG_LEVELS      per-module levels, e.g. "livekit=WARNING,database.db_client=DEBUG"
+LOG_QUEUE_SIZE  records held for the listener before new ones are dropped (default 10000)
+
+Fields passed with extra={...} become JSON keys; records logged inside a sampled trace carry
+its trace_id / span_id (observability/tracing.py).
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+from observability.tracing import current_span
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+# LogRecord attributes -> everything else on a record came from extra={...}
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line: ts, level, logger, message, extra fields, exception
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Never waits on a full queue; the message is merged in the caller's thread, formatting is not
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        span = current_span()
+        if span.recording:
+            record.trace_id = f"{span.trace_id:032x}"
+            record.span_id = f"{span.span_id:016x}"
+        record.msg = record.getMessage()
+        record.args = None
+        # Tracebacks are rendered now (exc_info holds frames that may change before the listener runs)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler = None
+_listener = None
+
+
+def _formatter() -> logging.Formatter:
+    return JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+# "livekit=WARNING,database.db_client=DEBUG" -> per-logger levels (loggers are per process)
+def set_levels(spec: str = None):
+    for item in (spec if spec is not None else LOG_LEVELS).split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+
+"""
+Route the root logger through the queue (idempotent).
+Handlers already on the root logger (LiveKit's CLI installs its own) keep writing, only from the
+listener thread, at the level already set; with none, records go to stderr in LOG_FORMAT at LOG_LEVEL. Uvicorn's loggers are pointed at
+the root logger so access logs take the same path.
+"""
+def configure_logging(level: str = None, queue_size: int = None):
+    global _handler, _listener
+    root = logging.getLogger()
+    if _handler is not None and _handler in root.handlers:
+        return _handler
+
+    handlers = [h for h in root.handlers if h is not _handler]
+    if not handlers:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(_formatter())
+        handlers = [stream]
+        level = level or LOG_LEVEL
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    for name in ("uvicorn", "uvicorn.access", "uvicorn.error"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.Queue(maxsize=queue_size or QUEUE_SIZE)
+    _handler = _QueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root.addHandler(_handler)
+    if level:
+        root.setLevel(level)
+    set_levels()
+    return _handler
+
+
+# Records dropped because the listener could not keep up
+def dropped_records() -> int:
+    return _handler.dropped if _handler is not None else 0
+
+
+# Write out what is still queued and give the root logger its handlers back (at exit)
+def shutdown_logging():
+    global _handler, _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _handler = _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,439 @@
+"""
+Request tracing.
+Spans for API requests, agent calls/turns/tools, db_client functions and SQL statements, linked
+parent to child through a contextvar (so they follow asyncio tasks and FastAPI's threadpool).
+
+    TRACING_EXPORTER=otlp-file TRACING_FILE=traces.jsonl TRACING_SAMPLE_RATE=0.1 uvicorn app.main:app
+
+TRACING_EXPORTER   none (default) | memory | otlp-file
+TRACING_FILE       OTLP/JSON output, one export request per line (otlp-file)
+TRACING_SAMPLE_RATE  share of traces recorded, decided once per trace at its root span
+TRACING_SQL        0 to skip the per-statement SQL spans
+
+Sampling is head based: an unsampled root makes every span below it a shared no-op, and with
+the exporter off no span is created at all. Finished spans are exported by a background thread.
+Phone numbers are never recorded, only hash_phone() of them.
+"""
+import os
+import json
+import time
+import atexit
+import random
+import hashlib
+import inspect
+import threading
+import functools
+from collections import deque
+from contextvars import ContextVar
+
+EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+FILE = os.getenv("TRACING_FILE", "traces.otlp.jsonl")
+SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+SQL_SPANS = os.getenv("TRACING_SQL", "1") != "0"
+FLUSH_SECONDS = float(os.getenv("TRACING_FLUSH_SECONDS", "2"))
+SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "superbyrn")
+PHONE_SALT = os.getenv("TRACING_PHONE_SALT", "")
+
+# Span kinds as numbered in OTLP
+KINDS = {"internal": 1, "server": 2, "client": 3}
+
+_current = ContextVar("current_span", default=None)
+
+
+def hash_phone(phone: str) -> str:
+    digits = "".join(c for c in str(phone) if c.isdigit())
+    return hashlib.sha256(f"{PHONE_SALT}{digits}".encode()).hexdigest()[:16]
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes",
+                 "error", "_token")
+    recording = True
+
+    def __init__(self, name: str, parent: "Span" = None, kind: str = "internal", attributes: dict = None):
+        self.trace_id = parent.trace_id if parent else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def set_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    # Idempotent: a call span can be ended by the hang-up and by the shutdown callback
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self._token is not None:
+                try:
+                    _current.reset(self._token)
+                except ValueError:
+                    pass  # ended from another context (e.g. a shutdown callback)
+                self._token = None
+            _processor.add(self)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.set_error(exc)
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    # Stands in for every span of an unsampled trace (and for all spans with tracing off)
+    __slots__ = ("_token",)
+    recording = False
+
+    def __init__(self):
+        self._token = None
+
+    def set(self, **attributes):
+        pass
+
+    def set_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _UnsampledRoot(_NoopSpan):
+    # Marks the context of an unsampled trace, so its children skip without sampling again
+    __slots__ = ()
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        return False
+
+    def end(self):
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                pass
+            self._token = None
+
+
+def enabled() -> bool:
+    return _processor.exporter is not None
+
+
+"""
+Start a span as a child of the current one (a new trace if there is none).
+Use it as a context manager; activate=True also makes it current right away, for spans that end
+in a callback (call spans) instead of a with block.
+"""
+def start_span(name: str, kind: str = "internal", activate: bool = False, **attributes):
+    if _processor.exporter is None:
+        return _NOOP
+    parent = _current.get()
+    if parent is None:
+        if random.random() >= SAMPLE_RATE:
+            span = _UnsampledRoot()
+            if activate:
+                span._token = _current.set(span)
+            return span
+    elif not parent.recording:
+        return _NOOP
+    span = Span(name, parent, kind, attributes)
+    if activate:
+        span._token = _current.set(span)
+    return span
+
+
+def current_span():
+    return _current.get() or _NOOP
+
+
+"""
+Decorator -> run a function (sync or async) in a span named after it.
+Arguments named in `capture` become attributes (phone-like ones hashed). The result is recorded
+as rows (a list or a count), ok (a bool) or found=False (None).
+"""
+def traced(name: str = None, capture: tuple = ()):
+    def decorate(func):
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func)
+        captured = [p for p in capture if p in signature.parameters]
+
+        def attributes(args, kwargs) -> dict:
+            if not captured:
+                return {}
+            bound = signature.bind_partial(*args, **kwargs).arguments
+            values = {}
+            for param in captured:
+                value = bound.get(param)
+                if value is None:
+                    continue
+                if "phone" in param:
+                    values[f"{param}.hash"] = hash_phone(value)
+                else:
+                    values[param] = str(value)
+            return values
+
+        def record_result(span, result):
+            if isinstance(result, bool):
+                span.set(ok=result)
+            elif isinstance(result, int):
+                span.set(rows=result)
+            elif isinstance(result, (list, tuple)):
+                span.set(rows=len(result))
+            elif result is None:
+                span.set(found=False)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _processor.exporter is None:
+                    return await func(*args, **kwargs)
+                with start_span(span_name) as span:
+                    if span.recording:
+                        span.set(**attributes(args, kwargs))
+                    result = await func(*args, **kwargs)
+                    if span.recording:
+                        record_result(span, result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _processor.exporter is None:
+                return func(*args, **kwargs)
+            with start_span(span_name) as span:
+                if span.recording:
+                    span.set(**attributes(args, kwargs))
+                result = func(*args, **kwargs)
+                if span.recording:
+                    record_result(span, result)
+                return result
+        return wrapper
+    return decorate
+
+
+# SQL spans -> one per statement, as children of whatever span runs it
+def instrument_engine(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not SQL_SPANS or _processor.exporter is None:
+            return
+        parent = _current.get()
+        if parent is None or not parent.recording:
+            return  # SQL alone never starts a trace
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "SQL"
+        span = Span(f"SQL {operation}", parent, "client", {
+            "db.system": engine.dialect.name,
+            # The statement text carries no values (they are bound parameters)
+            "db.statement": statement[:500],
+        })
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("tracing_spans")
+        if spans:
+            span = spans.pop()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set(**{"db.rows": cursor.rowcount})
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        spans = context.connection.info.get("tracing_spans") if context.connection is not None else None
+        if spans:
+            span = spans.pop()
+            span.set_error(context.original_exception)
+            span.end()
+
+
+"""
+ASGI middleware -> one server span per HTTP request, named after the matched route template
+(GET /v1/appointments/{phone}), so phone numbers in paths never reach the trace.
+"""
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _processor.exporter is None:
+            return await self.app(scope, receive, send)
+
+        span = start_span(f"{scope['method']} request", kind="server")
+        status = {}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        with span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                if span.recording:
+                    span.name = f"{scope['method']} {getattr(scope.get('route'), 'path', '(unmatched)')}"
+                    span.set(**{"http.method": scope["method"], "http.status_code": status.get("code", 500)})
+                    if status.get("code", 500) >= 500:
+                        span.error = f"HTTP {status.get('code', 500)}"
+
+
+def _value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# OTLP/JSON (the encoding the OpenTelemetry file exporter and collectors read) for a batch of spans
+def to_otlp(spans: list) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": "observability.tracing"},
+            "spans": [{
+                "traceId": f"{s.trace_id:032x}",
+                "spanId": f"{s.span_id:016x}",
+                **({"parentSpanId": f"{s.parent_id:016x}"} if s.parent_id else {}),
+                "name": s.name,
+                "kind": KINDS.get(s.kind, 1),
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class InMemoryExporter:
+    # Keeps the most recent finished spans (tests, benchmarks, a debug endpoint)
+    def __init__(self, maxlen: int = 10000):
+        self.spans = deque(maxlen=maxlen)
+
+    def export(self, spans: list):
+        self.spans.extend(spans)
+
+    def clear(self):
+        self.spans.clear()
+
+    def shutdown(self):
+        pass
+
+
+class OTLPFileExporter:
+    # Appends one OTLP/JSON export request per batch, one per line (offline analysis, `otelcol` file receiver)
+    def __init__(self, path: str = FILE):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: list):
+        self._file.write(json.dumps(to_otlp(spans), separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def shutdown(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class _BatchProcessor:
+    # Finished spans are buffered and exported off the hot path by a daemon thread
+    def __init__(self):
+        self.exporter = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, span: Span):
+        if self.exporter is None:
+            return
+        with self._lock:
+            self._buffer.append(span)
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch and self.exporter is not None:
+            self.exporter.export(batch)
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                pass  # a failing exporter must never take the process down
+
+    def start(self, exporter):
+        self.exporter = exporter
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tracing-export", daemon=True)
+            self._thread.start()
+
+
+_processor = _BatchProcessor()
+
+
+"""
+Install an exporter (anything with export(spans) and shutdown()); None turns tracing off.
+sample_rate overrides TRACING_SAMPLE_RATE.
+"""
+def configure(exporter=None, sample_rate: float = None):
+    global SAMPLE_RATE
+    if sample_rate is not None:
+        SAMPLE_RATE = sample_rate
+    previous = _processor.exporter
+    _processor.flush()
+    if exporter is None:
+        _processor.exporter = None
+    else:
+        _processor.start(exporter)
+    if previous is not None and previous is not exporter:
+        previous.shutdown()
+    return exporter
+
+
+def flush():
+    _processor.flush()
+
+
+def _exporter_from_env():
+    if EXPORTER == "memory":
+        return InMemoryExporter()
+    if EXPORTER in ("otlp-file", "file"):
+        return OTLPFileExporter(FILE)
+    return None
+
+
+configure(_exporter_from_env())
+atexit.register(flush)